@@ -0,0 +1,221 @@
+import json
+import math
+import os
+import numpy as np
+from PIL import Image
+
+
+class FrameStack:
+    """Packs the extracted frames of a GIF into a single file instead of one PNG for each frame, with a JSON index of the
+            extracted frames numbers and durations next to it.
+
+        `npy` writes the frames as a `(frames, height, width, channels)` uint8 `.npy` array, `palette` writes the palette indices
+            of the frames as a `(frames, height, width)` uint8 `.npy` array and their palette into the index (the palette of the
+            first frame extended with the colors of the next frames, the frames are mapped to their nearest colors if the GIF
+            has more than 256 colors in total), both are written
+            through a memory map while the frames are decoded and are read back with `FrameStack.load` without copying the frames.
+            `sprite` writes the frames as a single PNG sprite sheet, row by row, laid out when the stack is closed.
+    """
+
+    #formats of the packed frames.
+    FORMATS = ['npy', 'palette', 'sprite']
+    #number of frames reserved at first if the number of frames isn't known, the reserved frames are doubled when they are full.
+    INITIAL_FRAMES = 16
+
+    def __init__(self, save_folder_path: str, file_name: str, frames_format: str, max_frames: int, gif_image: Image.Image) -> None:
+        """
+        :param save_folder_path: The folder to write the frames file and the index into it.
+        :type save_folder_path: str
+        :param file_name: The name of the GIF, the files are named `<file_name>_frames.<npy|png>` and `<file_name>_frames.json`
+        :type file_name: str
+        :param frames_format: `npy`, `palette` or `sprite`
+        :type frames_format: str
+        :param max_frames: max number of frames added to the stack, the file is truncated to the added frames when it's closed,
+                if `None` the number of frames isn't limited and the reserved frames grow as the frames are added.
+        :type max_frames: int
+        :param gif_image: The opened GIF image positioned at its first frame, to get the size, the palette and the transparency of the frames.
+        :type gif_image: PIL.Image.Image
+        """
+        if frames_format not in FrameStack.FORMATS:
+            raise ValueError("frames_format should be one of {}, got {}".format(FrameStack.FORMATS, frames_format))
+        self.frames_format = frames_format
+        self.max_frames = max_frames
+        self.size = gif_image.size
+        #the frames after the first one are decoded as RGBA if the GIF has a transparent color.
+        self.mode = 'RGBA' if 'transparency' in gif_image.info else 'RGB'
+        self.transparency = gif_image.info.get('transparency') if gif_image.mode == 'P' else None
+        self.frame_indices = []
+        self.frame_durations = []
+        self.index_path = os.path.join(save_folder_path, '{}_frames.json'.format(file_name))
+        self.frames_path = os.path.join(save_folder_path, '{}_frames.{}'.format(file_name, 'png' if frames_format == 'sprite' else 'npy'))
+
+        channels = () if frames_format == 'palette' else (len(self.mode),)
+        self.frame_shape = (self.size[1], self.size[0]) + channels
+        if frames_format == 'palette':
+            #the frames after the first one are decoded as RGB(A) and mapped back to the palette, as dict of `0xRRGGBB` to palette index.
+            self.palette = gif_image.getpalette()[:768] if gif_image.mode == 'P' else []
+            self.first_palette = list(self.palette)
+            self.colors = {}
+            for color_index in range(len(self.palette) // 3 - 1, -1, -1):
+                red, green, blue = self.palette[3 * color_index: 3 * color_index + 3]
+                self.colors[(red << 16) | (green << 8) | blue] = color_index
+            self.__sort_colors()
+
+        #number of frames the array is reserved for.
+        self.reserved_frames = max_frames if max_frames is not None else FrameStack.INITIAL_FRAMES
+        if frames_format == 'sprite':
+            #the pixels of the frames, the sheet is laid out once the number of frames is known.
+            self.frames = []
+        else:
+            self.frames = np.lib.format.open_memmap(self.frames_path, mode = 'w+', dtype = np.uint8, shape = (self.reserved_frames,) + self.frame_shape)
+        return
+
+    @staticmethod
+    def npy_header(shape: tuple, header_size: int) -> bytes:
+        """returns the `.npy` version 1.0 header of a uint8 array of the given shape padded with spaces to `header_size` bytes,
+                so the header of a written array can be replaced in place.
+        """
+        header = "{{'descr': '|u1', 'fortran_order': False, 'shape': {}, }}".format(repr(tuple(shape)))
+        header = header.ljust(header_size - 10 - 1) + '\n'
+        return b'\x93NUMPY\x01\x00' + (len(header)).to_bytes(2, 'little') + header.encode('latin1')
+
+    def __resize(self, number_of_frames: int) -> None:
+        """resizes the `.npy` file of the frames to `number_of_frames` frames in place, the header is rewritten with the new
+                shape (`numpy` pads the header so a larger first dimension fits in it) and the file is truncated or extended.
+        """
+        offset = self.frames.offset
+        self.frames.flush()
+        #drop the memory map before the file is resized.
+        self.frames = None
+        with open(self.frames_path, 'r+b') as frames_file:
+            frames_file.write(FrameStack.npy_header((number_of_frames,) + self.frame_shape, offset))
+            frames_file.truncate(offset + number_of_frames * int(np.prod(self.frame_shape)))
+        self.reserved_frames = number_of_frames
+        return
+
+    def __sort_colors(self) -> None:
+        """sorts the `0xRRGGBB` colors of the palette to look up the pixels of the frames with a binary search.
+        """
+        self.sorted_colors = np.array(sorted(self.colors), dtype = np.uint32)
+        self.sorted_indices = np.array([self.colors[color] for color in self.sorted_colors.tolist()], dtype = np.uint8)
+        return
+
+    def frame_pixels(self, frame: Image.Image) -> np.ndarray:
+        """returns the pixels of a frame in the format of the stack.
+        """
+        if self.frames_format != 'palette':
+            return np.asarray(frame.convert(self.mode))
+        if frame.mode == 'P' and frame.getpalette()[:768] == self.first_palette:
+            return np.asarray(frame)
+
+        rgb = np.asarray(frame.convert('RGB')).astype(np.uint32)
+        keys = (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+        positions = np.minimum(np.searchsorted(self.sorted_colors, keys), max(len(self.sorted_colors) - 1, 0))
+        found = self.sorted_colors[positions] == keys if len(self.sorted_colors) > 0 else np.zeros(keys.shape, dtype = bool)
+        if not found.all():
+            #the new colors are added to the palette, once it's full they are mapped to their nearest color of the palette.
+            for color in np.unique(keys[~found]).tolist():
+                if len(self.palette) < 768:
+                    self.colors[color] = len(self.palette) // 3
+                    self.palette.extend([color >> 16, (color >> 8) & 255, color & 255])
+                else:
+                    palette = np.array(self.palette, dtype = np.int32).reshape(-1, 3)
+                    distances = np.sum((palette - [color >> 16, (color >> 8) & 255, color & 255]) ** 2, axis = 1)
+                    self.colors[color] = int(np.argmin(distances))
+            self.__sort_colors()
+            positions = np.searchsorted(self.sorted_colors, keys)
+
+        pixels = self.sorted_indices[positions]
+        if frame.mode == 'RGBA' and self.transparency is not None:
+            pixels = np.where(np.asarray(frame.getchannel('A')) == 0, np.uint8(self.transparency), pixels)
+        return pixels
+
+    def add(self, frame_index: int, frame: Image.Image, duration: int) -> None:
+        """adds a frame to the stack, the frames are stored in the order they are added.
+
+        :param frame_index: The number of the frame in the GIF.
+        :type frame_index: int
+        :param frame: The frame.
+        :type frame: PIL.Image.Image
+        :param duration: The duration of the frame in milliseconds.
+        :type duration: int
+        """
+        count = len(self.frame_indices)
+        if self.max_frames is not None and count >= self.max_frames:
+            raise IndexError("the stack is full with {} frames".format(self.max_frames))
+        pixels = self.frame_pixels(frame)
+        if self.frames_format == 'sprite':
+            self.frames.append(pixels)
+        else:
+            if count >= self.reserved_frames:
+                self.__resize(2 * self.reserved_frames)
+                self.frames = np.load(self.frames_path, mmap_mode = 'r+')
+            self.frames[count] = pixels
+        self.frame_indices.append(frame_index)
+        self.frame_durations.append(duration)
+        return
+
+    def close(self) -> str:
+        """writes the sprite sheet or truncates the array to the added frames, then writes the index.
+
+        :returns: the name of the index file.
+        :rtype: str
+        """
+        count = len(self.frame_indices)
+        index = {
+            'frames_file': os.path.basename(self.frames_path),
+            'frames_format': self.frames_format,
+            'number_of_frames': count,
+            'frame_size': list(self.size),
+            'frame_indices': self.frame_indices,
+            'frame_durations': self.frame_durations,
+        }
+
+        if self.frames_format == 'sprite':
+            columns = max(int(math.ceil(math.sqrt(count))), 1)
+            rows = max(int(math.ceil(count / columns)), 1)
+            sheet = np.zeros((rows * self.size[1], columns * self.size[0]) + self.frame_shape[2:], dtype = np.uint8)
+            for position, pixels in enumerate(self.frames):
+                x, y = (position % columns) * self.size[0], (position // columns) * self.size[1]
+                sheet[y: y + self.size[1], x: x + self.size[0]] = pixels
+            Image.fromarray(sheet).save(self.frames_path, format = 'PNG')
+            index['columns'] = columns
+        else:
+            if count < self.reserved_frames:
+                #the reserved frames that were not added are dropped.
+                self.__resize(count)
+            else:
+                self.frames.flush()
+            if self.frames_format == 'palette':
+                index['palette'] = self.palette
+                index['transparency'] = self.transparency
+        self.frames = None
+
+        with open(self.index_path, 'w', encoding = 'utf-8') as index_file:
+            json.dump(index, index_file, indent = 4)
+        return os.path.basename(self.index_path)
+
+    @staticmethod
+    def load(index_path: str) -> tuple:
+        """loads the frames of a GIF written by a `FrameStack`, the `npy` and `palette` frames are memory mapped so slicing the
+                frames doesn't copy them, the sprite sheet is decoded and split into its frames.
+
+        :param index_path: The path of the `<file_name>_frames.json` index.
+        :type index_path: str
+
+        :returns: tuple of the frames array of shape `(frames, height, width[, channels])` and the index dict.
+        :rtype: tuple(ndarray, dict)
+        """
+        with open(index_path, encoding = 'utf-8') as index_file:
+            index = json.load(index_file)
+        frames_path = os.path.join(os.path.dirname(index_path), index['frames_file'])
+        if index['frames_format'] != 'sprite':
+            return np.load(frames_path, mmap_mode = 'r'), index
+
+        sprite = np.asarray(Image.open(frames_path))
+        width, height = index['frame_size']
+        columns = index['columns']
+        rows = sprite.shape[0] // height
+        #split the sheet into its `(row, column)` cells then flatten the cells to the frames.
+        cells = sprite.reshape((rows, height, columns, width) + sprite.shape[2:]).swapaxes(1, 2)
+        return cells.reshape((rows * columns, height, width) + sprite.shape[2:])[:index['number_of_frames']], index
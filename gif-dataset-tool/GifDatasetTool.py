@@ -1,16 +1,34 @@
+import bisect
+import collections
 import hashlib
+import io
+import itertools
 import json
+import math
 import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union
 from PIL import Image, ImageSequence
 import os 
 from pathos.multiprocessing import ProcessingPool
 import numpy as np 
 import click 
+from DirectoryScanner import DirectoryScanner
+from FrameStack import FrameStack
 
 class GIFDatasetTools: 
     """wrapper for methods that help to manipulate and datasets/folders containing gif images. 
     """
+    #number of threads encoding and writing the extracted frames while the next frames are decoded. 
+    WRITER_THREADS = 2
+    #max number of decoded frames waiting to be written, bounds the memory of the extraction. 
+    MAX_PENDING_FRAMES = 8
+    #max number of bytes of the sampled frames kept in memory while the frames of a GIF are sampled. 
+    MAX_SAMPLED_BYTES = 64 * 1024 * 1024
+    #min number of seconds between two progress reports of `process_gif_dataset`
+    PROGRESS_INTERVAL = 5
+
     def __init__(self) -> None:
         pass
     
@@ -42,10 +60,47 @@ class GIFDatasetTools:
 
         """
         
-        if recursive: 
-            return [os.path.join(dir_path, file_name) for dir_path, dir_names, file_names in os.walk(folder_path) for file_name in file_names]
-        else: 
-            return [os.path.join(folder_path, file_name) for file_name in os.listdir(folder_path)]
+        return list(DirectoryScanner().files(folder_path, recursive))
+    
+    @staticmethod
+    def read_metadata_log(log_path: str) -> list[dict]: 
+        """reads the metadata of the GIFs already processed from a `JSONL` metadata log, a partially written last line (left by 
+                a killed run) is dropped from the file so new lines can be appended to it. 
+        
+        :param log_path: the path of the metadata log. 
+        :type log_path: str
+        
+        :returns: a list of the metadata dicts in the log, empty if the log doesn't exist. 
+        :rtype: list[dict]
+        """
+        if not os.path.isfile(log_path): 
+            return []
+        
+        images_metadata = []
+        complete_size = 0
+        with open(log_path, 'rb') as log_file: 
+            for line in log_file: 
+                if not line.endswith(b'\n'): 
+                    break
+                try: 
+                    images_metadata.append(json.loads(line))
+                except ValueError: 
+                    break
+                complete_size += len(line)
+        
+        if complete_size < os.path.getsize(log_path): 
+            with open(log_path, 'r+b') as log_file: 
+                log_file.truncate(complete_size)
+        return images_metadata
+    
+    @staticmethod
+    def file_size(path: str) -> int: 
+        """returns the size of a file in bytes, `0` if it can't be read. 
+        """
+        try: 
+            return os.path.getsize(path)
+        except OSError: 
+            return 0
     
     @staticmethod
     def image_sha256(image: Image.Image) -> str: 
@@ -72,17 +127,8 @@ class GIFDatasetTools:
 
         """
         
-        if isinstance(image, str):
-            image = Image.open(image)
-            
-        return {
-            'original_file_name': os.path.abspath(image.filename), 
-            'sha256': GIFDatasetTools.image_sha256(image),
-            'number_of_frames': GIFDatasetTools.get_number_of_frames(image),
-            'file_size': os.stat(image.filename).st_size , 
-            'image_size': "({},{})".format(image.size[0] , image.size[1]),
-            'format': image.format.lower(),
-        }
+        #the metadata is computed in a single pass over the GIF frames. 
+        return GIFDatasetTools.scan_gif(image if isinstance(image, str) else image.filename)
 
     @staticmethod
     def save_image(image: Image.Image, path: str) -> None: 
@@ -118,7 +164,186 @@ class GIFDatasetTools:
         return gif_image.n_frames
     
     @staticmethod
-    def extract_gif_frames(gif_image: Union[str, Image.Image], save_folder_path: str, limit: int = 0) ->  dict:
+    def scan_gif(gif_path: str, save_folder_path: str = None, limit: int = 0, duplicate_threshold: float = None, frames_format: str = 'png') -> dict: 
+        """method that computes the metadata of a GIF image and optionally extracts its frames in a single pass, the file is read 
+                once into memory and its frames are decoded once in order, the number of frames, the frames durations and the 
+                digest of the whole animation are accumulated while the frames are extracted. 
+                
+                if `limit is 0` or `limit >= actual_frames_number` then all frames are extracted, otherwise `limit` frames are 
+                selected at random with a reservoir sample (the number of frames isn't known before the end of the pass) and only 
+                the sampled frames are kept in memory until the end of the pass, if `limit` frames don't fit in `MAX_SAMPLED_BYTES` 
+                only the numbers of the frames are sampled and the sampled frames are decoded again in a second pass. 
+                
+                if `duplicate_threshold` is set, the frames identical to the previous extracted frame (or with a mean absolute 
+                difference of their RGBA pixels up to `duplicate_threshold`) are skipped before the selection of the frames. 
+                
+                if `frames_format` isn't `png`, the extracted frames are packed into a single file by a `FrameStack` instead of 
+                one PNG for each frame. 
+        
+        :param gif_path: The path of the GIF image. 
+        :type gif_path: str
+        
+        :param save_folder_path: The folder used to save the extracted frames at, if `None` no frames are extracted. 
+        :type save_folder_path: str
+        
+        :param limit: max number of frames to be extracted from the GIF image. 
+        :type limit: int
+        
+        :param duplicate_threshold: max mean absolute difference (between `0` and `255`) of a frame to the previous extracted frame 
+                to be skipped, `0` skips the identical frames only, if `None` no frames are skipped. 
+        :type duplicate_threshold: float
+        
+        :param frames_format: `png` to write each frame as PNG, or `npy`, `palette` or `sprite` to pack the frames (check `FrameStack`), default is `png`
+        :type frames_format: str
+        
+        :returns: a python dict represents the computed image metadata, `sha256` is the digest of the first frame pixels and 
+                `animation_sha256` is the digest of the pixels of all the frames, `skipped_frames` is the number of skipped 
+                frames if `duplicate_threshold` is set and `frames_index` is the index of the packed frames if they are packed. 
+        :rtype: dict
+        """
+        
+        with open(gif_path, 'rb') as gif_file: 
+            data = gif_file.read()
+        gif_image = Image.open(io.BytesIO(data))
+        
+        #construct the output filename and the frame number for a certain more user friendly format. 
+        file_name = os.path.splitext(os.path.basename(gif_path))[0]
+        animation_digest = hashlib.sha256()
+        first_frame_sha256 = None
+        frame_durations = []
+        #sampled frames as `(frame_index, frame)` when `limit` is set, the frame is `None` if the sampled frames aren't kept in memory. 
+        reservoir = []
+        #the frames are decoded as RGBA at most. 
+        keep_sampled_frames = limit * gif_image.size[0] * gif_image.size[1] * 4 <= GIFDatasetTools.MAX_SAMPLED_BYTES
+        #RGBA pixels of the previous extracted frame when `duplicate_threshold` is set. 
+        previous_pixels = None
+        skipped_frames = 0
+        #number of frames that are not skipped. 
+        kept_frames = 0
+        #numbers of the frames that are not skipped, a kept frame is shown until the next kept frame. 
+        kept_indices = []
+        #the last kept frame as `(frame_index, frame)`, held until the next kept frame when all the frames are extracted. 
+        held_frame = None
+        #the packed frames are reserved for `limit` frames (or grow with the frames if all of them are extracted) and truncated 
+        #to the extracted frames at the end. 
+        frame_stack = None
+        if save_folder_path is not None and frames_format != 'png': 
+            frame_stack = FrameStack(save_folder_path, file_name, frames_format, limit if limit > 0 else None, gif_image)
+        
+        #the frames are PNG encoded and written by the writer threads while the next frames are decoded. 
+        with ThreadPoolExecutor(max_workers = GIFDatasetTools.WRITER_THREADS) as writers: 
+            pending = collections.deque()
+            
+            def write(frame_index: int, frame: Image.Image) -> None: 
+                if frame_stack is not None: 
+                    #the durations of the skipped frames after a kept frame are added to its duration. 
+                    next_kept = bisect.bisect_right(kept_indices, frame_index)
+                    end = kept_indices[next_kept] if next_kept < len(kept_indices) else len(frame_durations)
+                    frame_stack.add(frame_index, frame, sum(frame_durations[frame_index: end]))
+                    return
+                frame_number = str(frame_index).zfill(5)
+                pending.append(writers.submit(GIFDatasetTools.save_image, frame, os.path.join(save_folder_path, '{}_frame_no_{}.png'.format(file_name, frame_number))))
+                if len(pending) > GIFDatasetTools.MAX_PENDING_FRAMES: 
+                    pending.popleft().result()
+            
+            for frame_index, frame in enumerate(ImageSequence.Iterator(gif_image)):
+                frame_bytes = frame.tobytes()
+                animation_digest.update(frame_bytes)
+                if frame_index == 0: 
+                    first_frame_sha256 = hashlib.sha256(frame_bytes).hexdigest()
+                frame_durations.append(frame.info.get('duration', 0))
+                
+                if save_folder_path is None: 
+                    continue
+                
+                if duplicate_threshold is not None: 
+                    #the first frame is a palette image and the next ones are RGB(A), so the frames are compared as RGBA. 
+                    pixels = np.asarray(frame.convert('RGBA'))
+                    if previous_pixels is not None and GIFDatasetTools.frames_difference(previous_pixels, pixels, duplicate_threshold) <= duplicate_threshold: 
+                        skipped_frames += 1
+                        continue
+                    previous_pixels = pixels
+                
+                kept_indices.append(frame_index)
+                #write a copy of the frame, the iterator reuses the same image for the next frames. 
+                if limit == 0: 
+                    if held_frame is not None: 
+                        write(*held_frame)
+                    held_frame = (frame_index, frame.copy())
+                elif len(reservoir) < limit: 
+                    reservoir.append((frame_index, frame.copy() if keep_sampled_frames else None))
+                else: 
+                    #each frame replaces a sampled frame with probability `limit / (kept_frames + 1)`
+                    slot = np.random.randint(0, kept_frames + 1)
+                    if slot < limit: 
+                        reservoir[slot] = (frame_index, frame.copy() if keep_sampled_frames else None)
+                kept_frames += 1
+            
+            if held_frame is not None: 
+                write(*held_frame)
+            reservoir.sort(key = lambda item: item[0])
+            if keep_sampled_frames: 
+                for frame_index, frame in reservoir: 
+                    write(frame_index, frame)
+            elif len(reservoir) > 0: 
+                #the sampled frames are decoded again in a forward pass that stops after the last sampled frame. 
+                sampled_frames = iter(frame_index for frame_index, _ in reservoir)
+                next_frame = next(sampled_frames)
+                for frame_index, frame in enumerate(ImageSequence.Iterator(gif_image)): 
+                    if frame_index != next_frame: 
+                        continue
+                    write(frame_index, frame.copy())
+                    next_frame = next(sampled_frames, None)
+                    if next_frame is None: 
+                        break
+            
+            #wait for the remaining frames to be written. 
+            for frame_write in pending: 
+                frame_write.result()
+        
+        #compute the image metadata. 
+        image_metadata = {
+            'original_file_name': os.path.abspath(gif_path), 
+            'sha256': first_frame_sha256,
+            'animation_sha256': animation_digest.hexdigest(),
+            'number_of_frames': len(frame_durations),
+            'frame_durations': frame_durations,
+            'duration': sum(frame_durations),
+            'file_size': len(data), 
+            'image_size': "({},{})".format(gif_image.size[0] , gif_image.size[1]),
+            'format': gif_image.format.lower(),
+        }
+        if save_folder_path is not None and duplicate_threshold is not None: 
+            image_metadata['skipped_frames'] = skipped_frames
+        if frame_stack is not None: 
+            image_metadata['frames_index'] = frame_stack.close()
+        
+        return image_metadata
+    
+    @staticmethod
+    def frames_difference(first_pixels: np.ndarray, second_pixels: np.ndarray, threshold: float = None) -> float: 
+        """computes the mean absolute difference between the pixels of two frames of the same size. 
+        
+        :param first_pixels: the pixels of the first frame. 
+        :type first_pixels: ndarray
+        
+        :param second_pixels: the pixels of the second frame. 
+        :type second_pixels: ndarray
+        
+        :param threshold: if `0` only the equality of the frames is checked, which is cheaper. 
+        :type threshold: float
+        
+        :returns: the mean absolute difference between `0` and `255`, `0` for identical frames. 
+        :rtype: float
+        """
+        if np.array_equal(first_pixels, second_pixels): 
+            return 0.0
+        if threshold == 0: 
+            return math.inf
+        return float(np.mean(np.abs(first_pixels.astype(np.int16) - second_pixels.astype(np.int16))))
+    
+    @staticmethod
+    def extract_gif_frames(gif_image: Union[str, Image.Image], save_folder_path: str, limit: int = 0, duplicate_threshold: float = None, frames_format: str = 'png') ->  dict:
         """method that extracts `limit` number of frames of a given GIF image and writes them as PNG, and returns the GIF image metadata.  
                 if `limit >= actual_frames_number`  then all frames is being returned. 
                 
@@ -135,45 +360,39 @@ class GIFDatasetTools:
         :param limit: max number of frames to be extracted from each of the GIF images. 
         :type limit: int
         
+        :param duplicate_threshold: max mean absolute difference (between `0` and `255`) of a frame to the previous extracted frame 
+                to be skipped, `0` skips the identical frames only, if `None` no frames are skipped. 
+        :type duplicate_threshold: float
         
-        :returns: the number of frames of the provided image. 
-        :rtype: int
+        :param frames_format: `png` to write each frame as PNG, or `npy`, `palette` or `sprite` to pack the frames of the GIF into a single file. 
+        :type frames_format: str
+        
+        :returns: a python dict represents the computed image metadata, check `scan_gif` 
+        :rtype: dict
 
         """
         
-        #if the provided gid_image variables is a path. 
-        if isinstance(gif_image, str):
-            gif_image = Image.open(gif_image)
-        
-        #if the conditions to choose all the frames is met. 
-        if limit == 0 or limit > gif_image.n_frames: 
-            chosen_frames = range(gif_image.n_frames)
-        else:
-            #choose random `limit` indices from [0, gif_image_frames_number[
-            chosen_frames = np.random.choice(gif_image.n_frames, limit, replace=False)
+        #the frames are extracted in the same single pass that computes the metadata. 
+        return GIFDatasetTools.scan_gif(gif_image if isinstance(gif_image, str) else gif_image.filename, save_folder_path, limit, duplicate_threshold, frames_format)
+    
+    @staticmethod
+    def process_gif(gif_path: str, save_folder_path: str = None, limit: int = 0, duplicate_threshold: float = None, frames_format: str = 'png') -> dict: 
+        """method that computes the metadata of a GIF image and extracts its frames if `save_folder_path` is set, the errors are 
+                returned instead of raised so a GIF that can't be processed doesn't stop the processing of the other GIFs. 
         
-        frames_iter = ImageSequence.Iterator(gif_image)
-        frames = [] 
+        :param gif_path: The path of the GIF image. 
+        :type gif_path: str
         
-        #extract the selected frames. 
-        for frame_index in chosen_frames:
-            #construct the output filename and the frame number for a certain more user friendly format. 
-            file_name = os.path.splitext(os.path.basename(gif_image.filename))[0]
-            frame_number = str(frame_index).zfill(5)
-            #write the frame to disk. 
-            frames_iter[frame_index].save(os.path.join(save_folder_path, '{}_frame_no_{}.png'.format(file_name, frame_number)))
+        :param save_folder_path: The folder used to save the extracted frames at, if `None` no frames are extracted. 
+        :type save_folder_path: str
         
-        #compute the image metadata. 
-        image_metadata = {
-            'original_file_name': os.path.abspath(gif_image.filename), 
-            'sha256': GIFDatasetTools.image_sha256(gif_image),
-            'number_of_frames': GIFDatasetTools.get_number_of_frames(gif_image),
-            'file_size': os.stat(gif_image.filename).st_size , 
-            'image_size': "({},{})".format(gif_image.size[0] , gif_image.size[1]),
-            'format': gif_image.format.lower(),
-        }
-
-        return image_metadata
+        :returns: the metadata of the GIF image (check `scan_gif`), or a dict of its `original_file_name` and the `error` if it failed. 
+        :rtype: dict
+        """
+        try: 
+            return GIFDatasetTools.scan_gif(gif_path, save_folder_path, limit, duplicate_threshold, frames_format)
+        except Exception as error: 
+            return {'original_file_name': os.path.abspath(gif_path), 'error': '{}: {}'.format(type(error).__name__, error)}
     
     
 
@@ -182,9 +401,17 @@ class GIFDatasetTools:
 @click.option('--output_folder_path', help='path to the folder to write the results to', type = str, required = True)
 @click.option('--extract_frames', help='option to extract frames out of the GIF image or not.', type = bool, default = True)
 @click.option('--frames_limit', help='the max number of frames to extract from each GIF image in the folder.', type = int, default = 0)
+@click.option('--duplicate_threshold', help='skip the frames identical to the previous extracted frame (0) or with a mean absolute pixel difference (0-255) up to this value, no frames are skipped if not set.', type = float, default = None)
+@click.option('--frames_format', help='png writes each extracted frame as PNG, npy packs the frames of each GIF into a (frames, height, width, channels) array, palette packs their palette indices and sprite into a PNG sprite sheet.', type = click.Choice(['png'] + FrameStack.FORMATS), default = 'png')
+@click.option('--chunk_size', help='number of GIF images sent to a process at once.', type = int, default = 1)
 @click.option('--num_processes', help='number of processes to use for executing the task.', type = int, default = multiprocessing.cpu_count())
-def process_gif_dataset(folder_path: str, output_folder_path: str, extract_frames: bool = True, frames_limit: int = 0, num_processes: int = multiprocessing.cpu_count()) -> None: 
+def process_gif_dataset(folder_path: str, output_folder_path: str, extract_frames: bool = True, frames_limit: int = 0, duplicate_threshold: float = None, frames_format: str = 'png', chunk_size: int = 1, num_processes: int = multiprocessing.cpu_count()) -> None: 
     """tool to process a folder of GIF images and extract their metadata and option to extract certain number of frames out of each Gif.
+    
+    the metadata of each GIF is appended to `images_metadata.jsonl` as soon as the GIF is processed and the log is compacted into 
+            `images_metadata.json` at the end, a killed run is resumed by running the same command again, the GIFs already in the 
+            log are not processed again. the first line of the log holds the options of the run, a log of a run with different 
+            options isn't resumed. the GIFs that failed are written to `failed_images.json` and processed again when resuming. 
     """
     
     #if the output folder is not already exists then create it. 
@@ -196,21 +423,76 @@ def process_gif_dataset(folder_path: str, output_folder_path: str, extract_frame
     #get the list of the files for the given directory. 
     files_paths = gif_tools.get_files_list(folder_path, recursive = True)
     
+    #the GIFs already processed by an interrupted run with the same options are skipped. 
+    options = {'extract_frames': extract_frames, 'frames_limit': frames_limit, 'duplicate_threshold': duplicate_threshold, 'frames_format': frames_format}
+    metadata_log_path = os.path.join(output_folder_path, 'images_metadata.jsonl')
+    logged_metadata = gif_tools.read_metadata_log(metadata_log_path)
+    if len(logged_metadata) > 0 and logged_metadata[0].get('options') != options: 
+        raise click.ClickException("{} was written with the options {}, run again with the same options to resume it or remove it to start over.".format(
+            metadata_log_path, logged_metadata[0].get('options')))
+    #only the paths of the finished GIFs are kept while the GIFs are processed, their metadata is read back from the log at the end. 
+    finished_paths = set(image_metadata['original_file_name'] for image_metadata in logged_metadata[1:] if 'error' not in image_metadata)
+    resumed = len(logged_metadata) > 1
+    del logged_metadata
+    pending_paths = [file_path for file_path in files_paths if os.path.abspath(file_path) not in finished_paths]
+    if resumed: 
+        print("Resuming with {} GIF images already processed, {} left.".format(len(files_paths) - len(pending_paths), len(pending_paths)))
+    
+    #the largest GIFs are dispatched first, so a huge GIF doesn't start at the end and stall the whole run. 
+    pending_sizes = {file_path: gif_tools.file_size(file_path) for file_path in pending_paths}
+    pending_paths.sort(key = lambda file_path: pending_sizes[file_path], reverse = True)
+    
     processing_pool = ProcessingPool(num_processes)
     
-    #option to extract frames was not selected. 
-    if extract_frames:
-        #extract the image frames
-        images_metadata = processing_pool.map(gif_tools.extract_gif_frames, files_paths,[output_folder_path] * len(files_paths),  [frames_limit] * len(files_paths))
-    else:
-        #extract the images metadata. 
-        images_metadata = processing_pool.map(gif_tools.gif_metadata, files_paths)        
-
-    #save the metadata in a `JSON` file format in the output folder. 
-    with open(os.path.join(output_folder_path, 'images_metadata.json'), 'w', encoding = 'utf-8') as metadata_file: 
-        json.dump(images_metadata, metadata_file, indent = 4, sort_keys = True)
-
+    #extract the image frames, or only the images metadata if the option to extract frames was not selected. 
+    results = processing_pool.uimap(gif_tools.process_gif, pending_paths, itertools.repeat(output_folder_path if extract_frames else None), itertools.repeat(frames_limit), 
+                                    itertools.repeat(duplicate_threshold), itertools.repeat(frames_format), chunksize = chunk_size)
+    
+    #the metadata of each GIF is written as soon as it's finished, in the order the GIFs finish. 
+    start = time.time()
+    last_report = start
+    processed_bytes = 0
+    with open(metadata_log_path, 'a', encoding = 'utf-8') as metadata_log: 
+        if metadata_log.tell() == 0: 
+            metadata_log.write(json.dumps({'options': options}, sort_keys = True) + '\n')
+        for finished, image_metadata in enumerate(results, 1): 
+            metadata_log.write(json.dumps(image_metadata, sort_keys = True) + '\n')
+            metadata_log.flush()
+            if 'error' in image_metadata: 
+                print("Failed to process {}: {}".format(image_metadata['original_file_name'], image_metadata['error']))
+            else: 
+                finished_paths.add(image_metadata['original_file_name'])
+            processed_bytes += image_metadata.get('file_size', 0)
+            
+            now = time.time()
+            if now - last_report >= GIFDatasetTools.PROGRESS_INTERVAL or finished == len(pending_paths): 
+                last_report = now
+                elapsed = max(now - start, 1e-9)
+                print("Finished {} out of {} GIF images, {:.1f} GIFs/s, {:.2f} MB/s.".format(
+                    finished, len(pending_paths), finished / elapsed, processed_bytes / elapsed / 1e6))
+    
+    #the pool is removed from the pools cached by `pathos`, so the next run in the same process doesn't get the closed pool. 
     processing_pool.close()
+    processing_pool.join()
+    processing_pool.clear()
+    
+    #compact the log into the `JSON` files in the order of the listed files, the GIFs no longer in the folder are dropped and the 
+    #last entry of a GIF processed again after a failure is kept. 
+    files_order = {os.path.abspath(file_path): index for index, file_path in enumerate(files_paths)}
+    last_metadata = {image_metadata['original_file_name']: image_metadata for image_metadata in gif_tools.read_metadata_log(metadata_log_path)[1:] 
+                     if image_metadata['original_file_name'] in files_order}
+    images_metadata = sorted(last_metadata.values(), key = lambda image_metadata: files_order[image_metadata['original_file_name']])
+    failed_metadata = [image_metadata for image_metadata in images_metadata if 'error' in image_metadata]
+    if len(failed_metadata) > 0: 
+        print("Failed to process {} GIF images, check failed_images.json".format(len(failed_metadata)))
+    
+    #save the metadata in a `JSON` file format in the output folder. 
+    for file_name, file_metadata in [('images_metadata.json', [image_metadata for image_metadata in images_metadata if 'error' not in image_metadata]), ('failed_images.json', failed_metadata)]: 
+        metadata_path = os.path.join(output_folder_path, file_name)
+        with open(metadata_path + '.tmp', 'w', encoding = 'utf-8') as metadata_file: 
+            json.dump(file_metadata, metadata_file, indent = 4, sort_keys = True)
+        os.replace(metadata_path + '.tmp', metadata_path)
+    os.remove(metadata_log_path)
 
 @click.group()
 def cli(): 
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import time
+import numpy as np
+import click
+from PIL import Image, ImageSequence
+from GifDatasetTool import GIFDatasetTools
+
+
+def make_gif(path: str, number_of_frames: int, image_size: tuple, seed: int = 0) -> None:
+    """writes an animated GIF of moving random blocks.
+    :param path: The path of the written GIF.
+    :type path: str
+    :param number_of_frames: Number of frames of the GIF.
+    :type number_of_frames: int
+    :param image_size: The size of the GIF.
+    :type image_size: tuple
+    :param seed: seed of the pseudo random generator.
+    :type seed: int
+    """
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(0, 256, size = (image_size[1] // 8 + 1, image_size[0] // 8 + 1, 3), dtype = np.uint8)
+    base = np.kron(blocks, np.ones((8, 8, 1), dtype = np.uint8))
+    frames = [Image.fromarray(np.roll(base, index, axis = 1)[:image_size[1], :image_size[0]]).quantize(64) for index in range(number_of_frames)]
+    frames[0].save(path, save_all = True, append_images = frames[1:], duration = 40, loop = 0)
+
+
+def legacy_extract(gif_path: str, save_folder_path: str, chosen_frames: list[int]) -> None:
+    """extracts the frames in the given order by indexing the frames iterator, as done before the single pass extraction.
+    """
+    gif_image = Image.open(gif_path)
+    frames_iter = ImageSequence.Iterator(gif_image)
+    file_name = os.path.splitext(os.path.basename(gif_image.filename))[0]
+    for frame_index in chosen_frames:
+        frames_iter[frame_index].save(os.path.join(save_folder_path, '{}_frame_no_{}.png'.format(file_name, str(frame_index).zfill(5))))
+
+
+@click.command()
+@click.option('--number_of_frames', help='number of frames of the generated GIF.', type = int, default = 1200)
+@click.option('--width', help='width of the generated GIF.', type = int, default = 160)
+@click.option('--height', help='height of the generated GIF.', type = int, default = 120)
+@click.option('--limits', help='comma separated numbers of random frames to extract, 0 extracts all frames.', type = str, default = '10,50,0')
+def benchmark_frame_extraction(number_of_frames: int, width: int, height: int, limits: str) -> None:
+    """measures the extraction time of random frames of a long GIF in random order (legacy) and in a single forward pass
+            that also computes the metadata.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        gif_path = os.path.join(directory, 'long.gif')
+        make_gif(gif_path, number_of_frames, (width, height))
+
+        for limit in [int(limit) for limit in limits.split(',')]:
+            timings = {}
+            outputs = {}
+            for method in ['single_pass', 'legacy']:
+                output_directory = os.path.join(directory, '{}-{}'.format(method, limit))
+                os.makedirs(output_directory)
+                start = time.perf_counter()
+                if method == 'legacy':
+                    #the legacy extraction gets the same frames, in random order if they were selected at random.
+                    chosen_frames = sorted(int(name.split('_frame_no_')[1][:5]) for name in outputs['single_pass'])
+                    if limit > 0:
+                        np.random.shuffle(chosen_frames)
+                    legacy_extract(gif_path, output_directory, chosen_frames)
+                else:
+                    GIFDatasetTools.extract_gif_frames(gif_path, output_directory, limit)
+                timings[method] = time.perf_counter() - start
+                outputs[method] = {name: open(os.path.join(output_directory, name), 'rb').read() for name in os.listdir(output_directory)}
+
+            print("{} of {} frames: legacy {:.2f} s, single pass {:.2f} s, {:.1f}x faster, identical frames: {}".format(
+                limit or number_of_frames, number_of_frames, timings['legacy'], timings['single_pass'],
+                timings['legacy'] / timings['single_pass'], outputs['legacy'] == outputs['single_pass']))
+
+
+if __name__ == "__main__":
+
+    benchmark_frame_extraction()
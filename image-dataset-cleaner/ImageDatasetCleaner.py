@@ -13,6 +13,8 @@ from pathos.multiprocessing import ProcessingPool
 import patoolib
 
 from Base36lib import Base36
+from DirectoryScanner import DirectoryScanner
+from ImageStrips import ImageStrips
 
 class ImageDatasetCleaner: 
     
@@ -31,10 +33,7 @@ class ImageDatasetCleaner:
         :returns: list of files
         :rtype: list[str]
         """
-        if recursive is True: 
-            return [os.path.join(root , file) for root , dirs , files in os.walk(directory) for file in files]
-        else:      
-            return [os.path.join(directory , path) for path in os.listdir(directory)]
+        return list(DirectoryScanner().files(directory, recursive))
 
     @staticmethod
     def __write_dict_to_json(info: dict , folder_path: str , file_name: str) -> None: 
@@ -184,17 +183,21 @@ class ImageDatasetCleaner:
             errors.append("Image is corrupted")
         
         _ , file_name = os.path.split(image)
+        #the blake2b of the image pixels, computed once (band by band) and reused for the info and the new file name. 
+        image_hash = None 
 
         try: 
             im = Image.open(image)
+            image_hash = ImageStrips.blake2b(im)
                             
             image_info = {
                 'format': im.format.lower(), 
                 'original_file_name': file_name, 
                 'file_size': os.stat(image).st_size, 
                 'image_size': "({},{})".format(im.size[0] , im.size[1]), 
-                'blake2b': hashlib.blake2b(im.tobytes()).hexdigest(), 
-                'base64urlblake2b': ImageDatasetCleaner.__base64urlblake2b(im.tobytes() , depth = 1),
+                'blake2b': image_hash, 
+                #same as `__base64urlblake2b(im.tobytes(), depth = 1)`
+                'base64urlblake2b': ImageDatasetCleaner.__base64url_encode(image_hash),
             }
             
         except Exception: 
@@ -211,7 +214,8 @@ class ImageDatasetCleaner:
         new_file_name = '' 
         if not errors: 
             try: 
-                new_file_name = ImageDatasetCleaner.__base64urlblake2b(im.tobytes())
+                #same as `__base64urlblake2b(im.tobytes())`, fails if the image couldn't be hashed. 
+                new_file_name = ImageDatasetCleaner.__base64urlblake2b(bytes(image_hash, 'ascii'), depth = 1)
                 #check if base36 was chosen as the naming convention for the files
                 if base36 is not None: 
                     new_file_name = Base36.encode(new_file_name)[:min(len(new_file_name), base36)]
@@ -0,0 +1,247 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import fire
+import numpy as np
+from DirectoryScanner import DirectoryScanner
+from ImageMetadataKernel import ImageMetadataKernel
+from ImageMetadataStore import ImageMetadataStore
+
+
+class DatasetOverlap:
+    """Compares two datasets by the content hash of their images, each dataset is reduced to an array of fixed width digests
+            (the first 16 bytes of the blake2b hash as two `uint64` words) that is sorted so the intersection and the differences
+            are found with vectorized `searchsorted` instead of joining the metadata files.
+    """
+
+    #number of bytes of the hash used as the digest of an image.
+    DIGEST_BYTES = 16
+
+    def __init__(self) -> None:
+        pass
+
+    @staticmethod
+    def __from_bytes(digests: np.ndarray) -> np.ndarray:
+        """converts an array of `(N, 16)` digest bytes to `(N, 2)` words, sorting the words sorts the digests bytes.
+        """
+        return np.ascontiguousarray(digests).view('>u8').astype(np.uint64).reshape(-1, 2)
+
+    @staticmethod
+    def __from_hex(hashes: list[str]) -> np.ndarray:
+        """converts hexadecimal hashes to an array of fixed width digests.
+        """
+        digests = np.frombuffer(b''.join(bytes.fromhex(image_hash[:2 * DatasetOverlap.DIGEST_BYTES]) for image_hash in hashes), dtype = np.uint8)
+        return DatasetOverlap.__from_bytes(digests.reshape(len(hashes), DatasetOverlap.DIGEST_BYTES))
+
+    def __load_store(self, store_directory: str) -> tuple:
+        """loads the digests of a columnar store (`npy` output), the hash column is memory-mapped and sliced without decoding.
+        """
+        store = ImageMetadataStore(store_directory)
+        digests = DatasetOverlap.__from_bytes(store.column('image_blake2b_hash')[:, :DatasetOverlap.DIGEST_BYTES])
+        return digests, lambda indices: store.strings('image_path', indices)
+
+    def __load_file(self, file_path: str) -> tuple:
+        """loads the digests of a `csv` or `json` output of `ImageDatasetInfo`.
+        """
+        with open(file_path, newline = '') as metadata_file:
+            records = json.load(metadata_file) if file_path.endswith('.json') else list(csv.DictReader(metadata_file))
+        paths = [record['image_path'] for record in records]
+        return DatasetOverlap.__from_hex([record['image_blake2b_hash'] for record in records]), lambda indices: [paths[index] for index in indices]
+
+    def __compute_directory(self, directory: str, num_workers: int, backend: str, chunk_size: int) -> tuple:
+        """computes the digests of the images of a directory, the images are decoded but only the hash is computed and the
+                corrupted images are skipped.
+        """
+        images_paths = list(DirectoryScanner(num_workers).files(directory, True, sort = True))
+        chunks = [[(index, images_paths[index]) for index in range(start, min(start + chunk_size, len(images_paths)))] for start in range(0, len(images_paths), chunk_size)]
+        executor = ProcessPoolExecutor if backend == 'process' else ThreadPoolExecutor
+
+        hashes = []
+        paths = []
+        with executor(max_workers = num_workers) as pool:
+            for chunk_results, _ in pool.map(ImageMetadataKernel.compute_chunk, chunks, [['image_blake2b_hash']] * len(chunks)):
+                for index, values in chunk_results:
+                    if values is not None:
+                        hashes.append(values[0])
+                        paths.append(images_paths[index])
+
+        return DatasetOverlap.__from_hex(hashes), lambda indices: [paths[index] for index in indices]
+
+    def load(self, dataset: str, num_workers: int = 8, backend: str = 'thread', chunk_size: int = 32) -> tuple:
+        """loads the digests of a dataset given as the output of `ImageDatasetInfo` or as a directory of images.
+
+        :param dataset: a `valid-images-metadata` store directory (`npy` output), a `valid-images-metadata.csv` or `.json` file or
+                a directory of images to compute the digests for.
+        :type dataset: str
+        :param num_workers: Number of workers (threads or processes) used if the digests are computed.
+        :type num_workers: int
+        :param backend: `thread` or `process`, used if the digests are computed.
+        :type backend: str
+        :param chunk_size: Number of images sent to a worker at a time, used if the digests are computed.
+        :type chunk_size: int
+
+        :returns: tuple of the digests array of shape `(N, 2)` of `uint64` and a function that returns the image paths of the given indices.
+        :rtype: tuple(ndarray, Callable)
+        """
+        if os.path.isfile(os.path.join(dataset, 'store.json')):
+            return self.__load_store(dataset)
+        if os.path.isfile(dataset):
+            return self.__load_file(dataset)
+        return self.__compute_directory(dataset, num_workers, backend, chunk_size)
+
+    @staticmethod
+    def sort(digests: np.ndarray) -> tuple:
+        """sorts digests by their first word then their second word, the digests are sorted by their first word only and the rare
+                runs of equal first words (mostly duplicated images) are then sorted by their second word, which is much faster than `lexsort`.
+
+        :param digests: The digests of shape `(N, 2)`
+        :type digests: ndarray
+
+        :returns: tuple of the sorted digests and the order of the sort (the original index of each sorted digest).
+        :rtype: tuple(ndarray, ndarray)
+        """
+        order = np.argsort(digests[:, 0])
+        sorted_digests = digests[order]
+
+        #positions of the digests that have the same first word as one of their neighbors.
+        equal_neighbors = sorted_digests[1:, 0] == sorted_digests[:-1, 0]
+        in_runs = np.flatnonzero(np.r_[equal_neighbors, False] | np.r_[False, equal_neighbors])
+        if in_runs.size > 0:
+            #the runs are already in order of their first word so sorting them by both words keeps them in the same positions.
+            run_order = in_runs[np.lexsort((sorted_digests[in_runs, 1], sorted_digests[in_runs, 0]))]
+            order[in_runs] = order[run_order]
+            sorted_digests[in_runs] = sorted_digests[run_order]
+        return sorted_digests, order
+
+    @staticmethod
+    def contains(sorted_digests: np.ndarray, other_sorted_digests: np.ndarray) -> np.ndarray:
+        """checks for each digest if it's found in the other digests, both are sorted by `sort` so the lookups of `searchsorted`
+                go through the other digests in order, the duplicates of the other digests are dropped before the lookups.
+
+        :param sorted_digests: The sorted digests to look up of shape `(N, 2)`
+        :type sorted_digests: ndarray
+        :param other_sorted_digests: The sorted digests to search in.
+        :type other_sorted_digests: ndarray
+
+        :returns: boolean mask of the digests found in `other_sorted_digests` in the order of `sorted_digests`
+        :rtype: ndarray
+        """
+        found = np.zeros(sorted_digests.shape[0], dtype = bool)
+        if other_sorted_digests.shape[0] == 0 or sorted_digests.shape[0] == 0:
+            return found
+
+        #the duplicated digests are dropped so the runs of equal first words are only the (almost always single) digests that
+        #share their first word, then the first words are searched and the second words are compared within the runs.
+        distinct = np.r_[True, np.any(other_sorted_digests[1:] != other_sorted_digests[:-1], axis = 1)]
+        other_sorted_digests = other_sorted_digests[distinct]
+        first_words = np.ascontiguousarray(other_sorted_digests[:, 0])
+        left = np.searchsorted(first_words, sorted_digests[:, 0], side = 'left')
+        right = np.searchsorted(first_words, sorted_digests[:, 0], side = 'right')
+
+        for offset in range(int((right - left).max())):
+            positions = left + offset
+            in_run = positions < right
+            found |= in_run & (other_sorted_digests[np.minimum(positions, other_sorted_digests.shape[0] - 1), 1] == sorted_digests[:, 1])
+        return found
+
+    @staticmethod
+    def count_distinct(sorted_digests: np.ndarray, mask: np.ndarray = None) -> int:
+        """counts the distinct digests of sorted digests (the digests selected by `mask` only if it's given).
+        """
+        if mask is not None:
+            sorted_digests = sorted_digests[mask]
+        if sorted_digests.shape[0] == 0:
+            return 0
+        return int(np.count_nonzero(np.any(sorted_digests[1:] != sorted_digests[:-1], axis = 1))) + 1
+
+    @staticmethod
+    def __write_list(paths: list[str], output_directory: str, file_name: str) -> None:
+        with open(os.path.join(output_directory, file_name), 'w') as list_file:
+            list_file.writelines(path + '\n' for path in paths)
+        return
+
+    def run(self, dataset_a: str, dataset_b: str, output_directory: str = '.', num_workers: int = 8, backend: str = 'thread', chunk_size: int = 32) -> dict:
+        """compares two datasets by the content of their images and writes the lists of the images paths of `a-only.txt` (images of A
+                not found in B), `b-only.txt` (images of B not found in A), `a-in-b.txt` and `b-in-a.txt` (images of each dataset found in the other).
+
+        :param dataset_a: The first dataset, check `load` for the accepted inputs.
+        :type dataset_a: str
+        :param dataset_b: The second dataset, check `load` for the accepted inputs.
+        :type dataset_b: str
+        :param output_directory: The directory to write the lists into it, default is the current directory.
+        :type output_directory: str
+        :param num_workers: Number of workers (threads or processes) used if the digests are computed, default is `8`
+        :type num_workers: int
+        :param backend: `thread` or `process`, used if the digests are computed, default is `thread`
+        :type backend: str
+        :param chunk_size: Number of images sent to a worker at a time, used if the digests are computed, default is `32`
+        :type chunk_size: int
+
+        :returns: the counts of the images of each list and the distinct digests shared by both datasets.
+        :rtype: dict
+        """
+        digests_a, paths_a = self.load(dataset_a, num_workers, backend, chunk_size)
+        digests_b, paths_b = self.load(dataset_b, num_workers, backend, chunk_size)
+
+        sorted_a, order_a = DatasetOverlap.sort(digests_a)
+        sorted_b, order_b = DatasetOverlap.sort(digests_b)
+        sorted_a_in_b = DatasetOverlap.contains(sorted_a, sorted_b)
+
+        #the masks are mapped back to the original order of the images.
+        a_in_b = np.zeros(digests_a.shape[0], dtype = bool)
+        a_in_b[order_a] = sorted_a_in_b
+        b_in_a = np.zeros(digests_b.shape[0], dtype = bool)
+        b_in_a[order_b] = DatasetOverlap.contains(sorted_b, sorted_a)
+
+        os.makedirs(output_directory, exist_ok = True)
+        lists = {
+            'a-only.txt': np.flatnonzero(~a_in_b),
+            'b-only.txt': np.flatnonzero(~b_in_a),
+            'a-in-b.txt': np.flatnonzero(a_in_b),
+            'b-in-a.txt': np.flatnonzero(b_in_a),
+        }
+        for file_name, indices in lists.items():
+            paths = paths_a if file_name.startswith('a') else paths_b
+            DatasetOverlap.__write_list(paths(indices), output_directory, file_name)
+
+        counts = {file_name: int(indices.size) for file_name, indices in lists.items()}
+        counts['shared_digests'] = DatasetOverlap.count_distinct(sorted_a, sorted_a_in_b)
+        print("A: {} images, {} only in A. B: {} images, {} only in B. {} distinct images are in both.".format(
+            digests_a.shape[0], counts['a-only.txt'], digests_b.shape[0], counts['b-only.txt'], counts['shared_digests']))
+        return counts
+
+
+def dataset_overlap_cli(dataset_a: str, dataset_b: str, output_directory: str = '.', num_workers: int = 8, backend: str = 'thread', chunk_size: int = 32) -> None:
+    """compares two datasets by the content of their images and writes the lists of the images paths of `a-only.txt` (images of A
+            not found in B), `b-only.txt` (images of B not found in A), `a-in-b.txt` and `b-in-a.txt` (images of each dataset found in the other).
+
+    :param dataset_a: The first dataset, a `valid-images-metadata` store directory (`npy` output), a `valid-images-metadata.csv` or `.json` file
+            or a directory of images to compute the hashes for.
+    :type dataset_a: str
+    :param dataset_b: The second dataset, same as `dataset_a`
+    :type dataset_b: str
+    :param output_directory: The directory to write the lists into it, default is the current directory.
+    :type output_directory: str
+    :param num_workers: Number of workers (threads or processes) used if the hashes are computed, default is `8`
+    :type num_workers: int
+    :param backend: `thread` or `process`, used if the hashes are computed, default is `thread`
+    :type backend: str
+    :param chunk_size: Number of images sent to a worker at a time, used if the hashes are computed, default is `32`
+    :type chunk_size: int
+
+    :returns: writes the lists files into the output directory.
+    :rtype: None
+    """
+    start = time.time()
+    instance = DatasetOverlap()
+
+    instance.run(dataset_a, dataset_b, output_directory, num_workers, backend, chunk_size)
+
+    print("Process took {} seconds to complete".format(time.time() - start))
+
+
+if __name__ == "__main__":
+
+    fire.Fire(dataset_overlap_cli)
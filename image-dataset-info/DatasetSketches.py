@@ -0,0 +1,246 @@
+import math
+import random
+import numpy as np
+
+
+class LogHistogram:
+    """Fixed histogram of non-negative values with logarithmic bins, each power of two is split into `bins_per_octave` bins
+            so the quantiles are estimated within a relative error of `2^(1 / bins_per_octave) - 1` in constant memory,
+            histograms with the same bins can be merged.
+    """
+
+    def __init__(self, bins_per_octave: int = 16, max_octaves: int = 64) -> None:
+        """
+        :param bins_per_octave: number of bins of each power of two, default is `16` (relative error about 4.4%)
+        :type bins_per_octave: int
+        :param max_octaves: number of powers of two covered by the histogram, larger values are counted in the last bin, default is `64`
+        :type max_octaves: int
+        """
+        self.bins_per_octave = bins_per_octave
+        #the first bin holds the zeros.
+        self.counts = np.zeros(bins_per_octave * max_octaves + 1, dtype = np.int64)
+        self.total = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        return
+
+    def add(self, values: np.ndarray) -> None:
+        """adds an array of non-negative values to the histogram.
+
+        :param values: The values to add.
+        :type values: ndarray
+        """
+        values = np.asarray(values, dtype = np.float64).reshape(-1)
+        if values.size == 0:
+            return
+        bins = np.zeros(values.size, dtype = np.int64)
+        positive = values >= 1
+        bins[positive] = np.floor(np.log2(values[positive]) * self.bins_per_octave).astype(np.int64) + 1
+        np.add.at(self.counts, np.minimum(bins, self.counts.size - 1), 1)
+        self.total += values.size
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        return
+
+    def merge(self, other: 'LogHistogram') -> None:
+        """merges another histogram with the same bins into this histogram.
+
+        :param other: The other histogram.
+        :type other: LogHistogram
+        """
+        if other.counts.size != self.counts.size or other.bins_per_octave != self.bins_per_octave:
+            raise ValueError("can't merge histograms with different bins")
+        self.counts += other.counts
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return
+
+    def bin_edges(self, bin_index: int) -> tuple:
+        """returns the `[lower, upper)` edges of a bin.
+        """
+        if bin_index == 0:
+            return (0.0, 1.0)
+        return (2 ** ((bin_index - 1) / self.bins_per_octave), 2 ** (bin_index / self.bins_per_octave))
+
+    def quantile(self, q: float) -> dict:
+        """estimates a quantile of the added values.
+
+        :param q: The quantile between `0` and `1`, e.g. `0.5` for the median.
+        :type q: float
+
+        :returns: dict of the `estimate` and the `lower` and `upper` bounds of the true quantile.
+        :rtype: dict
+        """
+        if self.total == 0:
+            return {'estimate': None, 'lower': None, 'upper': None}
+        rank = min(int(q * self.total), self.total - 1)
+        bin_index = int(np.searchsorted(np.cumsum(self.counts), rank, side = 'right'))
+        lower, upper = self.bin_edges(bin_index)
+        lower, upper = max(lower, self.minimum), min(upper, self.maximum)
+        #geometric middle of the bin.
+        return {'estimate': math.sqrt(lower * upper) if lower > 0 else lower, 'lower': lower, 'upper': upper}
+
+    def to_dict(self) -> dict:
+        """returns the non-empty bins as a dict for the reports.
+
+        :returns: dict of `bins` as list of `[lower, upper, count]` and the `total` count.
+        :rtype: dict
+        """
+        return {
+            'total': self.total,
+            'bins': [[*self.bin_edges(int(bin_index)), int(self.counts[bin_index])] for bin_index in np.flatnonzero(self.counts)],
+        }
+
+
+class ReservoirSampler:
+    """Uniform random sample of a fixed size from a stream of unknown length (Algorithm L), every item has the same
+            probability of being in the sample and only the sample is kept in memory.
+    """
+
+    def __init__(self, sample_size: int, seed: int = None) -> None:
+        """
+        :param sample_size: The size of the sample.
+        :type sample_size: int
+        :param seed: seed of the random generator for reproducible samples, default is `None`
+        :type seed: int
+        """
+        self.sample_size = sample_size
+        self.sample = []
+        self.seen = 0
+        self.random = random.Random(seed)
+        self.__weight = math.exp(math.log(self.random.random()) / sample_size) if sample_size > 0 else 0
+        self.__next_index = None
+        return
+
+    def __skip(self) -> None:
+        """computes the index of the next item that replaces a sampled item.
+        """
+        self.__next_index = self.seen + int(math.log(self.random.random()) / math.log(1 - self.__weight)) + 1
+        return
+
+    def add(self, item) -> None:
+        """offers an item of the stream to the sample.
+        """
+        self.seen += 1
+        if len(self.sample) < self.sample_size:
+            self.sample.append(item)
+            if len(self.sample) == self.sample_size:
+                self.__skip()
+            return
+
+        if self.sample_size > 0 and self.seen == self.__next_index:
+            self.sample[self.random.randrange(self.sample_size)] = item
+            self.__weight *= math.exp(math.log(self.random.random()) / self.sample_size)
+            self.__skip()
+        return
+
+
+class SampleEstimates:
+    """Estimates of the population statistics from a uniform random sample with 95% confidence intervals, the intervals
+            include the finite population correction so they shrink to zero when the whole population is sampled.
+
+        the estimates of an empty sample are `None` so the reports never hold `NaN`
+    """
+
+    #z score of the 95% confidence level.
+    Z = 1.96
+    #number of resamples of the bootstrap confidence intervals.
+    BOOTSTRAP_RESAMPLES = 1000
+    #estimate of an empty sample.
+    EMPTY = {'estimate': None, 'lower': None, 'upper': None}
+
+    @staticmethod
+    def __correction(sample_size: int, population_size: int) -> float:
+        if population_size <= 1:
+            return 0.0
+        return math.sqrt(max(population_size - sample_size, 0) / (population_size - 1))
+
+    @staticmethod
+    def proportion(successes: int, sample_size: int, population_size: int) -> dict:
+        """estimates the proportion of the population satisfying a condition.
+
+        :returns: dict of the `estimate` and the `lower` and `upper` bounds.
+        :rtype: dict
+        """
+        if sample_size == 0:
+            return dict(SampleEstimates.EMPTY)
+        estimate = successes / sample_size
+        margin = SampleEstimates.Z * math.sqrt(estimate * (1 - estimate) / sample_size) * SampleEstimates.__correction(sample_size, population_size)
+        return {'estimate': estimate, 'lower': max(estimate - margin, 0.0), 'upper': min(estimate + margin, 1.0)}
+
+    @staticmethod
+    def mean(values: np.ndarray, population_size: int) -> dict:
+        """estimates the mean of the population.
+
+        :returns: dict of the `estimate` and the `lower` and `upper` bounds.
+        :rtype: dict
+        """
+        values = np.asarray(values, dtype = np.float64)
+        if values.size == 0:
+            return dict(SampleEstimates.EMPTY)
+        estimate = float(values.mean())
+        deviation = float(values.std(ddof = 1)) if values.size > 1 else 0.0
+        margin = SampleEstimates.Z * deviation / math.sqrt(values.size) * SampleEstimates.__correction(values.size, population_size)
+        return {'estimate': estimate, 'lower': estimate - margin, 'upper': estimate + margin}
+
+    @staticmethod
+    def quantile(values: np.ndarray, q: float) -> dict:
+        """estimates a quantile of the population, the bounds are the sample order statistics around the rank `q * n`
+                (normal approximation of the binomial distribution of the rank).
+
+        :returns: dict of the `estimate` and the `lower` and `upper` bounds.
+        :rtype: dict
+        """
+        values = np.sort(np.asarray(values, dtype = np.float64))
+        if values.size == 0:
+            return dict(SampleEstimates.EMPTY)
+        margin = SampleEstimates.Z * math.sqrt(values.size * q * (1 - q))
+        lower_rank = max(int(math.floor(q * values.size - margin)), 0)
+        upper_rank = min(int(math.ceil(q * values.size + margin)), values.size - 1)
+        return {'estimate': float(np.quantile(values, q)), 'lower': float(values[lower_rank]), 'upper': float(values[upper_rank])}
+
+    @staticmethod
+    def duplicate_pairs(hashes: list, population_size: int, seed: int = None) -> dict:
+        """estimates the fraction of the pairs of items of the population that are duplicates (same hash), the fraction of the
+                duplicate pairs of a uniform sample is an unbiased estimate of the fraction of the population, the bounds are the
+                2.5% and 97.5% percentiles of a bootstrap of the sample (the pairs of a sample are not independent so the normal
+                approximation doesn't apply).
+
+        :param hashes: The hashes of the sampled items.
+        :type hashes: list
+        :param population_size: The number of items of the population.
+        :type population_size: int
+        :param seed: seed of the bootstrap resampling, default is `None`
+        :type seed: int
+
+        :returns: dict of the `estimate` and the `lower` and `upper` bounds of the fraction of the duplicate pairs and of the
+                number of the `duplicate_pairs` of the population, `None` if the sample has less than 2 items.
+        :rtype: dict
+        """
+        sample_size = len(hashes)
+        if sample_size < 2:
+            return {'fraction': dict(SampleEstimates.EMPTY), 'duplicate_pairs': dict(SampleEstimates.EMPTY)}
+        _, groups = np.unique(np.asarray(hashes), return_inverse = True)
+        groups = groups.reshape(-1)
+        sample_pairs = sample_size * (sample_size - 1) / 2
+        population_pairs = population_size * (population_size - 1) / 2
+
+        def duplicate_fraction(draws: np.ndarray) -> float:
+            #pairs of draws of the same hash, excluding the pairs of draws of the same sampled item.
+            group_draws = np.bincount(groups, weights = draws)
+            return float((np.sum(group_draws ** 2) - np.sum(draws ** 2)) / 2 / sample_pairs)
+
+        estimate = duplicate_fraction(np.ones(sample_size))
+        generator = np.random.default_rng(seed)
+        resampled = [duplicate_fraction(np.bincount(generator.integers(0, sample_size, sample_size), minlength = sample_size).astype(np.float64))
+                     for _ in range(SampleEstimates.BOOTSTRAP_RESAMPLES)]
+        lower, upper = [float(bound) for bound in np.percentile(resampled, [2.5, 97.5])]
+        #the whole population is sampled, the fraction is exact.
+        if sample_size >= population_size:
+            lower = upper = estimate
+        lower, upper = min(lower, estimate), max(upper, estimate)
+        return {
+            'fraction': {'estimate': estimate, 'lower': lower, 'upper': upper},
+            'duplicate_pairs': {'estimate': estimate * population_pairs, 'lower': lower * population_pairs, 'upper': upper * population_pairs},
+        }
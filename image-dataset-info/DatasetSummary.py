@@ -0,0 +1,124 @@
+import collections
+import json
+import numpy as np
+from DatasetSketches import LogHistogram
+
+
+class DatasetSummary:
+    """Online dataset level aggregates of the images metadata records, the records are added as they are produced so the
+            summary is ready at the end of a run without reading the metadata files back.
+
+        the histograms are of constant memory, the duplicates are counted from 8 bytes hash prefixes (collisions are
+            negligible below billions of images) kept in fixed size `uint64` chunks (8 bytes for each image) and the formats are
+            counted by name.
+    """
+
+    #numeric columns with a histogram in the summary.
+    HISTOGRAM_COLUMNS = ['image_size_bytes', 'image_xsize', 'image_ysize', 'unique_colors']
+    #reported percentiles of the histogram columns.
+    PERCENTILES = [0.5, 0.9, 0.99]
+    #number of hash prefixes in each chunk.
+    HASH_CHUNK_SIZE = 65536
+
+    def __init__(self) -> None:
+        self.files_count = 0
+        self.valid_count = 0
+        self.total_size_bytes = 0
+        self.histograms = {column: LogHistogram() for column in DatasetSummary.HISTOGRAM_COLUMNS}
+        self.sums = dict.fromkeys(DatasetSummary.HISTOGRAM_COLUMNS, 0)
+        self.formats = collections.Counter()
+        #the filled chunks of hash prefixes and the chunk being filled.
+        self.__hash_chunks = []
+        self.__hash_chunk = np.empty(DatasetSummary.HASH_CHUNK_SIZE, dtype = np.uint64)
+        self.__hash_chunk_size = 0
+        return
+
+    def __add_hash_prefixes(self, prefixes: np.ndarray) -> None:
+        """appends hash prefixes to the chunks.
+        """
+        while prefixes.size > 0:
+            count = min(prefixes.size, DatasetSummary.HASH_CHUNK_SIZE - self.__hash_chunk_size)
+            self.__hash_chunk[self.__hash_chunk_size: self.__hash_chunk_size + count] = prefixes[:count]
+            self.__hash_chunk_size += count
+            prefixes = prefixes[count:]
+            if self.__hash_chunk_size == DatasetSummary.HASH_CHUNK_SIZE:
+                self.__hash_chunks.append(self.__hash_chunk)
+                self.__hash_chunk = np.empty(DatasetSummary.HASH_CHUNK_SIZE, dtype = np.uint64)
+                self.__hash_chunk_size = 0
+        return
+
+    def add(self, records: list[tuple]) -> None:
+        """adds a batch of images metadata records (valid and corrupted) to the summary, the columns missing from the records
+                (not in the required fields) are not aggregated.
+
+        :param records: list of tuples of `(is_valid, record)` where each record is the image metadata as dict.
+        :type records: list[tuple]
+        """
+        valid_records = [record for is_valid, record in records if is_valid]
+        records = [record for _, record in records]
+        self.files_count += len(records)
+        self.valid_count += len(valid_records)
+        self.total_size_bytes += sum(record['image_size_bytes'] for record in records)
+
+        for column in DatasetSummary.HISTOGRAM_COLUMNS:
+            #the file size is known for corrupted images as well.
+            values = [record[column] for record in (records if column == 'image_size_bytes' else valid_records) if column in record]
+            self.histograms[column].add(values)
+            self.sums[column] += sum(values)
+
+        self.formats.update(record.get('image_format') or 'unknown' for record in valid_records if 'image_format' in record)
+        self.__add_hash_prefixes(np.array([int(record['image_blake2b_hash'][:16], 16) for record in valid_records if 'image_blake2b_hash' in record], dtype = np.uint64))
+        return
+
+    def duplicates(self) -> dict:
+        """counts the groups of images with the same hash.
+
+        :returns: dict of `duplicate_groups` (number of hashes found more than once), `duplicate_images` (number of images that
+                are copies of another image) and `distinct_hashes`, `None` if the hashes are not in the records.
+        :rtype: dict
+        """
+        prefixes = np.concatenate(self.__hash_chunks + [self.__hash_chunk[:self.__hash_chunk_size]])
+        if prefixes.size == 0 and self.valid_count > 0:
+            return None
+        _, counts = np.unique(prefixes, return_counts = True)
+        return {
+            'distinct_hashes': int(counts.size),
+            'duplicate_groups': int(np.count_nonzero(counts > 1)),
+            'duplicate_images': int(counts.sum() - counts.size),
+        }
+
+    def to_dict(self) -> dict:
+        """returns the summary as a dict.
+
+        :returns: the summary.
+        :rtype: dict
+        """
+        columns = {}
+        for column, histogram in self.histograms.items():
+            columns[column] = {
+                'min': histogram.minimum if histogram.total > 0 else None,
+                'max': histogram.maximum if histogram.total > 0 else None,
+                'mean': self.sums[column] / histogram.total if histogram.total > 0 else None,
+                'percentiles': {'p{}'.format(round(q * 100)): histogram.quantile(q) for q in DatasetSummary.PERCENTILES},
+                'histogram': histogram.to_dict(),
+            }
+
+        return {
+            'files_count': self.files_count,
+            'valid_count': self.valid_count,
+            'corrupted_count': self.files_count - self.valid_count,
+            'total_size_bytes': self.total_size_bytes,
+            'formats': dict(self.formats.most_common()),
+            'duplicates': self.duplicates(),
+            'columns': columns,
+        }
+
+    def write(self, file_name: str) -> None:
+        """writes the summary into a json file.
+
+        :param file_name: The written file name.
+        :type file_name: str
+        """
+        with open(file_name, 'w') as json_file:
+            json.dump(self.to_dict(), json_file, indent = 4)
+        return
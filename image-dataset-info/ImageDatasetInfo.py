@@ -1,14 +1,24 @@
 import time
-import numpy as np 
-from PIL import Image
 import fire 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
 import os 
-import hashlib
+from typing import Iterator
 import csv
+import collections
+import numpy as np
 import json 
+from DirectoryScanner import DirectoryScanner
+from ImageMetadataKernel import ImageMetadataKernel
+from ImageMetadataStore import ImageMetadataStore
+from DatasetSummary import DatasetSummary
+from DatasetSketches import LogHistogram, ReservoirSampler, SampleEstimates
 
 class ImageDatasetInfo:
+    #columns of all the records, corrupted images records only have these columns. 
+    BASE_COLUMNS = ['image_path', 'image_name', 'image_size_bytes', 'image_mtime_ns']
+    #columns of the valid images records. 
+    VALID_COLUMNS = ['image_path', 'image_name', 'image_blake2b_hash', 'image_size_bytes', 'image_mtime_ns', 'image_format', 'image_resolution', 'image_xsize', 'image_ysize', 'unique_colors']
+    
     def __init__(self) -> None:
         pass 
     
@@ -83,148 +93,417 @@ class ImageDatasetInfo:
 
         return 
 
-    def __image_blake2b_hash(self, image: Image.Image) -> str:
-        """method to compute the blake2b of given image.
-        
-        :param image: The image to compute the blake2b hash for. 
-        :type image: PIL.Image.Image 
+    def __write_npy(self, valid_images_metadata: list[dict], failed_images_metadata: list[dict]) -> None: 
+        """takes `valid images` and `failed images` lists and writes them into columnar stores in the current working directory, 
+                check `ImageMetadataStore` for loading and querying them. 
         
-        :returns: The blake2b hash of the given image. 
-        :rtype: str 
-        """ 
-        return hashlib.blake2b(image.tobytes()).hexdigest()
-    
+        :param valid_images_metadata: list of valid images metadata.
+        :type valid_images_metadata: list[dict]
+        :param failed_images_metadata: list of failed images metadata.
+        :type failed_images_metadata: list[dict]
+         
+        :returns: Writes two store directories, `valid-images-metadata` and `failed-images-metadata` in the current directory. 
+        :rtype: None 
 
-    def __count_unique_colors(self, image: Image.Image) -> int: 
-        """counts unique RGB colors within a given image. 
-        
-        :param image: image to compute the number of unique colors for. 
-        :type image: PIL.Image.Image
+        """
+        ImageMetadataStore.write('valid-images-metadata', valid_images_metadata)
+        ImageMetadataStore.write('failed-images-metadata', failed_images_metadata)
 
-        :returns: The number of unique colors in the given image. 
-        :rtype: int
+        return 
 
+    def __print_timings(self, timings: dict, images_count: int) -> None: 
+        """prints the total time spent in each metadata field and its share of the total time. 
+        
+        :param timings: dict of the total seconds spent in each field. 
+        :type timings: dict
+        :param images_count: number of processed images. 
+        :type images_count: int
+        
+        :returns: prints a line for each field. 
+        :rtype: None
         """
+        total = sum(timings.values())
+        
+        for field, seconds in timings.items(): 
+            print("{:<20} {:>10.2f} s {:>10.3f} ms/image {:>6.1%}".format(field, seconds, 1000 * seconds / max(images_count, 1), seconds / total if total > 0 else 0))
+        
+        return 
+    
+    def __select_columns(self, fields: list[str]) -> list[str]: 
+        """builds the columns of the valid images records from the requested fields, the base columns are always included. 
+        
+        :param fields: list of the requested fields of `VALID_COLUMNS` or `None` for all fields. 
+        :type fields: list[str]
         
-        image_array = np.array(image)
-        return np.unique(image_array.reshape(-1, image_array.shape[-1] if image_array.ndim > 2 else 1), axis=0, return_counts=True)[1].size
-    
-    def __get_files_list(self, directory: str , recursive: bool) -> list[str]: 
-        """gets the list of file paths inside a directory and also its subdirectories if recursive is set to True 
-        :param directory: The directory to get the it's files paths
-        :type directory: str
-        :param recursive: If it's set to True the function will return paths of all files in the given directory 
-                and all its subdirectories
-        :type recursive: bool
-        :returns: list of files
+        :returns: the columns in the order of `VALID_COLUMNS`
         :rtype: list[str]
         """
-        if recursive is True: 
-            return [os.path.join(root , file) for root , dirs , files in os.walk(directory) for file in files]
-        else:      
-            return [os.path.join(directory , path) for path in os.listdir(directory)]
+        if fields is None: 
+            return ImageDatasetInfo.VALID_COLUMNS
+        #fire parses a single value (or comma separated values) as a string instead of a list. 
+        if isinstance(fields, str): 
+            fields = fields.split(',')
         
-    def __get_metadata(self, image_path) -> dict:
-        """method to compute the chosen metadata of an image given its path,
+        unknown_fields = [field for field in fields if field not in ImageDatasetInfo.VALID_COLUMNS]
+        if len(unknown_fields) > 0: 
+            raise ValueError("unknown fields {}, the available fields are {}".format(unknown_fields, ImageDatasetInfo.VALID_COLUMNS))
         
-        :param image_path: The path of the image required to get its metadata
+        return [column for column in ImageDatasetInfo.VALID_COLUMNS if column in ImageDatasetInfo.BASE_COLUMNS or column in fields]
+    
+    def __to_record(self, image_path: str, stat_result: os.stat_result, values: tuple, columns: list[str]) -> dict: 
+        """builds the metadata record of an image from its path, its stat data and the compact tuple computed by the metadata kernel. 
+        
+        :param image_path: The path of the image. 
         :type image_path: str
-
-        :returns: metadata of the image as dictionary. 
+        :param stat_result: The stat data of the image file. 
+        :type stat_result: os.stat_result
+        :param values: The compact tuple computed by `ImageMetadataKernel.compute` or `None` if the image is corrupted. 
+        :type values: tuple
+        :param columns: The columns of the valid images records. 
+        :type columns: list[str]
+        
+        :returns: metadata of the image as dictionary, the record of a corrupted image only contains the `BASE_COLUMNS`. 
+        :rtype: dict
+        """
+        record = {
+            'image_path': image_path, 
+            'image_name': os.path.splitext(os.path.basename(image_path))[0], 
+            'image_size_bytes': stat_result.st_size, 
+            'image_mtime_ns': stat_result.st_mtime_ns, 
+        }
+        
+        if values is None: 
+            return record
+        
+        record.update(zip(ImageMetadataKernel.VALUE_FIELDS, values))
+        record['image_resolution'] = (record['image_xsize'], record['image_ysize'])
+        return {column: record[column] for column in columns}
+    
+    def __is_reusable(self, previous_record: dict, stat_result: os.stat_result, columns: list[str]) -> bool: 
+        """checks if the record of a previous run can be reused for an image, the image size and modification time should be the same 
+                and a valid image record should have all the required columns (e.g. records written before a column was added or with 
+                less `fields` are computed again). 
+        
+        :param previous_record: The record of the image from the previous run as a tuple of `(is_valid, record)` or `None` if it's a new image. 
+        :type previous_record: tuple
+        :param stat_result: The current stat data of the image file. 
+        :type stat_result: os.stat_result
+        :param columns: The columns of the valid images records. 
+        :type columns: list[str]
+        
+        :returns: `True` if the previous record is still valid. 
+        :rtype: bool
+        """
+        if previous_record is None: 
+            return False
+        is_valid, record = previous_record
+        if record.get('image_size_bytes') != stat_result.st_size or record.get('image_mtime_ns') != stat_result.st_mtime_ns: 
+            return False
+        return not is_valid or all(column in record for column in columns)
+    
+    def __parse_record(self, record: dict) -> dict: 
+        """converts a record read back from a csv or json output to the same types of the records built by `__to_record`. 
+        
+        :param record: The record as read from the output file. 
+        :type record: dict
+        
+        :returns: the converted record.
+        :rtype: dict
+        """
+        for column in ['image_size_bytes', 'image_mtime_ns', 'image_xsize', 'image_ysize', 'unique_colors']: 
+            if column in record: 
+                record[column] = int(record[column])
+        if 'image_resolution' in record: 
+            #the csv output holds the tuple as a string like `(38, 135)` and the json output holds it as a list. 
+            resolution = record['image_resolution']
+            record['image_resolution'] = tuple(int(value) for value in (resolution.strip('()').split(',') if isinstance(resolution, str) else resolution))
+        return record
+    
+    def __load_previous(self, output_type: str) -> dict: 
+        """loads the metadata written by a previous run (with the same `output_type`) from the current working directory. 
+        
+        :param output_type: The output type of the previous metadata files, `csv`, `json` or `npy` 
+        :type output_type: str
+        
+        :returns: dict of the previous records (valid and failed) as tuples of `(is_valid, record)` by their image path, empty if there are no previous files. 
         :rtype: dict
         """
+        previous_records = {}
+        for name, is_valid in [('valid-images-metadata', True), ('failed-images-metadata', False)]: 
+            if output_type == 'npy': 
+                if os.path.isdir(name): 
+                    previous_records.update((record['image_path'], (is_valid, record)) for record in ImageMetadataStore(name).records())
+                continue
+            
+            file_name = name + ('.json' if output_type == 'json' else '.csv')
+            if not os.path.isfile(file_name): 
+                continue
+            with open(file_name, newline = '') as metadata_file: 
+                rows = json.load(metadata_file) if output_type == 'json' else csv.DictReader(metadata_file)
+                previous_records.update((row['image_path'], (is_valid, self.__parse_record(row))) for row in rows)
         
-        result = {} 
-        try: 
-            image = Image.open(image_path)
-        
-            result = {
-                'image_path': image_path, 
-                'image_name': os.path.splitext(os.path.basename(image_path))[0], 
-                'image_blake2b_hash': self.__image_blake2b_hash(image), 
-                'image_size_bytes': os.stat(image_path).st_size, 
-                'image_resolution': image.size, 
-                'image_xsize': image.size[0], 
-                'image_ysize': image.size[1], 
-                'unique_colors': self.__count_unique_colors(image), 
-            }
-        except Exception: 
-            #image is corrupted 
-            result = {
-                'image_path': image_path, 
-                'image_name': os.path.splitext(os.path.basename(image_path))[0], 
-                'image_size_bytes': os.stat(image_path).st_size, 
-            }
+        return previous_records
+    
+    def __compute_metadata(self, images_paths: list[str], num_workers: int, backend: str, chunk_size: int, fields: list[str] = None) -> Iterator[tuple]: 
+        """computes the metadata of the given images in chunks using a pool of threads or processes and yields the results 
+                of each chunk as soon as it finishes (in completion order). 
+        
+        :param images_paths: The paths of the images to process. 
+        :type images_paths: list[str]
+        :param num_workers: Number of workers (threads or processes) used to process the images. 
+        :type num_workers: int
+        :param backend: `thread` or `process`
+        :type backend: str
+        :param chunk_size: Number of images sent to a worker at a time. 
+        :type chunk_size: int
+        :param fields: list of the fields computed by the metadata kernel, default is `None` for all fields. 
+        :type fields: list[str]
+        
+        :returns: generator of the chunks results as returned from `ImageMetadataKernel.compute_chunk`, the indices are the indices of `images_paths`
+        :rtype: Iterator[tuple]
+        """
+        if backend not in ['thread', 'process']: 
+            raise ValueError("backend should be `thread` or `process` not {}".format(backend))
+        
+        executor = ProcessPoolExecutor if backend == 'process' else ThreadPoolExecutor
+        
+        with executor(max_workers = num_workers) as pool: 
+            in_flight = set() 
+            
+            for start in range(0, len(images_paths), chunk_size): 
+                chunk = [(index, images_paths[index]) for index in range(start, min(start + chunk_size, len(images_paths)))]
+                in_flight.add(pool.submit(ImageMetadataKernel.compute_chunk, chunk, fields))
+                
+                #bounds the number of chunks waiting in the pool. 
+                if len(in_flight) >= 4 * num_workers: 
+                    done, in_flight = wait(in_flight, return_when = FIRST_COMPLETED)
+                    for future in done: 
+                        yield future.result()
             
-        return result
+            for future in as_completed(in_flight): 
+                yield future.result()
     
-    def run(self, source_directory: str, output_type: str = 'csv', num_workers: int = 8) -> None:
+    def run(self, source_directory: str, output_type: str = 'csv', num_workers: int = 8, profile: bool = False, backend: str = 'thread', chunk_size: int = 32, update: bool = False, fields: list[str] = None) -> None:
         """given a directory containing images, process all those images and write a file with the metadata (in current directory)
             of those processed images, which are:
                         `image_path` , `image_name`, `image_blake2b_hash`, `image_size_bytes` , `image_dims_tuple`, `image_dims_string`, `unique_colors`
         
         :param source_directory: Directory containing the images to be processed. 
         :type source_directory: str
-        :param output_type: The output type of the produced metadata file, `csv` or `json`, default us `csv` 
+        :param output_type: The output type of the produced metadata file, `csv`, `json` or `npy` (columnar store), default us `csv` 
         :type output_type: str
-        :param num_workers: Number of workers (threads) will be used to process the data.  
+        :param num_workers: Number of workers (threads or processes) will be used to process the data.  
         :type num_workers: int
+        :param profile: If `True` prints the time spent in computing each metadata field, default is `False` 
+        :type profile: bool
+        :param backend: `thread` to process the images in a pool of threads or `process` to process them in a pool of processes
+                which scales with the number of cores, default is `thread` 
+        :type backend: str
+        :param chunk_size: Number of images sent to a worker at a time, default is `32` 
+        :type chunk_size: int
+        :param update: If `True` the metadata files of a previous run (of the same `output_type`) in the current directory are loaded and only 
+                the new and changed images (by size and modification time) are computed, the deleted images are dropped, default is `False` 
+        :type update: bool
+        :param fields: list of the required fields of `VALID_COLUMNS`, the `BASE_COLUMNS` are always included, the images are only decoded 
+                if `image_blake2b_hash` or `unique_colors` are required and only their headers are read otherwise, default is `None` for all fields. 
+        :type fields: list[str]
         
-        :returns: writes the metadata file in the current directory. 
+        :returns: writes the metadata files and the `dataset-summary.json` in the current directory. 
         :rtype: None
 
         """ 
-        #Gets files list in the given directory
-        images_paths = self.__get_files_list(source_directory, True)
+        columns = self.__select_columns(fields)
+        #the kernel only computes the required fields, all of them if all the columns are required. 
+        kernel_fields = None if fields is None else columns
         
-        #Define the threads pool 
-        thread_pool = ThreadPoolExecutor(max_workers = num_workers)
-        futures = [] 
-        #each call will be in separate thread with max threads of `num_workers`
+        #Gets files list in the given directory sorted so the output order is stable, the stat data fetched by the scan is reused for the file sizes and modification times. 
+        images_entries = list(DirectoryScanner(num_workers).scan(source_directory, True, sort = True, with_stat = True))
         
-        for image_path in images_paths: 
-            task = thread_pool.submit(self.__get_metadata, image_path,)
-            futures.append(task)
+        #records of each image by its index in the scan as tuples of `(is_valid, record)`, in update mode the records of the unchanged images are reused. 
+        images_records = [None] * len(images_entries)
+        previous_records = self.__load_previous(output_type) if update else {}
+        #dataset level aggregates updated as the records are produced. 
+        summary = DatasetSummary()
+        for index, image_entry in enumerate(images_entries): 
+            previous_record = previous_records.get(image_entry.path)
+            if self.__is_reusable(previous_record, image_entry.stat(), columns): 
+                is_valid, record = previous_record
+                #previous records computed with more fields are reduced to the required columns. 
+                images_records[index] = (is_valid, {column: record[column] for column in (columns if is_valid else ImageDatasetInfo.BASE_COLUMNS)})
+        reused_records = [record for record in images_records if record is not None]
+        summary.add(reused_records)
         
-        #dicts to hold metadata of all directory. 
-        valid_images_metadata = []
-        failed_images_metadata = []
+        #indices of the new and changed images that need to be computed. 
+        compute_indices = [index for index, record in enumerate(images_records) if record is None]
+        images_paths = [images_entries[index].path for index in compute_indices]
+        
+        #total seconds spent in each field. 
+        timings = dict.fromkeys(ImageMetadataKernel.TIMED_FIELDS, 0.0)
         
         finished = 0 
-        for task in futures: 
-            result = task.result()
-            #if 'unique_colrs` is not found as key , then this thread processed a corrupted image. 
-            if 'unique_colors' not in result: 
-                failed_images_metadata.append(result)
-            else:
-                valid_images_metadata.append(result)
+        valid = 0 
+        for chunk_results, chunk_timings in self.__compute_metadata(images_paths, num_workers, backend, chunk_size, kernel_fields): 
+            #the chunks finish out of order, so each record is placed by its index. 
+            chunk_records = []
+            for index, values in chunk_results: 
+                image_entry = images_entries[compute_indices[index]]
+                images_records[compute_indices[index]] = (values is not None, self.__to_record(image_entry.path, image_entry.stat(), values, columns))
+                chunk_records.append(images_records[compute_indices[index]])
+                valid += values is not None
+            summary.add(chunk_records)
             
-            finished += 1 
+            for field, seconds in chunk_timings.items(): 
+                timings[field] += seconds
             
-            if finished % 100 == 0: 
-                print("Finished {} out of {} images, {} of them are valid and {} are corrupted.".format(finished , len(images_paths) , len(valid_images_metadata) , len(failed_images_metadata)))
+            #print the status each time another 100 images are finished. 
+            if (finished + len(chunk_results)) // 100 > finished // 100: 
+                print("Finished {} out of {} images, {} of them are valid and {} are corrupted.".format(finished + len(chunk_results), len(images_paths), valid, finished + len(chunk_results) - valid))
+            finished += len(chunk_results)
+        
+        if profile: 
+            self.__print_timings(timings, finished)
+        
+        if update: 
+            #previous images not found in the scan are deleted. 
+            deleted = len(previous_records) - sum(image_entry.path in previous_records for image_entry in images_entries)
+            print("Reused {} images, recomputed {} new or changed images and dropped {} deleted images.".format(len(reused_records), len(images_paths), deleted))
         
+        #dicts to hold metadata of all directory, in the order of the scan. 
+        valid_images_metadata = []
+        failed_images_metadata = []
+        
+        for is_valid, record in images_records: 
+            if is_valid: 
+                valid_images_metadata.append(record)
+            else:
+                failed_images_metadata.append(record)
         
         #write the files. 
         if output_type == 'json': 
             self.__write_json(valid_images_metadata, failed_images_metadata)
+        elif output_type == 'npy': 
+            self.__write_npy(valid_images_metadata, failed_images_metadata)
         else: 
             self.__write_csv(valid_images_metadata, failed_images_metadata)
+        summary.write('dataset-summary.json')
         return  
     
-def image_dataset_info_cli(source_directory: str, output_type: str = 'csv', num_workers: int = 8) -> None:
+    def sample_stats(self, source_directory: str, sample_size: int = 1000, seed: int = None, num_workers: int = 8, backend: str = 'thread', chunk_size: int = 32) -> dict:
+        """computes approximate dataset level statistics from a uniform random sample of the images instead of processing all of them, 
+            the file sizes are taken from the stat data of the whole scan and the rest of the statistics are estimated from the sample with 
+            95% confidence bounds, the report is written to `dataset-sample-stats.json` in the current directory. 
+        
+        :param source_directory: Directory containing the images to be processed. 
+        :type source_directory: str
+        :param sample_size: Number of images in the sample, default is `1000` 
+        :type sample_size: int
+        :param seed: Seed of the sampling for reproducible reports, default is `None` 
+        :type seed: int
+        :param num_workers: Number of workers (threads or processes) will be used to process the sample.  
+        :type num_workers: int
+        :param backend: `thread` or `process`, default is `thread` 
+        :type backend: str
+        :param chunk_size: Number of images sent to a worker at a time, default is `32` 
+        :type chunk_size: int
+        
+        :returns: the report as a dict. 
+        :rtype: dict
+        """
+        sampler = ReservoirSampler(sample_size, seed)
+        sizes_histogram = LogHistogram()
+        total_size_bytes = 0 
+        
+        #the whole tree is only scanned, the sizes come from the stat data fetched by the scanning threads. 
+        for chunk in DirectoryScanner(num_workers).scan_chunks(source_directory, True, with_stat = True): 
+            sizes = [image_entry.stat().st_size for image_entry in chunk]
+            sizes_histogram.add(sizes)
+            total_size_bytes += sum(sizes)
+            for image_entry in chunk: 
+                sampler.add(image_entry.path)
+        
+        files_count = sampler.seen
+        sample_values = [None] * len(sampler.sample)
+        for chunk_results, _ in self.__compute_metadata(sampler.sample, num_workers, backend, chunk_size): 
+            for index, values in chunk_results: 
+                sample_values[index] = values
+        
+        valid_values = [values for values in sample_values if values is not None]
+        xsizes = np.array([values[1] for values in valid_values])
+        ysizes = np.array([values[2] for values in valid_values])
+        unique_colors = np.array([values[3] for values in valid_values])
+        #the valid images of the whole dataset are estimated from the sample. 
+        valid_count = files_count * len(valid_values) // max(len(sample_values), 1)
+        
+        colors_histogram = LogHistogram()
+        colors_histogram.add(unique_colors)
+        resolutions = collections.Counter((int(values[1]), int(values[2])) for values in valid_values)
+        
+        report = {
+            'files_count': files_count, 
+            'total_size_bytes': total_size_bytes, 
+            'image_size_bytes': {
+                'p50': sizes_histogram.quantile(0.5), 
+                'p90': sizes_histogram.quantile(0.9), 
+                'p99': sizes_histogram.quantile(0.99), 
+                'histogram': sizes_histogram.to_dict(), 
+            }, 
+            'sample_size': len(sample_values), 
+            'corrupted_fraction': SampleEstimates.proportion(len(sample_values) - len(valid_values), len(sample_values), files_count), 
+            'image_xsize': {'mean': SampleEstimates.mean(xsizes, valid_count), 'p50': SampleEstimates.quantile(xsizes, 0.5), 'p90': SampleEstimates.quantile(xsizes, 0.9)}, 
+            'image_ysize': {'mean': SampleEstimates.mean(ysizes, valid_count), 'p50': SampleEstimates.quantile(ysizes, 0.5), 'p90': SampleEstimates.quantile(ysizes, 0.9)}, 
+            'unique_colors': {
+                'mean': SampleEstimates.mean(unique_colors, valid_count), 
+                'p50': SampleEstimates.quantile(unique_colors, 0.5), 
+                'p90': SampleEstimates.quantile(unique_colors, 0.9), 
+                'histogram': colors_histogram.to_dict(), 
+            }, 
+            #the most common resolutions and their estimated fraction of the valid images. 
+            'resolutions': [
+                {'image_resolution': resolution, 'fraction': SampleEstimates.proportion(count, len(valid_values), valid_count)}
+                for resolution, count in resolutions.most_common(20)
+            ], 
+            #the duplicates of the whole dataset are estimated from the pairs of sampled images with the same hash. 
+            'duplicates': SampleEstimates.duplicate_pairs([values[0] for values in valid_values], valid_count, seed), 
+            'sample_distinct_hashes': len(set(values[0] for values in valid_values)), 
+        }
+        
+        with open('dataset-sample-stats.json', 'w') as json_file: 
+            json.dump(report, json_file, indent = 4)
+        
+        print("Sampled {} out of {} files, {} bytes in total, the report is written to dataset-sample-stats.json".format(len(sample_values), files_count, total_size_bytes))
+        return report
+    
+def image_dataset_info_cli(source_directory: str, output_type: str = 'csv', num_workers: int = 8, profile: bool = False, backend: str = 'thread', chunk_size: int = 32, update: bool = False, fields: list[str] = None, sample_size: int = 0, seed: int = None) -> None:
     """given a directory containing images, process all those images and write a file with the metadata (in current directory)
         of those processed images, which are:
                     `image_path` , `image_name`, `image_blake2b_hash`, `image_size_bytes` , `image_dims_tuple`, `image_dims_string`, `unique_colors`
     
     :param source_directory: Directory containing the images to be processed. 
     :type source_directory: str
-    :param output_type: The output type of the produced metadata file, `csv` or `json`, default is `csv` 
+    :param output_type: The output type of the produced metadata file, `csv`, `json` or `npy` (columnar store), default is `csv` 
     :type output_type: str
-    :param num_workers: Number of workers (threads) will be used to process the data.  
+    :param num_workers: Number of workers (threads or processes) will be used to process the data.  
     :type num_workers: int
+    :param profile: If `True` prints the time spent in computing each metadata field, default is `False` 
+    :type profile: bool
+    :param backend: `thread` to process the images in a pool of threads or `process` to process them in a pool of processes
+            which scales with the number of cores, default is `thread` 
+    :type backend: str
+    :param chunk_size: Number of images sent to a worker at a time, default is `32` 
+    :type chunk_size: int
+    :param update: If `True` the metadata files of a previous run (of the same `output_type`) in the current directory are loaded and only 
+            the new and changed images (by size and modification time) are computed, the deleted images are dropped, default is `False` 
+    :type update: bool
+    :param fields: list of the required fields, the path, name, size and modification time are always included, the images are only decoded 
+            if `image_blake2b_hash` or `unique_colors` are required and only their headers are read otherwise, default is `None` for all fields. 
+    :type fields: list[str]
+    :param sample_size: If larger than `0` only approximate statistics are computed from a random sample of this number of images 
+            and written to `dataset-sample-stats.json` instead of the metadata files, default is `0` 
+    :type sample_size: int
+    :param seed: Seed of the sampling for reproducible reports, default is `None` 
+    :type seed: int
     
-    :returns: writes the metadata file in the current directory. 
+    :returns: writes the metadata files and the `dataset-summary.json` in the current directory. 
     :rtype: None
 
     """ 
@@ -232,7 +511,10 @@ def image_dataset_info_cli(source_directory: str, output_type: str = 'csv', num_
     start = time.time() 
     instance = ImageDatasetInfo()
 
-    instance.run(source_directory, output_type, num_workers)
+    if sample_size > 0: 
+        instance.sample_stats(source_directory, sample_size, seed, num_workers, backend, chunk_size)
+    else: 
+        instance.run(source_directory, output_type, num_workers, profile, backend, chunk_size, update, fields)
     
     print("Process took {} seconds to complete".format(time.time() - start))
     
@@ -0,0 +1,112 @@
+import hashlib
+import time
+import numpy as np
+from PIL import Image
+from ImageStrips import ImageStrips, UniqueColorsCounter
+
+
+class ImageMetadataKernel:
+    """Computes the metadata of an image in a single pass, the image is decoded once and the blake2b hash and the unique colors
+            count are both computed from the same bands of rows of the decoded image, when only header fields are required
+            (dimensions and format) the pixels are not decoded at all.
+    """
+
+    #names of the timed steps of the kernel, in the order they are executed.
+    TIMED_FIELDS = ['open', 'decode', 'image_blake2b_hash', 'unique_colors']
+    #fields of the compact tuple of values computed for each image.
+    VALUE_FIELDS = ['image_blake2b_hash', 'image_xsize', 'image_ysize', 'unique_colors', 'image_format']
+    #fields that require decoding the pixels, the others are read from the image header.
+    DECODED_FIELDS = ['image_blake2b_hash', 'unique_colors']
+
+    @staticmethod
+    def needs_decode(fields: list[str]) -> bool:
+        """checks if any of the given fields requires decoding the pixels, the other fields are read from the image header.
+
+        :param fields: list of the required fields of `VALUE_FIELDS`, `None` for all fields.
+        :type fields: list[str]
+
+        :returns: `True` if the pixels should be decoded.
+        :rtype: bool
+        """
+        return fields is None or any(field in ImageMetadataKernel.DECODED_FIELDS for field in fields)
+
+    @staticmethod
+    def compute(image_path: str, fields: list[str] = None) -> tuple:
+        """computes the metadata of an image given its path, the image is decoded at most once and only if one of the required
+                fields needs the pixels, otherwise only its header is read.
+
+        :param image_path: The path of the image required to get its metadata
+        :type image_path: str
+        :param fields: list of the required fields of `VALUE_FIELDS`, the other fields are `None`, default is `None` for all fields.
+        :type fields: list[str]
+
+        :returns: tuple of the computed values as a compact tuple of `VALUE_FIELDS` or `None` if the image is corrupted (or its header
+                if the pixels aren't decoded), and the seconds spent in each of `TIMED_FIELDS` as a dict.
+        :rtype: tuple(tuple, dict)
+        """
+        timings = dict.fromkeys(ImageMetadataKernel.TIMED_FIELDS, 0.0)
+        image_hash = None
+        unique_colors = None
+
+        try:
+            #opening only reads the header.
+            start = time.perf_counter()
+            image = Image.open(image_path)
+            timings['open'] = time.perf_counter() - start
+
+            if ImageMetadataKernel.needs_decode(fields):
+                start = time.perf_counter()
+                image.load()
+                timings['decode'] = time.perf_counter() - start
+
+                digest = hashlib.blake2b() if fields is None or 'image_blake2b_hash' in fields else None
+                counter = UniqueColorsCounter(image.size[0] * image.size[1]) if fields is None or 'unique_colors' in fields else None
+
+                #the decoded image is processed in bands of rows so only a band is copied at a time.
+                for band in ImageStrips.iter_bands(image):
+                    start = time.perf_counter()
+                    band_array = np.asarray(band)
+                    timings['decode'] += time.perf_counter() - start
+
+                    if digest is not None:
+                        start = time.perf_counter()
+                        digest.update(ImageStrips.band_bytes(band, band_array))
+                        timings['image_blake2b_hash'] += time.perf_counter() - start
+
+                    if counter is not None:
+                        start = time.perf_counter()
+                        counter.update(band_array)
+                        timings['unique_colors'] += time.perf_counter() - start
+
+                image_hash = digest.hexdigest() if digest is not None else None
+                unique_colors = counter.count() if counter is not None else None
+        except Exception:
+            #image is corrupted
+            return None, timings
+
+        return (image_hash, image.size[0], image.size[1], unique_colors, image.format), timings
+
+    @staticmethod
+    def compute_chunk(chunk: list[tuple], fields: list[str] = None) -> tuple:
+        """computes the metadata of a chunk of images, used as the task of a worker (thread or process) so only the indices
+                and paths are sent to the worker and only compact tuples are sent back.
+
+        :param chunk: list of tuples of `(index, image_path)`
+        :type chunk: list[tuple]
+        :param fields: list of the required fields of `VALUE_FIELDS`, default is `None` for all fields.
+        :type fields: list[str]
+
+        :returns: tuple of the list of `(index, values)` of each image where `values` is the compact tuple returned by `compute`,
+                and the total seconds spent in each of `TIMED_FIELDS` for the whole chunk.
+        :rtype: tuple(list[tuple], dict)
+        """
+        results = []
+        timings = dict.fromkeys(ImageMetadataKernel.TIMED_FIELDS, 0.0)
+
+        for index, image_path in chunk:
+            values, image_timings = ImageMetadataKernel.compute(image_path, fields)
+            results.append((index, values))
+            for field, seconds in image_timings.items():
+                timings[field] += seconds
+
+        return results, timings
@@ -0,0 +1,245 @@
+import json
+import operator
+import os
+import shutil
+import numpy as np
+
+
+class ImageMetadataStore:
+    """Columnar binary store of images metadata, each column is saved as a `.npy` file so it can be memory-mapped and
+            queried with vectorized NumPy operations without parsing the whole output.
+
+        numeric columns are saved as a single array, `image_blake2b_hash` is saved as `(N, 64)` raw bytes and the text
+            columns (`image_path`, `image_name` and `image_format`) are saved as a string table, a single UTF-8 blob of all the values
+            `<column>.blob.npy` and the offsets of each value in that blob `<column>.offsets.npy`.
+    """
+
+    #the store format version written in `store.json`.
+    VERSION = 1
+    #columns saved as string tables.
+    STRING_COLUMNS = ['image_path', 'image_name', 'image_format']
+    #columns saved as raw bytes of hexadecimal digests.
+    HASH_COLUMNS = ['image_blake2b_hash']
+    #columns not saved when the columns they are derived from are saved.
+    DERIVED_COLUMNS = {'image_resolution': ['image_xsize', 'image_ysize']}
+    #dtypes of the numeric columns, other numeric columns are saved as `int64`.
+    NUMERIC_DTYPES = {
+        'image_size_bytes': np.int64,
+        'image_mtime_ns': np.int64,
+        'image_xsize': np.int32,
+        'image_ysize': np.int32,
+        'unique_colors': np.int64,
+    }
+    #comparison operators supported by `filter`.
+    OPERATORS = {
+        '==': operator.eq,
+        '!=': operator.ne,
+        '>': operator.gt,
+        '>=': operator.ge,
+        '<': operator.lt,
+        '<=': operator.le,
+    }
+
+    def __init__(self, store_directory: str) -> None:
+        """opens a store written by `write`, the columns are memory-mapped so opening a store doesn't read its data.
+
+        :param store_directory: The directory of the store.
+        :type store_directory: str
+        """
+        with open(os.path.join(store_directory, 'store.json')) as store_file:
+            info = json.load(store_file)
+
+        self.store_directory = store_directory
+        self.size = info['size']
+        self.columns = info['columns']
+        self.__arrays = {}
+        return
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __load(self, file_name: str) -> np.ndarray:
+        """memory-maps an array of the store once and keeps it for the next uses.
+        """
+        if file_name not in self.__arrays:
+            self.__arrays[file_name] = np.load(os.path.join(self.store_directory, file_name + '.npy'), mmap_mode = 'r')
+        return self.__arrays[file_name]
+
+    @staticmethod
+    def __write_array(store_directory: str, file_name: str, array: np.ndarray) -> None:
+        np.save(os.path.join(store_directory, file_name + '.npy'), array)
+        return
+
+    @staticmethod
+    def write(store_directory: str, records: list[dict]) -> None:
+        """writes images metadata records into a store directory, the columns are the keys of the first record (same as the csv output).
+                the store is written into a temporary directory first then replaces any previous store in `store_directory`.
+
+        :param store_directory: The directory of the store.
+        :type store_directory: str
+        :param records: list of images metadata as dicts.
+        :type records: list[dict]
+
+        :returns: writes the store files into `store_directory`.
+        :rtype: None
+        """
+        columns = list(records[0].keys()) if len(records) > 0 else []
+        columns = [column for column in columns if not all(source in columns for source in ImageMetadataStore.DERIVED_COLUMNS.get(column, [None]))]
+        temporary_directory = store_directory + '.tmp'
+        shutil.rmtree(temporary_directory, ignore_errors = True)
+        os.makedirs(temporary_directory)
+
+        for column in columns:
+            values = [record[column] for record in records]
+
+            if column in ImageMetadataStore.STRING_COLUMNS:
+                encoded = [(value or '').encode('utf-8', 'surrogateescape') for value in values]
+                offsets = np.zeros(len(encoded) + 1, dtype = np.int64)
+                np.cumsum([len(value) for value in encoded], out = offsets[1:])
+                ImageMetadataStore.__write_array(temporary_directory, column + '.blob', np.frombuffer(b''.join(encoded), dtype = np.uint8))
+                ImageMetadataStore.__write_array(temporary_directory, column + '.offsets', offsets)
+            elif column in ImageMetadataStore.HASH_COLUMNS:
+                digests = np.frombuffer(b''.join(bytes.fromhex(value) for value in values), dtype = np.uint8)
+                ImageMetadataStore.__write_array(temporary_directory, column, digests.reshape(len(values), -1))
+            elif column == 'image_resolution':
+                #saved only when the image dimensions columns are not, as a `(N, 2)` array.
+                ImageMetadataStore.__write_array(temporary_directory, column, np.array(values, dtype = np.int32).reshape(len(values), 2))
+            else:
+                ImageMetadataStore.__write_array(temporary_directory, column, np.array(values, dtype = ImageMetadataStore.NUMERIC_DTYPES.get(column, np.int64)))
+
+        with open(os.path.join(temporary_directory, 'store.json'), 'w') as store_file:
+            json.dump({'version': ImageMetadataStore.VERSION, 'size': len(records), 'columns': columns}, store_file, indent = 4)
+
+        shutil.rmtree(store_directory, ignore_errors = True)
+        os.rename(temporary_directory, store_directory)
+        return
+
+    def column(self, column: str) -> np.ndarray:
+        """returns a numeric or hash column as a memory-mapped array, use `strings` for the text columns.
+
+        :param column: The column name.
+        :type column: str
+
+        :returns: the column values, the hash columns are of shape `(N, 64)` of raw bytes.
+        :rtype: ndarray
+        """
+        if column not in self.columns:
+            raise KeyError("column {} is not found in the store, available columns are {}".format(column, self.columns))
+        if column in ImageMetadataStore.STRING_COLUMNS:
+            raise ValueError("column {} is a text column, use `strings` to read its values".format(column))
+        return self.__load(column)
+
+    def strings(self, column: str, indices: np.ndarray = None) -> list[str]:
+        """decodes the values of a text column, only the requested values are read from the blob.
+
+        :param column: The text column name, `image_path`, `image_name` or `image_format`
+        :type column: str
+        :param indices: indices of the required values, if `None` all the values are returned, default is `None`
+        :type indices: ndarray
+
+        :returns: the decoded values in the order of `indices`
+        :rtype: list[str]
+        """
+        if column not in self.columns or column not in ImageMetadataStore.STRING_COLUMNS:
+            raise KeyError("text column {} is not found in the store".format(column))
+
+        blob = self.__load(column + '.blob')
+        offsets = self.__load(column + '.offsets')
+        indices = range(self.size) if indices is None else np.asarray(indices).tolist()
+        return [bytes(blob[offsets[index]: offsets[index + 1]]).decode('utf-8', 'surrogateescape') for index in indices]
+
+    def hashes(self, column: str = 'image_blake2b_hash', indices: np.ndarray = None) -> list[str]:
+        """returns the values of a hash column as hexadecimal digests (same as the csv output).
+
+        :param column: The hash column name, default is `image_blake2b_hash`
+        :type column: str
+        :param indices: indices of the required values, if `None` all the values are returned, default is `None`
+        :type indices: ndarray
+
+        :returns: the hexadecimal digests in the order of `indices`
+        :rtype: list[str]
+        """
+        digests = self.column(column)
+        if indices is not None:
+            digests = digests[np.asarray(indices)]
+        return [digest.tobytes().hex() for digest in digests]
+
+    def mask(self, conditions: list[tuple]) -> np.ndarray:
+        """computes the boolean mask of the images matching all the given conditions.
+
+        :param conditions: list of tuples of `(column, operator, value)` where operator is one of `==`, `!=`, `>`, `>=`, `<` and `<=`,
+                for example `[('image_xsize', '>', 1024), ('unique_colors', '>', 256)]`
+        :type conditions: list[tuple]
+
+        :returns: boolean array of the store size.
+        :rtype: ndarray
+        """
+        selected = np.ones(self.size, dtype = bool)
+        for column, operator_name, value in conditions:
+            if operator_name not in ImageMetadataStore.OPERATORS:
+                raise ValueError("operator should be one of {} not {}".format(list(ImageMetadataStore.OPERATORS), operator_name))
+            selected &= ImageMetadataStore.OPERATORS[operator_name](self.column(column), value)
+        return selected
+
+    def filter(self, conditions: list[tuple]) -> np.ndarray:
+        """returns the indices of the images matching all the given conditions, check `mask` for the conditions format.
+
+        :returns: array of the matching indices.
+        :rtype: ndarray
+        """
+        return np.flatnonzero(self.mask(conditions))
+
+    def aggregate(self, column: str, function: str = 'sum', indices: np.ndarray = None):
+        """aggregates a numeric column over all the images or the selected ones.
+
+        :param column: The numeric column name.
+        :type column: str
+        :param function: `sum`, `mean`, `min`, `max` or `count`, default is `sum`
+        :type function: str
+        :param indices: indices of the selected images (as returned from `filter`), if `None` all the images are aggregated, default is `None`
+        :type indices: ndarray
+
+        :returns: the aggregated value.
+        :rtype: int or float
+        """
+        values = self.column(column)
+        if indices is not None:
+            values = values[np.asarray(indices)]
+
+        if function == 'count':
+            return int(values.shape[0])
+        if function not in ['sum', 'mean', 'min', 'max']:
+            raise ValueError("function should be `sum`, `mean`, `min`, `max` or `count` not {}".format(function))
+        #sums are accumulated in 64-bit so 32-bit columns don't overflow.
+        if function == 'sum':
+            return values.sum(dtype = np.int64).item()
+        return getattr(values, function)().item()
+
+    def records(self, indices: np.ndarray = None) -> list[dict]:
+        """returns the selected images metadata as dicts (same as the records of the csv and json outputs).
+
+        :param indices: indices of the selected images, if `None` all the images are returned, default is `None`
+        :type indices: ndarray
+
+        :returns: list of images metadata as dicts.
+        :rtype: list[dict]
+        """
+        indices = np.arange(self.size) if indices is None else np.asarray(indices)
+        columns = {}
+        for column in self.columns:
+            if column in ImageMetadataStore.STRING_COLUMNS:
+                columns[column] = self.strings(column, indices)
+            elif column in ImageMetadataStore.HASH_COLUMNS:
+                columns[column] = self.hashes(column, indices)
+            elif column == 'image_resolution':
+                columns[column] = [tuple(resolution) for resolution in self.column(column)[indices].tolist()]
+            else:
+                columns[column] = self.column(column)[indices].tolist()
+
+        records = []
+        for position in range(len(indices)):
+            record = {column: values[position] for column, values in columns.items()}
+            if 'image_xsize' in record and 'image_ysize' in record:
+                record['image_resolution'] = (record['image_xsize'], record['image_ysize'])
+            records.append(record)
+        return records
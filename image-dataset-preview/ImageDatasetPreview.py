@@ -1,4 +1,4 @@
-import hashlib
+import itertools
 import os
 from random import shuffle
 import random
@@ -7,23 +7,16 @@ import time
 from PIL import Image 
 import fire 
 import warnings
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from Base36lib import Base36
+from typing import Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from DirectoryScanner import DirectoryScanner
+from PreviewGrid import PreviewGrid
+from PreviewPyramid import PreviewPyramid
 
 class ImageDatasetPreview: 
     def __init__(self): 
-        self.written_files = {} 
         return 
 
-    def __image_to_blake2b(self, image: Image.Image) -> str: 
-        """Method to compute the blake2b of an image given the image as PIL.Image instance. 
-        :param image: The directory to get the it's files paths
-        :type image: str
-        :returns: blake2b of the image
-        :rtype: str
-        """
-        return hashlib.blake2b(image.tobytes()).hexdigest()
-
     def __get_files_list(self, directory: str) -> list[str]: 
         """returns a list of file paths for a given directory
         :param directory: The directory to get the it's files paths
@@ -31,7 +24,7 @@ class ImageDatasetPreview:
         :returns: list of files
         :rtype: list[str]
         """
-        return [os.path.join(directory , image_file) for image_file in os.listdir(directory)]
+        return list(DirectoryScanner().files(directory, recursive = False))
         
     def __get_PIL_color_conversion_mode(self, color_mode: str) -> str: 
         """converts the string to the PIL image color mode. 
@@ -42,56 +35,42 @@ class ImageDatasetPreview:
         """
 
         return 'L' if color_mode.lower() == 'grey' else 'RGB'
-    
-    def __write_images_to_grid(self, output_directory: str, images: list[str], PIL_color_mode: str,
-                               image_size: tuple[int, int] = (64 , 64),matrix_size: tuple[int, int] = (32 , 32), base36: int = None) -> None: 
-        """ Given a list of images paths, the method scale them down and concatenates them into large image 
-            matrix with a given size and writes the matrix/grid image into `output_directory` as `.png`. 
-                        
-        :param output_directory: The directory to store the preview images inside it. 
-        :type output_directory: str
-        :param images: The images list to be concatenated and written into grid image. 
-        :type images: list[str]
-        :param PIL_color_mode: the color mode of images whatever they are to be read in RGB or grayscale. 
-        :type PIL_color_mode: str
-        :param image_size: The size to scale down the images to before being added to the preview matrix image. 
-        :type image_size: tuple[int,int]
-        :param matrix_size: The size of the preview matrix image (number of images to be included as width and height of the matrix)
-        :type matrix_size: tuple[int,int]
-        :param base36: Number of 1st N chars of base36 of the base64url of the blake2b of the image, if is set to `None` then nothing is applied.
-        :type base36: int
-        :returns: None
-        :rtype: None
+
+    def __stream_files_list(self, directory: str, images_order_mode: str, shuffle_buffer_size: int) -> Iterator[str]: 
+        """yields the file paths of a directory while it's being listed, in `random` mode the paths go through a shuffle buffer 
+                (each path found replaces a random path of the buffer which is yielded) and in `sorted` mode the paths are sorted 
+                within each listed chunk of the directory, the memory is bounded by the buffer or the chunk size whatever the number of files. 
+        :param directory: The directory to get the it's files paths
+        :type directory: str
+        :param images_order_mode: The order of the yielded paths `random` or `sorted`
+        :type images_order_mode: str
+        :param shuffle_buffer_size: The number of paths in the shuffle buffer of the `random` mode.
+        :type shuffle_buffer_size: int
+        :returns: generator of files paths.
+        :rtype: Iterator[str]
         """
+        chunks = DirectoryScanner().scan_chunks(directory, recursive = False)
+        if images_order_mode == 'sorted': 
+            for chunk in chunks: 
+                yield from sorted(entry.path for entry in chunk)
+            return 
         
-        #make a new blank matrix image to be used for adding the small patches. 
-        matrix_img = Image.new(PIL_color_mode , (matrix_size[0] * image_size[0] , matrix_size[1] * image_size[1]))
-        count = 0 
-        for image in images: 
-            #open the image and convert it to the selected color mode. 
-            try: 
-                img = Image.open(image).convert(PIL_color_mode)
-            except Exception: 
-                continue
-            img = img.resize(image_size)
-            #paste the resized image in the large matrix image with offset based on the number of the current image. 
-            matrix_img.paste(img , box = ((count % matrix_size[0]) * image_size[0] , (count // matrix_size[1]) * image_size[1]) )
-            count += 1 
-        
-        file_name = self.__image_to_blake2b(matrix_img)
-        
-        #convert to Base36 if the flag is provided by the user.
-        if base36 is not None: 
-            file_name = Base36.encode(file_name)[:min(len(file_name), base36)]
-        
-        #make sure the file was not written before. 
-        if file_name not in self.written_files: 
-            #save the image file in the output directory. 
-            matrix_img.save(os.path.join(output_directory, file_name) + '.png')
+        buffer = []
+        for chunk in chunks: 
+            for entry in chunk: 
+                if len(buffer) < shuffle_buffer_size: 
+                    buffer.append(entry.path)
+                    continue
+                index = random.randrange(shuffle_buffer_size)
+                yield buffer[index]
+                buffer[index] = entry.path
+        shuffle(buffer)
+        yield from buffer
 
-        
     def preview_image_dataset(self, source_directory: str, output_directory: str,  image_size: tuple[int, int] = (64 , 64), 
-                                matrix_size: tuple[int, int] = (32 , 32), color_mode: str = 'rgb' , images_order_mode: str = 'sorted', base36: int = None,  num_workers: int = 8) -> None: 
+                                matrix_size: tuple[int, int] = (32 , 32), color_mode: str = 'rgb' , images_order_mode: str = 'sorted', base36: int = None,  num_workers: int = 8, 
+                                cache_directory: str = None, backend: str = 'thread', pyramid: bool = False, tile_size: int = 256, 
+                                streaming: bool = False, shuffle_buffer_size: int = 16384) -> None: 
         """ Given a source directory containing images,the tool reads this images scale them down and concatenates them into large image 
                 matrix with a given size for preview.
                         
@@ -109,54 +88,100 @@ class ImageDatasetPreview:
         :type images_order_mode: str
         :param base36: Number of 1st N chars of base36 of the base64url of the blake2b of the image, if is set to `None` then nothing is applied.
         :type base36: int
-        :param num_workers: Number of threads to be used in executing the process, default is `8` 
+        :param num_workers: Number of workers (threads or processes) to be used in executing the process, default is `8` 
         :type num_workers: int
+        :param cache_directory: The directory of a thumbnail cache shared between runs, the thumbnails are read from it and the missing ones are added to it, if is set to `None` no cache is used, default is `None`
+        :type cache_directory: str
+        :param backend: `thread` to build the preview images in a thread pool or `process` to build them in a process pool, default is `thread` 
+        :type backend: str
+        :param pyramid: write a zoomable DeepZoom pyramid of all the images with a static html viewer instead of the preview matrix images, default is `False` 
+        :type pyramid: bool
+        :param tile_size: The size of the pyramid tiles, it should be a multiple of the `image_size`, default is `256` 
+        :type tile_size: int
+        :param streaming: build the preview images while the source directory is being listed instead of after listing all of it, in `sorted` mode the images are sorted within each listed chunk (1024 files) and in `random` mode they are shuffled through a buffer of `shuffle_buffer_size` files, default is `False` 
+        :type streaming: bool
+        :param shuffle_buffer_size: The number of files in the shuffle buffer of the `random` order in `streaming` mode, default is `16384` 
+        :type shuffle_buffer_size: int
         :returns: None
         :rtype: None
         """
         #create the output folder if not exists
         os.makedirs(output_directory , exist_ok = True)
-        #gets the list of files in the folder 
-        images = self.__get_files_list(source_directory)
         #get the PIL color mode to convert all images to it when read. 
         PIL_color_mode = self.__get_PIL_color_conversion_mode(color_mode)
         
-        #fetch all files previously existed in the output_directory
-        self.written_files = {os.path.splitext(os.path.basename(path))[0]: True for path in self.__get_files_list(output_directory)}
-        
         batch_size = matrix_size[0] * matrix_size[1]
         #iterate through all the images list to open the files and start working on them
         
-        #Shuffle or sort the images list to be previewed based on the chosen mode.
-        if images_order_mode == 'sorted': 
-            images.sort()
+        if streaming: 
+            #the images are previewed while the directory is being listed. 
+            images = self.__stream_files_list(source_directory, images_order_mode, shuffle_buffer_size)
+            number_of_batches = None
         else: 
-            shuffle(images)
+            #gets the list of files in the folder 
+            images = self.__get_files_list(source_directory)
+            #Shuffle or sort the images list to be previewed based on the chosen mode.
+            if images_order_mode == 'sorted': 
+                images.sort()
+            else: 
+                shuffle(images)
+            number_of_batches = (len(images) + batch_size - 1) // batch_size
         
-        #Defining the thread pool with max number of workers given. 
-        thread_pool = ThreadPoolExecutor(max_workers = num_workers)
-        futures = [] 
+        if pyramid: 
+            #the pyramid replaces the preview matrix images, the thumbnails are streamed into its tiles. 
+            description = PreviewPyramid(output_directory, 'preview', image_size, PIL_color_mode, tile_size).build(images, num_workers, backend, cache_directory)
+            if description is not None: 
+                print("wrote a pyramid of {} images with {} levels of {}x{} pixels, open {} to view it".format(
+                    description['images'], description['maxLevel'] + 1, description['width'], description['height'], os.path.join(output_directory, 'preview.html')))
+            return 
         
-        #take images as batches and the batch size is the number of images in one `preview matrix image`
-        for batch in range(0 , ((len(images) + batch_size - 1) // batch_size)): 
-            #take the batch of images files.
-            imgs = images[batch * batch_size: min((batch + 1) * batch_size , len(images))]
-            
-            task = thread_pool.submit(self.__write_images_to_grid, output_directory, imgs, PIL_color_mode, image_size, matrix_size, base36, )
+        completed_batches = 0
+        cache_hits = 0
+        decoded = 0
+        
+        def collect(done: set) -> None: 
+            nonlocal completed_batches, cache_hits, decoded
+            for future in done: 
+                result = future.result()
+                completed_batches += 1 
+                cache_hits += result['cache_hits']
+                decoded += result['decoded']
+                if number_of_batches is None: 
+                    print("finished batch {}".format(completed_batches))
+                else: 
+                    print("finished batch {} out of {} batches".format(completed_batches, number_of_batches))
+        
+        #Defining the pool with max number of workers given, the grids are built in worker processes (or threads) that write 
+        #the preview images themselves so only the images paths are sent to them. 
+        executor = ProcessPoolExecutor if backend == 'process' else ThreadPoolExecutor
+        images = iter(images)
+        with executor(max_workers = num_workers) as pool: 
+            futures = set()
+            #take images as batches and the batch size is the number of images in one `preview matrix image`
+            while True: 
+                #take the batch of images files.
+                imgs = list(itertools.islice(images, batch_size))
+                if len(imgs) == 0: 
+                    break
+                #bound the number of grids in flight. 
+                if len(futures) >= 2 * num_workers: 
+                    done, futures = wait(futures, return_when = FIRST_COMPLETED)
+                    collect(done)
+                futures.add(pool.submit(PreviewGrid.write, output_directory, imgs, PIL_color_mode, image_size, matrix_size, base36, cache_directory))
             
-            futures.append(task)
+            #wait for all tasks to be executed. 
+            collect(wait(futures).done)
         
-        #wait for all tasks to be executed. 
-        completed_batches = 0
-        for future in as_completed(futures): 
-            completed_batches += 1 
-            print("finished batch {} out of {} batches".format(completed_batches, ((len(images) + batch_size - 1) // batch_size)))
+        if cache_directory is not None: 
+            print("thumbnail cache: {} thumbnails read from the cache, {} images decoded".format(cache_hits, decoded))
             
         return 
     
     
 def image_dataset_preview_cli(source_directory: str, output_directory: str,  image_size: tuple = (64 , 64), 
-                                        matrix_size: tuple = (32 , 32), color_mode: str = 'rgb' , images_order_mode: str = 'sorted', base36: int = None,  num_workers: int = 8) -> None: 
+                                        matrix_size: tuple = (32 , 32), color_mode: str = 'rgb' , images_order_mode: str = 'sorted', base36: int = None,  num_workers: int = 8, 
+                                        cache_directory: str = None, backend: str = 'thread', pyramid: bool = False, tile_size: int = 256, 
+                                        streaming: bool = False, shuffle_buffer_size: int = 16384) -> None: 
     """ Given a source directory containing images,the tool reads this images scale them down and concatenates them into large image 
             matrix with a given size for preview.
                     
@@ -174,8 +199,20 @@ def image_dataset_preview_cli(source_directory: str, output_directory: str,  ima
         :type images_order_mode: str
         :param base36: Number of 1st N chars of base36 of the base64url of the blake2b of the image, if is set to `None` then nothing is applied.
         :type base36: int
-        :param num_workers: Number of threads to be used in executing the process, default is `8` 
+        :param num_workers: Number of workers (threads or processes) to be used in executing the process, default is `8` 
         :type num_workers: int
+        :param cache_directory: The directory of a thumbnail cache shared between runs, the thumbnails are read from it and the missing ones are added to it, if is set to `None` no cache is used, default is `None`
+        :type cache_directory: str
+        :param backend: `thread` to build the preview images in a thread pool or `process` to build them in a process pool, default is `thread` 
+        :type backend: str
+        :param pyramid: write a zoomable DeepZoom pyramid of all the images with a static html viewer instead of the preview matrix images, default is `False` 
+        :type pyramid: bool
+        :param tile_size: The size of the pyramid tiles, it should be a multiple of the `image_size`, default is `256` 
+        :type tile_size: int
+        :param streaming: build the preview images while the source directory is being listed instead of after listing all of it, in `sorted` mode the images are sorted within each listed chunk (1024 files) and in `random` mode they are shuffled through a buffer of `shuffle_buffer_size` files, default is `False` 
+        :type streaming: bool
+        :param shuffle_buffer_size: The number of files in the shuffle buffer of the `random` order in `streaming` mode, default is `16384` 
+        :type shuffle_buffer_size: int
         :returns: None
         :rtype: None
     """
@@ -183,7 +220,7 @@ def image_dataset_preview_cli(source_directory: str, output_directory: str,  ima
     start = time.time() 
     preview_dataset = ImageDatasetPreview()
     
-    preview_dataset.preview_image_dataset(source_directory , output_directory, image_size, matrix_size, color_mode, images_order_mode, base36, num_workers)
+    preview_dataset.preview_image_dataset(source_directory , output_directory, image_size, matrix_size, color_mode, images_order_mode, base36, num_workers, cache_directory, backend, pyramid, tile_size, streaming, shuffle_buffer_size)
 
     print("Process took {} seconds to execute".format(time.time() - start))
 
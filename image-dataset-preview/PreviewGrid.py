@@ -0,0 +1,107 @@
+import hashlib
+import os
+import threading
+import numpy as np
+from PIL import Image
+from Base36lib import Base36
+from ThumbnailCache import ThumbnailCache
+from ThumbnailLoader import ThumbnailLoader
+
+
+class PreviewGrid:
+    """Builds and writes a single preview matrix image, the thumbnails are written directly into a preallocated `uint8`
+            canvas and the canvas is hashed and PNG encoded by the same worker, the arguments and the result are small so the
+            grids can be built by a process pool as well as a thread pool.
+    """
+
+    @staticmethod
+    def load_thumbnails(images: list[str], PIL_color_mode: str, image_size: tuple[int, int], cache_directory: str = None) -> tuple:
+        """loads the thumbnails of a list of images from the thumbnail cache if it's used or by decoding the images.
+
+        :param images: The images paths.
+        :type images: list[str]
+        :param PIL_color_mode: the color mode of the thumbnails.
+        :type PIL_color_mode: str
+        :param image_size: The size of the thumbnails.
+        :type image_size: tuple[int,int]
+        :param cache_directory: The directory of the thumbnail cache or `None` if no cache is used.
+        :type cache_directory: str
+
+        :returns: tuple of the list of thumbnails as arrays in the order of the images (`None` for the images that failed to be read)
+                and the number of the thumbnails read from the cache and of the images decoded.
+        :rtype: tuple(list[ndarray], int, int)
+        """
+        if cache_directory is not None:
+            cache = ThumbnailCache(cache_directory, image_size, PIL_color_mode)
+            thumbnails = cache.load(images)
+            return thumbnails, cache.hits, cache.misses
+
+        thumbnails = []
+        for image in images:
+            #open the image at a reduced scale, convert it to the selected color mode and scale it down.
+            try:
+                thumbnails.append(np.asarray(ThumbnailLoader.load(image, PIL_color_mode, image_size)))
+            except Exception:
+                thumbnails.append(None)
+        return thumbnails, 0, len(images)
+
+    @staticmethod
+    def write(output_directory: str, images: list[str], PIL_color_mode: str, image_size: tuple[int, int] = (64, 64),
+              matrix_size: tuple[int, int] = (32, 32), base36: int = None, cache_directory: str = None) -> dict:
+        """scales down a list of images and concatenates them into a matrix image written into `output_directory` as `.png`
+                named by the blake2b of the matrix image, the file is written to a temporary name then renamed so an interrupted
+                run leaves no partial preview images.
+
+        :param output_directory: The directory to store the preview images inside it.
+        :type output_directory: str
+        :param images: The images list to be concatenated and written into grid image.
+        :type images: list[str]
+        :param PIL_color_mode: the color mode of images whatever they are to be read in RGB or grayscale.
+        :type PIL_color_mode: str
+        :param image_size: The size to scale down the images to before being added to the preview matrix image.
+        :type image_size: tuple[int,int]
+        :param matrix_size: The size of the preview matrix image (number of images to be included as width and height of the matrix)
+        :type matrix_size: tuple[int,int]
+        :param base36: Number of 1st N chars of base36 of the base64url of the blake2b of the image, if is set to `None` then nothing is applied.
+        :type base36: int
+        :param cache_directory: The directory of the thumbnail cache or `None` if no cache is used.
+        :type cache_directory: str
+
+        :returns: dict of the `file_name` of the preview image, `written` (`False` if the same preview image already exists),
+                the number of `images` added to it and the `cache_hits` and `decoded` counts of the thumbnails.
+        :rtype: dict
+        """
+        #make a new blank matrix canvas to be used for adding the small patches.
+        channels = (3,) if PIL_color_mode == 'RGB' else ()
+        canvas = np.zeros((matrix_size[1] * image_size[1], matrix_size[0] * image_size[0]) + channels, dtype = np.uint8)
+
+        thumbnails, cache_hits, decoded = PreviewGrid.load_thumbnails(images, PIL_color_mode, image_size, cache_directory)
+        count = 0
+        added = 0
+        for thumbnail in thumbnails:
+            if thumbnail is None:
+                continue
+            #write the thumbnail in the canvas with offset based on the number of the current image, the canvas is `matrix_size[0]`
+            #images wide and the positions outside the canvas (more images than the matrix holds) are dropped.
+            x, y = (count % matrix_size[0]) * image_size[0], (count // matrix_size[0]) * image_size[1]
+            if y < canvas.shape[0]:
+                canvas[y: y + image_size[1], x: x + image_size[0]] = thumbnail
+                added += 1
+            count += 1
+
+        #the canvas buffer is the same raw bytes of the PIL matrix image.
+        file_name = hashlib.blake2b(canvas).hexdigest()
+
+        #convert to Base36 if the flag is provided by the user.
+        if base36 is not None:
+            file_name = Base36.encode(file_name)[:min(len(file_name), base36)]
+
+        file_path = os.path.join(output_directory, file_name) + '.png'
+        written = not os.path.exists(file_path)
+        #make sure the file was not written before.
+        if written:
+            temporary_path = '{}.{}-{}.tmp'.format(file_path, os.getpid(), threading.get_ident())
+            Image.fromarray(canvas).save(temporary_path, format = 'PNG')
+            os.replace(temporary_path, file_path)
+
+        return {'file_name': file_name, 'written': written, 'images': added, 'cache_hits': cache_hits, 'decoded': decoded}
@@ -0,0 +1,242 @@
+import collections
+import itertools
+import json
+import math
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable
+import numpy as np
+from PIL import Image
+from PreviewGrid import PreviewGrid
+
+
+class PreviewPyramid:
+    """Builds a zoomable DeepZoom pyramid of the thumbnails of a dataset in a single streaming pass, the thumbnails fill the
+            tiles of the full resolution level in Morton (Z) order so the 4 children of every tile of the level above are
+            completed one after another, each completed tile is written once, downsampled 2x and added to its parent, so only
+            one tile for each level is kept in memory whatever the number of images.
+
+        the full resolution tiles are built and written by the workers (threads or processes) from the images paths, the
+            levels above are built from the downsampled tiles and never read the images again.
+    """
+
+    #JPEG quality of the tiles written as `jpg`
+    JPEG_QUALITY = 90
+
+    def __init__(self, output_directory: str, name: str = 'preview', image_size: tuple[int, int] = (64, 64),
+                 PIL_color_mode: str = 'RGB', tile_size: int = 256, tile_format: str = 'jpg') -> None:
+        """
+        :param output_directory: The directory to write the pyramid into it.
+        :type output_directory: str
+        :param name: The name of the pyramid files, `<name>.dzi`, `<name>_files`, `<name>.html` and `<name>-images.txt`, default is `preview`
+        :type name: str
+        :param image_size: The size of the thumbnails, the tile size should be a multiple of it, default is `(64,64)`
+        :type image_size: tuple[int,int]
+        :param PIL_color_mode: The PIL color mode of the thumbnails, `RGB` or `L`, default is `RGB`
+        :type PIL_color_mode: str
+        :param tile_size: The size of the square tiles, default is `256`
+        :type tile_size: int
+        :param tile_format: The format of the tiles `jpg` or `png`, default is `jpg`
+        :type tile_format: str
+        """
+        image_size = tuple(image_size)
+        if tile_size % image_size[0] != 0 or tile_size % image_size[1] != 0:
+            raise ValueError("tile_size {} should be a multiple of the image_size {}".format(tile_size, image_size))
+        self.output_directory = output_directory
+        self.name = name
+        self.image_size = image_size
+        self.PIL_color_mode = PIL_color_mode
+        self.tile_size = tile_size
+        self.tile_format = tile_format
+        #number of thumbnails in the width and the height of a tile.
+        self.cells = (tile_size // image_size[0], tile_size // image_size[1])
+        self.tiles_directory = os.path.join(output_directory, name + '_files')
+        self.__partial_directory = self.tiles_directory + '.partial'
+        #pending tile of each depth above the full resolution level as `((column, row), canvas)`
+        self.__pending = {}
+        #size of the full resolution level, known once all the images are added.
+        self.__size = None
+        return
+
+    @staticmethod
+    def morton_position(index: int) -> tuple:
+        """returns the `(column, row)` of the tile of the given index in Morton order, the bits of the index alternate between
+                the column and the row.
+        """
+        column = row = 0
+        bit = 0
+        while index > 0:
+            column |= (index & 1) << bit
+            row |= ((index >> 1) & 1) << bit
+            index >>= 2
+            bit += 1
+        return column, row
+
+    @staticmethod
+    def write_tile(tile_path: str, tile: np.ndarray, tile_format: str) -> None:
+        """writes a tile to a temporary name then renames it so the tiles are never partially written.
+        """
+        temporary_path = '{}.{}-{}.tmp'.format(tile_path, os.getpid(), threading.get_ident())
+        if tile_format == 'jpg':
+            Image.fromarray(tile).save(temporary_path, format = 'JPEG', quality = PreviewPyramid.JPEG_QUALITY)
+        else:
+            Image.fromarray(tile).save(temporary_path, format = 'PNG')
+        os.replace(temporary_path, tile_path)
+        return
+
+    @staticmethod
+    def build_base_tile(tile_path: str, images: list[str], PIL_color_mode: str, image_size: tuple[int, int], tile_size: int,
+                        tile_format: str, cache_directory: str = None) -> np.ndarray:
+        """builds and writes a full resolution tile from the thumbnails of its images (row by row), the images that failed
+                to be read are left black.
+
+        :returns: the tile downsampled 2x for its parent tile.
+        :rtype: ndarray
+        """
+        channels = (3,) if PIL_color_mode == 'RGB' else ()
+        tile = np.zeros((tile_size, tile_size) + channels, dtype = np.uint8)
+        columns = tile_size // image_size[0]
+
+        thumbnails, _, _ = PreviewGrid.load_thumbnails(images, PIL_color_mode, image_size, cache_directory)
+        for cell, thumbnail in enumerate(thumbnails):
+            if thumbnail is None:
+                continue
+            x, y = (cell % columns) * image_size[0], (cell // columns) * image_size[1]
+            tile[y: y + image_size[1], x: x + image_size[0]] = thumbnail
+
+        PreviewPyramid.write_tile(tile_path, tile, tile_format)
+        return np.asarray(Image.fromarray(tile).reduce(2))
+
+    def __depth_directory(self, depth: int) -> str:
+        """returns the directory of the tiles of a depth (number of levels above the full resolution level), the directories
+                are renamed to their DeepZoom level once the number of levels is known.
+        """
+        directory = os.path.join(self.__partial_directory, 'depth-{}'.format(depth))
+        os.makedirs(directory, exist_ok = True)
+        return directory
+
+    def __add_child(self, depth: int, column: int, row: int, child: np.ndarray) -> None:
+        """adds a downsampled tile of `depth - 1` at `(column, row)` to its parent tile, the pending parent is complete and
+                flushed as soon as a child of another parent is added.
+        """
+        parent = (column // 2, row // 2)
+        if depth in self.__pending and self.__pending[depth][0] != parent:
+            self.__flush(depth)
+
+        if depth not in self.__pending:
+            self.__pending[depth] = (parent, np.zeros((self.tile_size, self.tile_size) + child.shape[2:], dtype = np.uint8))
+
+        _, canvas = self.__pending[depth]
+        x, y = (column % 2) * (self.tile_size // 2), (row % 2) * (self.tile_size // 2)
+        canvas[y: y + child.shape[0], x: x + child.shape[1]] = child
+        return
+
+    def __flush(self, depth: int, top_depth: int = None) -> None:
+        """writes the pending tile of a depth and adds it downsampled to its parent unless it's the top level.
+        """
+        (column, row), canvas = self.__pending.pop(depth)
+        tile = canvas
+        #a tile flushed before the end has all its children so it's full, the last tiles are cropped to the size of their level.
+        if self.__size is not None:
+            level_width, level_height = [int(math.ceil(size / 2 ** depth)) for size in self.__size]
+            tile = canvas[:min(self.tile_size, level_height - row * self.tile_size), :min(self.tile_size, level_width - column * self.tile_size)]
+        PreviewPyramid.write_tile(os.path.join(self.__depth_directory(depth), '{}_{}.{}'.format(column, row, self.tile_format)), tile, self.tile_format)
+        if top_depth is None or depth < top_depth:
+            self.__add_child(depth + 1, column, row, np.asarray(Image.fromarray(tile).reduce(2)))
+        return
+
+    def __write_viewer(self, description: dict) -> None:
+        """writes the `.dzi` descriptor of the pyramid and the static html viewer.
+        """
+        with open(os.path.join(self.output_directory, self.name + '.dzi'), 'w') as dzi_file:
+            dzi_file.write('<?xml version="1.0" encoding="UTF-8"?>\n<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+                           'TileSize="{}" Overlap="0" Format="{}"><Size Width="{}" Height="{}"/></Image>\n'.format(
+                               self.tile_size, self.tile_format, description['width'], description['height']))
+
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'PyramidViewer.html')) as template_file:
+            viewer = template_file.read()
+        with open(os.path.join(self.output_directory, self.name + '.html'), 'w') as viewer_file:
+            viewer_file.write(viewer.replace('__PYRAMID__', json.dumps(description)))
+        return
+
+    def build(self, images: Iterable[str], num_workers: int = 8, backend: str = 'thread', cache_directory: str = None) -> dict:
+        """builds the pyramid of the given images in a single pass, the images are consumed as they are produced by the iterable.
+
+        :param images: The images paths in the order of the thumbnails in the pyramid.
+        :type images: Iterable[str]
+        :param num_workers: Number of workers (threads or processes) building the full resolution tiles, default is `8`
+        :type num_workers: int
+        :param backend: `thread` or `process`, default is `thread`
+        :type backend: str
+        :param cache_directory: The directory of the thumbnail cache or `None` if no cache is used, default is `None`
+        :type cache_directory: str
+
+        :returns: the description of the pyramid written into the viewer, `None` if there are no images.
+        :rtype: dict
+        """
+        os.makedirs(self.output_directory, exist_ok = True)
+        #tiles left by an interrupted run are dropped.
+        shutil.rmtree(self.__partial_directory, ignore_errors = True)
+        base_directory = self.__depth_directory(0)
+        images_per_tile = self.cells[0] * self.cells[1]
+        images = iter(images)
+        images_count = 0
+        tiles_count = 0
+        columns = rows = 0
+
+        executor = ProcessPoolExecutor if backend == 'process' else ThreadPoolExecutor
+        images_list_path = os.path.join(self.output_directory, self.name + '-images.txt')
+        with executor(max_workers = num_workers) as pool, open(images_list_path, 'w') as images_list:
+            #the tiles are added to their parents in Morton order, so the results are consumed in submission order with a bounded window.
+            futures = collections.deque()
+            while True:
+                tile_images = list(itertools.islice(images, images_per_tile))
+                if len(tile_images) > 0:
+                    images_list.writelines(path + '\n' for path in tile_images)
+                    column, row = PreviewPyramid.morton_position(tiles_count)
+                    tile_path = os.path.join(base_directory, '{}_{}.{}'.format(column, row, self.tile_format))
+                    futures.append((column, row, pool.submit(PreviewPyramid.build_base_tile, tile_path, tile_images, self.PIL_color_mode,
+                                                             self.image_size, self.tile_size, self.tile_format, cache_directory)))
+                    images_count += len(tile_images)
+                    tiles_count += 1
+                    columns, rows = max(columns, column + 1), max(rows, row + 1)
+
+                if len(futures) > 0 and (len(futures) >= 2 * num_workers or len(tile_images) == 0):
+                    column, row, future = futures.popleft()
+                    self.__add_child(1, column, row, future.result())
+                elif len(tile_images) == 0:
+                    break
+
+        if images_count == 0:
+            shutil.rmtree(self.__partial_directory, ignore_errors = True)
+            return None
+
+        #the last pending tiles are flushed from the lowest depth up to the 1x1 pixel level.
+        width, height = columns * self.tile_size, rows * self.tile_size
+        self.__size = (width, height)
+        top_depth = max(int(math.ceil(math.log2(max(width, height)))), 0)
+        for depth in range(1, top_depth + 1):
+            if depth in self.__pending:
+                self.__flush(depth, top_depth)
+
+        for depth in range(top_depth + 1):
+            os.rename(os.path.join(self.__partial_directory, 'depth-{}'.format(depth)), os.path.join(self.__partial_directory, str(top_depth - depth)))
+        shutil.rmtree(self.tiles_directory, ignore_errors = True)
+        os.replace(self.__partial_directory, self.tiles_directory)
+
+        description = {
+            'width': width,
+            'height': height,
+            'tileSize': self.tile_size,
+            'format': self.tile_format,
+            'maxLevel': top_depth,
+            'tiles': self.name + '_files',
+            'imageSize': list(self.image_size),
+            'cells': list(self.cells),
+            'images': images_count,
+            'imagesList': self.name + '-images.txt',
+        }
+        self.__write_viewer(description)
+        return description
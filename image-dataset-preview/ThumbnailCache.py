@@ -0,0 +1,192 @@
+import os
+import sqlite3
+import threading
+from typing import Callable
+import numpy as np
+from ThumbnailLoader import ThumbnailLoader
+
+
+class ThumbnailCache:
+    """Persistent cache of the thumbnails of a dataset shared by the preview runs, the thumbnails of the same size and color
+            mode are packed as fixed size records in a single `.bin` file read through a memory map and an sqlite index maps
+            each image (path, size and modification time) to its record, so a changed image is decoded again and a re-run with
+            a different layout or order reads the packed file instead of decoding the images.
+
+        the records are written under the sqlite write lock at offsets allocated by the index, so the cache can be shared
+            by the threads and the processes of a run, the images that fail to decode are recorded as well so they are not retried.
+            a changed image is written over its old record and the records of the images that failed since they were cached are
+            kept in a free list of the index and reused, so the packed file only grows with the number of the cached images.
+    """
+
+    #slot of the images that failed to decode.
+    FAILED_SLOT = -1
+    #max number of paths in a single index query.
+    QUERY_BATCH_SIZE = 900
+
+    def __init__(self, cache_directory: str, image_size: tuple[int, int], PIL_color_mode: str) -> None:
+        """
+        :param cache_directory: The directory of the cache files, created if not exists.
+        :type cache_directory: str
+        :param image_size: The size of the cached thumbnails.
+        :type image_size: tuple[int,int]
+        :param PIL_color_mode: The PIL color mode of the cached thumbnails, `RGB` or `L`
+        :type PIL_color_mode: str
+        """
+        os.makedirs(cache_directory, exist_ok = True)
+        self.cache_directory = cache_directory
+        self.image_size = tuple(image_size)
+        self.PIL_color_mode = PIL_color_mode
+        self.thumbnail_key = '{}x{}-{}'.format(self.image_size[0], self.image_size[1], PIL_color_mode)
+        self.record_shape = (self.image_size[1], self.image_size[0]) + ((3,) if PIL_color_mode == 'RGB' else ())
+        self.record_size = int(np.prod(self.record_shape))
+        self.data_path = os.path.join(cache_directory, 'thumbnails-{}.bin'.format(self.thumbnail_key))
+        self.index_path = os.path.join(cache_directory, 'index.sqlite')
+        self.hits = 0
+        self.misses = 0
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+        self.__records = None
+
+        connection = self.__connection()
+        with connection:
+            connection.execute("""CREATE TABLE IF NOT EXISTS thumbnails (thumbnail TEXT NOT NULL, path TEXT NOT NULL, size_bytes INTEGER NOT NULL,
+                                        mtime_ns INTEGER NOT NULL, slot INTEGER NOT NULL, PRIMARY KEY (thumbnail, path))""")
+            connection.execute("""CREATE TABLE IF NOT EXISTS free_slots (thumbnail TEXT NOT NULL, slot INTEGER NOT NULL, PRIMARY KEY (thumbnail, slot))""")
+        open(self.data_path, 'ab').close()
+        return
+
+    def __connection(self) -> sqlite3.Connection:
+        """returns the index connection of the current thread.
+        """
+        connection = getattr(self.__local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.index_path, timeout = 60, isolation_level = None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self.__local.connection = connection
+        return connection
+
+    def __lookup(self, paths: list[str]) -> dict:
+        """returns the index rows of the given paths as dict of path to `(size_bytes, mtime_ns, slot)`
+        """
+        rows = {}
+        connection = self.__connection()
+        for start in range(0, len(paths), ThumbnailCache.QUERY_BATCH_SIZE):
+            batch = paths[start: start + ThumbnailCache.QUERY_BATCH_SIZE]
+            query = 'SELECT path, size_bytes, mtime_ns, slot FROM thumbnails WHERE thumbnail = ? AND path IN ({})'.format(','.join('?' * len(batch)))
+            for path, size_bytes, mtime_ns, slot in connection.execute(query, [self.thumbnail_key] + batch):
+                rows[path] = (size_bytes, mtime_ns, slot)
+        return rows
+
+    def __read(self, slot: int) -> np.ndarray:
+        """returns the thumbnail of a slot as a read only view of the packed file.
+        """
+        records = self.__records
+        if records is None or slot >= records.shape[0]:
+            #the packed file grew since it was mapped.
+            with self.__lock:
+                records_count = os.path.getsize(self.data_path) // self.record_size
+                self.__records = np.memmap(self.data_path, dtype = np.uint8, mode = 'r', shape = (records_count,) + self.record_shape)
+                records = self.__records
+        return records[slot]
+
+    def __store(self, entries: list[tuple]) -> None:
+        """writes the thumbnails to the packed file and adds them to the index in a single transaction, the thumbnail of a
+                changed image is written to its old slot and the new images take the free slots before the end of the file.
+
+        :param entries: list of tuples of `(path, size_bytes, mtime_ns, thumbnail)` where thumbnail is an array or `None` if the image failed.
+        :type entries: list[tuple]
+        """
+        connection = self.__connection()
+        #the write lock of the index serializes the allocation of the slots between threads and processes.
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            old_slots = {path: row[2] for path, row in self.__lookup([entry[0] for entry in entries]).items() if row[2] != ThumbnailCache.FAILED_SLOT}
+            free_slots = [slot for slot, in connection.execute('SELECT slot FROM free_slots WHERE thumbnail = ? ORDER BY slot DESC', [self.thumbnail_key])]
+            next_slot = connection.execute("""SELECT COALESCE(MAX(slot) + 1, 0) FROM (SELECT slot FROM thumbnails WHERE thumbnail = ?
+                                                    UNION ALL SELECT slot FROM free_slots WHERE thumbnail = ?)""", [self.thumbnail_key] * 2).fetchone()[0]
+
+            rows = []
+            records = []
+            for path, size_bytes, mtime_ns, thumbnail in entries:
+                if thumbnail is None:
+                    #the image failed since it was cached, its record is free.
+                    if path in old_slots:
+                        free_slots.append(old_slots.pop(path))
+                    rows.append((self.thumbnail_key, path, size_bytes, mtime_ns, ThumbnailCache.FAILED_SLOT))
+                    continue
+                slot = old_slots.get(path)
+                if slot is None:
+                    if len(free_slots) > 0:
+                        slot = free_slots.pop()
+                    else:
+                        slot = next_slot
+                        next_slot += 1
+                    old_slots[path] = slot
+                rows.append((self.thumbnail_key, path, size_bytes, mtime_ns, slot))
+                records.append((slot, np.ascontiguousarray(thumbnail, dtype = np.uint8).tobytes()))
+
+            if len(records) > 0:
+                data_file = os.open(self.data_path, os.O_WRONLY)
+                try:
+                    for slot, data in records:
+                        os.pwrite(data_file, data, slot * self.record_size)
+                finally:
+                    os.close(data_file)
+
+            connection.executemany('INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?, ?, ?)', rows)
+            connection.execute('DELETE FROM free_slots WHERE thumbnail = ?', [self.thumbnail_key])
+            connection.executemany('INSERT INTO free_slots VALUES (?, ?)', [(self.thumbnail_key, slot) for slot in free_slots])
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return
+
+    def load(self, images: list[str], loader: Callable = ThumbnailLoader.load) -> list:
+        """returns the thumbnails of the given images from the cache, the images not in the cache (or changed since they were
+                cached) are decoded and added to the cache.
+
+        :param images: The images paths.
+        :type images: list[str]
+        :param loader: function of `(image_path, PIL_color_mode, image_size)` that returns the thumbnail as PIL image, default is `ThumbnailLoader.load`
+        :type loader: Callable
+
+        :returns: list of the thumbnails as arrays in the order of the given images, `None` for the images that failed to decode.
+        :rtype: list[ndarray]
+        """
+        keys = []
+        for image in images:
+            path = os.path.abspath(image)
+            try:
+                stat = os.stat(path)
+                keys.append((path, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                keys.append(None)
+
+        rows = self.__lookup([key[0] for key in keys if key is not None])
+        thumbnails = [None] * len(images)
+        entries = []
+        hits = 0
+        for index, key in enumerate(keys):
+            if key is None:
+                continue
+            path, size_bytes, mtime_ns = key
+            row = rows.get(path)
+            if row is not None and row[0] == size_bytes and row[1] == mtime_ns:
+                hits += 1
+                if row[2] != ThumbnailCache.FAILED_SLOT:
+                    thumbnails[index] = self.__read(row[2])
+                continue
+
+            try:
+                thumbnails[index] = np.asarray(loader(images[index], self.PIL_color_mode, self.image_size), dtype = np.uint8)
+            except Exception:
+                thumbnails[index] = None
+            entries.append((path, size_bytes, mtime_ns, thumbnails[index]))
+
+        if len(entries) > 0:
+            self.__store(entries)
+        with self.__lock:
+            self.hits += hits
+            self.misses += len(entries)
+        return thumbnails
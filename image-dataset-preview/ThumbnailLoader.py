@@ -0,0 +1,33 @@
+from PIL import Image
+
+
+class ThumbnailLoader:
+    """Loads the thumbnail of an image with the decode work scaled to the thumbnail size instead of the image size, JPEG images
+            are decoded directly at a reduced scale (DCT scaling by `draft`) and the other formats are reduced by an integer
+            factor (`reduce`) before the final resampling.
+    """
+
+    #the image is decoded or reduced to at least this factor of the thumbnail size before the final resampling, higher values
+    #are closer to a full resampling of the original image and lower values are faster.
+    REDUCING_GAP = 2.0
+
+    @staticmethod
+    def load(image_path: str, PIL_color_mode: str, image_size: tuple[int, int], reducing_gap: float = REDUCING_GAP) -> Image.Image:
+        """opens an image and scales it down to the thumbnail size (stretched to the given size as the preview grid cells are).
+
+        :param image_path: The path of the image.
+        :type image_path: str
+        :param PIL_color_mode: The PIL color mode of the thumbnail, `RGB` or `L`
+        :type PIL_color_mode: str
+        :param image_size: The size of the thumbnail.
+        :type image_size: tuple[int,int]
+        :param reducing_gap: The factor of the thumbnail size the image is decoded or reduced to before resampling, default is `REDUCING_GAP`
+        :type reducing_gap: float
+
+        :returns: the thumbnail.
+        :rtype: PIL.Image.Image
+        """
+        image = Image.open(image_path)
+        #only JPEG images support draft, the other formats ignore it.
+        image.draft(PIL_color_mode, (int(image_size[0] * reducing_gap), int(image_size[1] * reducing_gap)))
+        return image.convert(PIL_color_mode).resize(tuple(image_size), reducing_gap = reducing_gap)
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import time
+import numpy as np
+import fire
+from PIL import Image
+from ThumbnailLoader import ThumbnailLoader
+
+
+def make_corpus(directory: str, number_of_images: int, image_size: tuple, seed: int = 0) -> list[str]:
+    """writes a mixed corpus of smooth synthetic photos, alternating JPEG, PNG and WEBP files.
+    :param directory: The directory to write the images into it.
+    :type directory: str
+    :param number_of_images: Number of images to write.
+    :type number_of_images: int
+    :param image_size: The size of each image.
+    :type image_size: tuple
+    :param seed: seed of the pseudo random generator.
+    :type seed: int
+    :returns: the list of written images paths.
+    :rtype: list[str]
+    """
+    rng = np.random.default_rng(seed)
+    formats = ['jpg', 'png', 'webp']
+    y, x = np.mgrid[0:image_size[1], 0:image_size[0]].astype(np.float32)
+    paths = []
+    for index in range(number_of_images):
+        #random gradients with some noise, closer to photos than uniform noise.
+        channels = [np.sin(x / rng.uniform(20, 200) + rng.uniform(0, 6)) + np.cos(y / rng.uniform(20, 200)) for _ in range(3)]
+        array = np.stack(channels, axis = -1) * 60 + 128 + rng.normal(0, 8, size = (image_size[1], image_size[0], 3))
+        path = os.path.join(directory, 'image_{:05d}.{}'.format(index, formats[index % len(formats)]))
+        Image.fromarray(np.clip(array, 0, 255).astype(np.uint8)).save(path)
+        paths.append(path)
+    return paths
+
+
+def legacy_load(image_path: str, PIL_color_mode: str, image_size: tuple) -> Image.Image:
+    """decodes the full image then scales it down, as done before the reduced scale decode.
+    """
+    return Image.open(image_path).convert(PIL_color_mode).resize(image_size)
+
+
+def psnr(first: Image.Image, second: Image.Image) -> float:
+    """computes the peak signal to noise ratio in dB between two images of the same size.
+    """
+    mse = np.mean((np.asarray(first, dtype = np.float64) - np.asarray(second, dtype = np.float64)) ** 2)
+    return float('inf') if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+
+def benchmark_thumbnail_decode_cli(source_directory: str = None, number_of_images: int = 60, source_size: tuple = (4000, 3000),
+                                   image_size: tuple = (64, 64), color_mode: str = 'rgb', repeats: int = 3) -> None:
+    """measures the thumbnail loading time of the full decode and of the reduced scale decode and the PSNR between their thumbnails.
+    :param source_directory: directory of images to use as the corpus, if `None` a mixed synthetic corpus is generated, default is `None`
+    :type source_directory: str
+    :param number_of_images: Number of images of the generated corpus, default is `60`
+    :type number_of_images: int
+    :param source_size: The size of the images of the generated corpus, default is `(4000,3000)`
+    :type source_size: tuple
+    :param image_size: The size of the thumbnails, default is `(64,64)`
+    :type image_size: tuple
+    :param color_mode: the color mode of the thumbnails to be `grey` or `rgb`, default is `rgb`
+    :type color_mode: str
+    :param repeats: Number of times to repeat each measurement, the best time is reported, default is `3`
+    :type repeats: int
+    :returns: prints the time per image of each method per format and the PSNR of the reduced scale thumbnails.
+    :rtype: None
+    """
+    PIL_color_mode = 'L' if color_mode.lower() == 'grey' else 'RGB'
+    image_size = tuple(image_size)
+
+    with tempfile.TemporaryDirectory() as corpus_directory:
+        if source_directory is None:
+            paths = make_corpus(corpus_directory, number_of_images, tuple(source_size))
+        else:
+            paths = sorted(os.path.join(source_directory, name) for name in os.listdir(source_directory))
+
+        by_format = {}
+        for path in paths:
+            by_format.setdefault(os.path.splitext(path)[1].lower(), []).append(path)
+
+        for extension, format_paths in sorted(by_format.items()):
+            timings = {}
+            for method in [legacy_load, ThumbnailLoader.load]:
+                best = float('inf')
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    for path in format_paths:
+                        method(path, PIL_color_mode, image_size)
+                    best = min(best, time.perf_counter() - start)
+                timings[method.__name__] = best / len(format_paths)
+
+            scores = [psnr(legacy_load(path, PIL_color_mode, image_size), ThumbnailLoader.load(path, PIL_color_mode, image_size)) for path in format_paths]
+            print("{} ({} images): full decode {:.1f} ms, reduced decode {:.1f} ms per image, {:.1f}x faster, PSNR {:.1f} dB (min {:.1f} dB)".format(
+                extension, len(format_paths), timings['legacy_load'] * 1e3, timings['load'] * 1e3,
+                timings['legacy_load'] / timings['load'], float(np.mean(scores)), float(np.min(scores))))
+
+
+if __name__ == "__main__":
+
+    fire.Fire(benchmark_thumbnail_decode_cli)
@@ -10,13 +10,15 @@ import random
 import os
 from ImageValidator import ImageValidator
 import fire 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from Base36lib import Base36
+from PatchDeduplicator import PatchDeduplicator
+from DirectoryScanner import DirectoryScanner
 
 class ImagePatchExtractor: 
     
     def __init__(self): 
-        self.written_files = {} 
+        self.deduplicator = PatchDeduplicator() 
         return 
     
     def __get_files_list(self, directory: str) -> list[str]: 
@@ -26,7 +28,7 @@ class ImagePatchExtractor:
         :returns: list of files
         :rtype: list[str]
         """
-        return [os.path.join(directory , image_file) for image_file in os.listdir(directory)]
+        return list(DirectoryScanner().files(directory, recursive = False))
 
     def __horizontal_flip(self, image: np.ndarray) -> np.ndarray: 
         """applies horizontal flip to the image and returns a view of the flipped version
@@ -209,14 +211,39 @@ class ImagePatchExtractor:
         if prefix is not None: 
             file_name = prefix + file_name
         
-        #Checks if the file was already written before. 
-
-        if file_name not in self.written_files: 
-            #mark the file as it's already written 
-            self.written_files[file_name] = True 
+        #Checks if the file was already written before, claiming the name is atomic so only one thread writes it. 
+        if self.deduplicator.claim_name(file_name): 
             Image.fromarray(image.astype(np.uint8)).save(os.path.join(output_directory , "{}.png".format(file_name))) 
         
         return  
+
+    def __write_arrays_to_png(self, images: list[np.ndarray], output_directory: str, prefixes: list[str] = None, base36: int = None) -> None: 
+        """Writes a batch of numpy arrays into `PNG` images, the batch is deduplicated first using a fast digest computed for all 
+                the arrays at once so the blake2b file name is only computed for the arrays that are actually written.  
+
+        :param images: The list of numpy arrays to be written into `PNG` images
+        :type images: list[ndarray]
+        :param output_directory: The directory to save the resultant images. 
+        :type output_directory: str
+        :param prefixes: if not `None` then a list of prefixes, one for each array, added to the written file names. 
+        :type prefixes: list[str]
+        :param `base36`: Number of 1st N chars of base36 of the base64url of the blake20 of the image, if is set to `None` then nothing is applied.
+        :type `base36`: int
+        :returns: None
+        :rtype: None
+        """  
+        if prefixes is None: 
+            prefixes = [None] * len(images)
+        
+        #the prefix is part of the file name so it's part of the key as well. 
+        digests = PatchDeduplicator.batch_digest(images)
+        keys = [(prefix, digest[0], digest[1]) for prefix, digest in zip(prefixes, digests.tolist())]
+        
+        for image, prefix, is_new in zip(images, prefixes, self.deduplicator.claim(keys)): 
+            if is_new: 
+                self.__write_array_to_png(image, output_directory, prefix = prefix, base36 = base36)
+        
+        return 
         
     def __resize(self, image: np.ndarray , dsize: tuple = (32 , 32)) -> np.ndarray:
         """Resizes the given image to the size given as tuple 
@@ -244,10 +271,10 @@ class ImagePatchExtractor:
     
     #############TEMP Function for resizing ###################################### 
     
-    def _resize_image_folder(self, source_directory: str, output_directory: str, resize_to: tuple):
-        #Validate the image in the source directory and get the valid image paths list. 
+    def _resize_image_folder(self, source_directory: str, output_directory: str, resize_to: tuple, validation_cache_path: str = None):
+        #Validate the image in the source directory and get the valid image paths list, unchanged images are not validated again if the cache is used. 
         validator = ImageValidator()
-        valid_images_list , _ = validator.validate(source_directory, False , [])
+        valid_images_list , _ = validator.validate(source_directory, recursive = False , allowed_types = [], cache_path = validation_cache_path)
         
         os.makedirs(output_directory , exist_ok = True)
         corrupts = 0 
@@ -293,10 +320,12 @@ class ImagePatchExtractor:
             
             all_patches = self.__stride_split_batch(images , tile_size)
             tmp = [] 
+            positions = [] 
             for image in all_patches: 
                 for x in range(image.shape[0]): 
                     for y in range(image.shape[1]): 
                         tmp.append(image[x,y,:,:,:])
+                        positions.append((x * tile_size[0], y * tile_size[1]))
             
             patches = tmp 
 
@@ -308,26 +337,27 @@ class ImagePatchExtractor:
             patches = self.__horizontal_flip_batch(patches)
         
         if write_single_patches:
-            for idx, patch in enumerate(patches): 
-                left_corner = "{}_{}_".format(positions[idx][0], positions[idx][1])
-                self.__write_array_to_png(patch, output_directory , prefix = left_corner , base36 = base36)
+            left_corners = ["{}_{}_".format(position[0], position[1]) for position in positions]
+            self.__write_arrays_to_png(patches, output_directory , prefixes = left_corners , base36 = base36)
         else: 
             no_of_elements = (output_png_size[0] // tile_size[0]) * (output_png_size[1] // tile_size[1])
+            concatenated_images = [] 
             
             for i in range(len(patches) // no_of_elements): 
-                concatendated = self.__concatenate_patches(patches[i * no_of_elements: (i + 1) * no_of_elements] , tile_size , output_png_size)
-                self.__write_array_to_png(concatendated , output_directory)
+                concatenated_images.append(self.__concatenate_patches(patches[i * no_of_elements: (i + 1) * no_of_elements] , tile_size , output_png_size))
             
             #remaining patches that didn't fit in the output_png size 
             if len(patches) % no_of_elements != 0: 
                 offset = len(patches) // no_of_elements
                 number_of_values = len(patches[offset * no_of_elements:])
-                concatendated = self.__concatenate_patches(patches[offset * no_of_elements:] , tile_size , (tile_size[0] * number_of_values , tile_size[1]))
-                self.__write_array_to_png(concatendated , output_directory)
+                concatenated_images.append(self.__concatenate_patches(patches[offset * no_of_elements:] , tile_size , (tile_size[0] * number_of_values , tile_size[1])))
+            
+            self.__write_arrays_to_png(concatenated_images , output_directory)
 
     def extract_patches(self, source_directory: str, output_directory: str, min_image_size: tuple = (64, 64), allowed_types: list = [], 
             split_patches_type: str = "random",  tile_size: tuple = (32 , 32), output_png_size: tuple = (512,512),
-            noise: bool = False, flip_patches: bool = False, number_of_tiles: int = None, batch_size: int = 8, num_workers: int = 8,  write_single_patches: bool = True , base36: int = None) -> None: 
+            noise: bool = False, flip_patches: bool = False, number_of_tiles: int = None, batch_size: int = 8, num_workers: int = 8,  write_single_patches: bool = True , base36: int = None,
+            validation_cache_path: str = None) -> None: 
         """Method to apply extracting patches given a set of options by the user.
         :param `source_directory`: The source directory containing the set of images to extract patches from them. 
         :type `source_directory`: str
@@ -359,45 +389,64 @@ class ImagePatchExtractor:
         :type `write_single_patches`: bool
         :param `base36`: Number of 1st N chars of base36 of the base64url of the blake2b of the image, if is set to `None` then nothing is applied.
         :type `base36`: int
+        :param `validation_cache_path`: path of a SQLite file used to cache the validation results of the source images, unchanged images are not 
+                    validated again in later runs, if `None` then no cache is used. 
+        :type `validation_cache_path`: str
         :returns: None
         :rtype: None
         """
 
-        #Validate the image in the source directory and get the valid image paths list. 
-        validator = ImageValidator()
-        valid_images_list , _ = validator.validate(source_directory, min_image_size ,  False , allowed_types)
-        
         os.makedirs(output_directory , exist_ok = True)
         
         #Fetch all files previously available in output_directory
-        self.written_files = {os.path.splitext(os.path.basename(path))[0]: True for path in self.__get_files_list(output_directory)}
+        self.deduplicator = PatchDeduplicator([os.path.splitext(os.path.basename(path))[0] for path in self.__get_files_list(output_directory)])
 
         thread_pool = ThreadPoolExecutor(max_workers = num_workers)
         futures = [] 
+        batch = [] 
 
-        for i in range(0, len(valid_images_list) , batch_size): 
-            
-            future = thread_pool.submit(self._extract_patches_task , output_directory,  valid_images_list[i:i+batch_size], split_patches_type, tile_size,
-                                                             output_png_size, noise, flip_patches,
-                                                             number_of_tiles, write_single_patches, base36, )
+        #Validate the images in the source directory and submit the valid ones in batches while the validation is still running. 
+        validator = ImageValidator()
+        for image_file, is_valid, _ in validator.iter_validate(source_directory, min_image_size ,  False , allowed_types, cache_path = validation_cache_path): 
+            if not is_valid: 
+                continue
             
-            futures.append(future)
-                    
+            batch.append(image_file)
+            if len(batch) == batch_size: 
+                futures.append(self.__submit_extract_patches_task(thread_pool, output_directory, batch, split_patches_type, tile_size, output_png_size, 
+                                                                  noise, flip_patches, number_of_tiles, write_single_patches, base36))
+                batch = [] 
+        
+        #the last batch of images that didn't fill a whole batch. 
+        if len(batch) > 0: 
+            futures.append(self.__submit_extract_patches_task(thread_pool, output_directory, batch, split_patches_type, tile_size, output_png_size, 
+                                                              noise, flip_patches, number_of_tiles, write_single_patches, base36))
         
         #Make sure all threads were executed successfully. 
         cur_working_batch = 0 
 
         for _ in as_completed(futures):
             cur_working_batch  += 1
-            print("Finished {} batches out of {} total batches.".format(cur_working_batch , len(valid_images_list) // batch_size))
+            print("Finished {} batches out of {} total batches.".format(cur_working_batch , len(futures)))
 
         
         return 
     
+    def __submit_extract_patches_task(self, thread_pool: ThreadPoolExecutor, output_directory: str, image_files: list[str], split_patches_type: str, tile_size: tuple, 
+                                      output_png_size: tuple, noise: bool, flip_patches: bool, number_of_tiles: int, write_single_patches: bool, base36: int) -> Future: 
+        """submits a batch of images to the thread pool to extract their patches. 
+        :returns: The future of the submitted task. 
+        :rtype: Future
+        """
+        return thread_pool.submit(self._extract_patches_task , output_directory,  image_files, split_patches_type, tile_size,
+                                                             output_png_size, noise, flip_patches,
+                                                             number_of_tiles, write_single_patches, base36, )
+    
 
 def extract_patches_cli_tool(source_directory: str, output_directory: str, min_image_size: tuple = (64, 64), allowed_types: list = [], 
             split_patches_type: str = "random",  tile_size: tuple = (32 , 32), output_png_size: tuple = (512,512),
-            noise: bool = False, flip_patches: bool = False, number_of_tiles: int = None, batch_size: int = 8, num_workers: int = 8,  write_single_patches: bool = True , base36: int = None) -> None: 
+            noise: bool = False, flip_patches: bool = False, number_of_tiles: int = None, batch_size: int = 8, num_workers: int = 8,  write_single_patches: bool = True , base36: int = None,
+            validation_cache_path: str = None) -> None: 
     """Method to apply extracting patches given a set of options by the user.
     :param `source_directory`: The source directory containing the set of images to extract patches from them. 
     :type `source_directory`: str
@@ -429,12 +478,15 @@ def extract_patches_cli_tool(source_directory: str, output_directory: str, min_i
     :type `write_single_patches`: bool
     :param `base36`: Number of 1st N chars of base36 of the base64url of the blake2b of the image, if is set to `None` then nothing is applied.
     :type `base36`: int
+    :param `validation_cache_path`: path of a SQLite file used to cache the validation results of the source images, unchanged images are not 
+                validated again in later runs, if `None` then no cache is used. 
+    :type `validation_cache_path`: str
     :returns: None
     :rtype: None
     """
     start_time = time.time() 
     patch_extractor = ImagePatchExtractor()
-    patch_extractor.extract_patches(source_directory , output_directory , min_image_size,  allowed_types , split_patches_type, tile_size, output_png_size , noise , flip_patches, number_of_tiles, batch_size , num_workers, write_single_patches , base36)
+    patch_extractor.extract_patches(source_directory , output_directory , min_image_size,  allowed_types , split_patches_type, tile_size, output_png_size , noise , flip_patches, number_of_tiles, batch_size , num_workers, write_single_patches , base36, validation_cache_path)
     
     print("Process took {:.2f} seconds to finish your task".format(time.time() - start_time))
 if __name__ == "__main__": 
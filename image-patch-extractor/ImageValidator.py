@@ -1,11 +1,18 @@
 import os 
 import re
-from typing import Tuple
+from typing import Iterator, Tuple
 from PIL import Image
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from ValidationCache import ValidationCache
+from DirectoryScanner import DirectoryScanner
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 
 class ImageValidator: 
     #FixME base64 is not the same as base64url change the regex to detect the file names. 
+    #number of scanned files looked up in the validation cache at a time. 
+    CACHE_LOOKUP_CHUNK = 512
+    #number of validation results stored in the validation cache at a time, in a single transaction. 
+    CACHE_STORE_BATCH = 1024
+    
     def __init__(self) -> None:
         return 
     
@@ -19,10 +26,7 @@ class ImageValidator:
         :returns: list of files
         :rtype: list[str]
         """
-        if recursive is True: 
-            return [os.path.join(root , file) for root , dirs , files in os.walk(directory) for file in files]
-        else:      
-            return [os.path.join(directory , path) for path in os.listdir(directory)]
+        return list(DirectoryScanner().files(directory, recursive))
 
     def __allowed_type(file: str , allowed_types: list = []) -> bool: 
         """Returns True only if the given file path is from the allowed file types by the user 
@@ -35,7 +39,18 @@ class ImageValidator:
         """
         return True if len(allowed_types) == 0 else (os.path.splitext(file)[1] in allowed_types)
 
-    def __validate_task(self, image: str,  min_size: tuple = (64, 64), allowed_types: list = []):
+    def __validate_task(self, image: str,  min_size: tuple = (64, 64), allowed_types: list = []) -> Tuple[str, bool, str]:
+        """Validates a single image file, the image is valid if it can be opened and verified, it's not smaller than `min_size`
+                and its extension matches its format. 
+        :param image: The path of the image to validate
+        :type image: str
+        :param min_size: min size of image dimension to be considered as valid image, comparison is made with on each dimension.  
+        :type min_size: tuple
+        :param allowed_types: list of the allowed images extensions if it's empty then all image types will be considered 
+        :type allowed_types: list
+        :returns: A tuple of the image path, `True` if the image is valid and the reason of the failure (`None` for valid images).
+        :rtype: Tuple[str, bool, str]
+        """
         
         try: 
             #try to open the image if it was corrupted it will return an exception 
@@ -44,21 +59,132 @@ class ImageValidator:
             
             #Check that the image is larger than min_size.
             if im.size[0] < min_size[0] or im.size[1] < min_size[1]: 
-                return False, image 
+                return image, False, "image size {} is smaller than the min size {}".format(im.size, tuple(min_size)) 
             
             #check if the file extension matches the image format an exception is applied for jpeg and jpg files as they are the same
             if im.format is None or im.format.lower() != image_extension.lower()[1:]: 
                 if not (image_extension.lower()[1:] == 'jpg' and im.format.lower() == 'jpeg'): 
                     #image is invalid because its extension doesn't match its format 
-                    return False, image
+                    return image, False, "image extension {} doesn't match its format {}".format(image_extension, im.format)
     
             im.verify()
-            return True, image
+            return image, True, None
         except Exception: 
             #File is invalid because it's corrupted 
-            return False, image 
+            return image, False, "image is corrupted" 
+    
+    def iter_validate(self, directory: str , min_size: tuple = (64, 64), recursive: bool = False , allowed_types = [], num_workers: int = 8, 
+                      max_in_flight: int = None, cache_path: str = None) -> Iterator[Tuple[str, bool, str]]:
+        """Validates all images contained in the path given with all it's subdirectories as well if recursive is true, and yields 
+                the result of each image as soon as it's validated (in completion order), only `max_in_flight` images are validated 
+                at a time so the memory doesn't grow with the number of files and the caller can start working on the valid images right away. 
+        :param directory: The directory containing the files to be validated 
+        :type directory: str
+        :param min_size: min size of image dimension to be considered as valid image, comparison is made with on each dimension.  
+        :type min_size: tuple
+        :param recursive: If it's set to True the function will search and validate all images in 
+                the given directory and all its subdirectories
+        :type recursive: bool
+        :param allowed_types: list of the allowed images extensions if it's empty then all image types will be considered 
+        :type allowed_types: list
+        :param num_workers: Number of threads to process the files.
+        :type num_workers: int
+        :param max_in_flight: max number of images submitted to the threads at a time, default is `4 * num_workers`
+        :type max_in_flight: int
+        :param cache_path: path of a SQLite file used to cache the validation results, unchanged files (same size and modification time)
+                are not opened again when validated with the same options, if `None` then no cache is used. 
+        :type cache_path: str
+        :returns: A generator of tuples of the image path, `True` if the image is valid and the reason of the failure (`None` for valid images).
+        :rtype: Iterator[Tuple[str, bool, str]]
+        """
+        if max_in_flight is None: 
+            max_in_flight = 4 * num_workers
+        
+        cache = ValidationCache(cache_path) if cache_path is not None else None
+        options = ValidationCache.options_key(min_size, allowed_types)
+        #results of the validated files waiting to be stored in the cache, stored in batches of `CACHE_STORE_BATCH`. 
+        to_store = [] 
+        
+        def store(batch_size: int) -> None: 
+            if cache is not None and len(to_store) >= max(batch_size, 1): 
+                cache.store(to_store, options)
+                to_store.clear()
+        
+        #scans the directory while validating, the scanning threads fetch the stat data needed by the cache. 
+        scanner = DirectoryScanner(num_workers, chunk_size = ImageValidator.CACHE_LOOKUP_CHUNK)
+        
+        try: 
+            with ThreadPoolExecutor(max_workers = num_workers) as thread_pool: 
+                #maps the submitted futures to the signatures of their files. 
+                in_flight = {} 
+                
+                for entries in scanner.scan_chunks(directory, recursive, with_stat = cache is not None): 
+                    #exclude only files 
+                    chunk = [entry for entry in entries if ImageValidator.__allowed_type(entry.path , allowed_types)]
+                    signatures = {} 
+                    cached = {} 
+                    
+                    if cache is not None: 
+                        signatures = ImageValidator.__get_signatures(chunk)
+                        cached = cache.lookup(signatures, options)
+                    
+                    for image in (entry.path for entry in chunk): 
+                        #the file didn't change since it was validated. 
+                        if image in cached: 
+                            yield (image, ) + cached[image]
+                            continue
+                        
+                        in_flight[thread_pool.submit(self.__validate_task , image, min_size, allowed_types,)] = signatures.get(image)
+                        
+                        #wait for some images to finish before submitting more. 
+                        if len(in_flight) >= max_in_flight: 
+                            done, _ = wait(in_flight, return_when = FIRST_COMPLETED)
+                            yield from ImageValidator.__collect_results(done, in_flight, to_store)
+                            store(ImageValidator.CACHE_STORE_BATCH)
+                
+                yield from ImageValidator.__collect_results(as_completed(list(in_flight)), in_flight, to_store)
+        finally: 
+            if cache is not None: 
+                #the remaining results are stored even if the consumer stopped before the end. 
+                store(1)
+                cache.close()
+    
+    @staticmethod
+    def __get_signatures(entries: list[os.DirEntry]) -> dict: 
+        """gets the signatures (size and modification time) of the given files, files that can't be accessed are skipped. 
+        :param entries: list of the scanned file entries. 
+        :type entries: list[os.DirEntry]
+        :returns: dict of the file paths and their signatures. 
+        :rtype: dict
+        """
+        signatures = {} 
+        for entry in entries: 
+            try: 
+                signatures[entry.path] = ValidationCache.signature(entry.stat())
+            except OSError: 
+                continue
+        return signatures
+    
+    @staticmethod
+    def __collect_results(done, in_flight: dict, to_store: list) -> Iterator[Tuple[str, bool, str]]: 
+        """yields the results of the finished futures, removes them from `in_flight` and adds their results to `to_store` to be 
+                stored in the cache. 
+        :param done: iterable of the finished futures. 
+        :param in_flight: dict of the submitted futures and the signatures of their files.
+        :type in_flight: dict
+        :param to_store: list of the results waiting to be stored in the cache as tuples of `(path, signature, is_valid, reason)` 
+        :type to_store: list
+        :returns: A generator of the validation results of the finished futures. 
+        :rtype: Iterator[Tuple[str, bool, str]]
+        """
+        for future in done: 
+            signature = in_flight.pop(future)
+            image, status, reason = future.result()
+            if signature is not None: 
+                to_store.append((image, signature, status, reason))
+            yield image, status, reason
      
-    def validate(self, directory: str , min_size: tuple = (64, 64), recursive: bool = False , allowed_types = [], num_workers: int = 8) -> Tuple[list,list]:
+    def validate(self, directory: str , min_size: tuple = (64, 64), recursive: bool = False , allowed_types = [], num_workers: int = 8, cache_path: str = None) -> Tuple[list,list]:
         #FixME -> Add the steps of validation to be clear for the user. 
         """Validates all images contained in the path given with all it's subdirectories as well if recursive is true
         :param directory: The directory containing the files to be validated 
@@ -72,39 +198,23 @@ class ImageValidator:
         :type allowed_types: list
         :param num_workers: Number of threads to process the files.
         :type num_workers: int
+        :param cache_path: path of a SQLite file used to cache the validation results, if `None` then no cache is used. 
+        :type cache_path: str
         :returns: A tuple of two lists the first are the valid image paths and the other is for the invalid ones.
         :rtype: list[str]
         """
         
-        #gets the whole files from the directory 
-        files_list = ImageValidator.get_files_list(directory , recursive)
-        #exclude only files 
-        images_list = [file for file in files_list if ImageValidator.__allowed_type(file , allowed_types)]
-        
         #List of invalid files to make the function return it
         failed_validation = set()
         valid_images = set() 
-        #Remove any file that has non-base64 character as a file name 
         #Regular expression used to match strings containing only base64 chars 
         #FixME add options to exclude ASCII characters as well.
         regular_exp = re.compile(r'^[a-zA-Z0-9+/=]*$')
-        [failed_validation.add(image) for image in images_list if regular_exp.fullmatch(os.path.splitext(os.path.split(image)[-1])[0]) is None]
-        
-        thread_pool = ThreadPoolExecutor(max_workers = num_workers)
         
-        futures = [] 
-        
-        for image in images_list: 
-            
-            task = thread_pool.submit(self.__validate_task , image, min_size, allowed_types,)
-            futures.append(task)
-        
-        for future in as_completed(futures): 
-            try: 
-                status, file_name = future.result()
-                valid_images.add(file_name) if status else failed_validation.add(image)
-            except Exception: 
-                continue
-            
+        for image, status, _ in self.iter_validate(directory, min_size, recursive, allowed_types, num_workers, cache_path = cache_path): 
+            valid_images.add(image) if status else failed_validation.add(image)
+            #Mark any file that has non-base64 character as a file name as failed 
+            if regular_exp.fullmatch(os.path.splitext(os.path.split(image)[-1])[0]) is None: 
+                failed_validation.add(image)
             
         return (list(valid_images), list(failed_validation))
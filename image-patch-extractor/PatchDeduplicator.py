@@ -0,0 +1,133 @@
+import hashlib
+from functools import lru_cache
+import numpy as np
+
+
+class PatchDeduplicator:
+    """Deduplicates patches written by concurrent threads using a fast non-cryptographic 128-bit digest computed
+            for a whole batch of patches at once, so the cryptographic file name is only computed for patches that are actually written.
+
+        Claims are made with `dict.setdefault` which is a single atomic operation for builtin keys, so no lock is needed
+            and two threads can never both claim the same patch.
+    """
+
+    #seeds of the two 64-bit lanes of the digest.
+    SEEDS = (0x6B43475F31, 0x6B43475F32)
+    #max number of bytes of the patches hashed at a time, bounds the temporary memory of a batch (a few times this size) for any patch size.
+    STEP_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, existing_names: list[str] = []) -> None:
+        #digests of the patches claimed during this run.
+        self.__claimed_digests = {}
+        #file names already written, including the files found in the output directory before the run.
+        self.__claimed_names = {name: True for name in existing_names}
+        return
+
+    @staticmethod
+    @lru_cache(maxsize = 64)
+    def __lane_keys(seed: int, words: int) -> np.ndarray:
+        """returns the pseudo random 32-bit keys of a digest lane for rows of `words` 32-bit words.
+        :param seed: The seed of the digest lane.
+        :type seed: int
+        :param words: Number of 32-bit words in each row.
+        :type words: int
+        :returns: array of keys of length `words`
+        :rtype: ndarray
+        """
+        keys = np.random.default_rng(seed).integers(0, 2 ** 32, size = words, dtype = np.uint32)
+        keys.setflags(write = False)
+        return keys
+
+    @staticmethod
+    def __finalize(lane: np.ndarray) -> np.ndarray:
+        """applies the 64-bit finalizer of murmur3 to spread the bits of the accumulated lane.
+        :param lane: The accumulated lane values.
+        :type lane: ndarray
+        :returns: the mixed lane values.
+        :rtype: ndarray
+        """
+        lane ^= lane >> np.uint64(33)
+        lane *= np.uint64(0xFF51AFD7ED558CCD)
+        lane ^= lane >> np.uint64(33)
+        lane *= np.uint64(0xC4CEB9FE1A85EC53)
+        lane ^= lane >> np.uint64(33)
+        return lane
+
+    @staticmethod
+    def __digest_group(patches: list[np.ndarray]) -> np.ndarray:
+        """computes the digests of patches that all share the same shape and dtype.
+        :param patches: The list of patches with equal shape and dtype.
+        :type patches: list[ndarray]
+        :returns: array of shape `(len(patches), 2)` containing the 128-bit digests as two uint64 lanes.
+        :rtype: ndarray
+        """
+        #the shape and dtype are part of the digest, so equal bytes with different layouts never collide.
+        layout = int.from_bytes(hashlib.blake2b(repr((patches[0].shape, patches[0].dtype.str)).encode('ascii'), digest_size = 8).digest(), 'little')
+        digests = np.empty((len(patches), 2), dtype = np.uint64)
+        #at least one patch is hashed at a time, whatever its size.
+        rows_per_step = max(1, PatchDeduplicator.STEP_BYTES // max(patches[0].nbytes, 1))
+
+        for start in range(0, len(patches), rows_per_step):
+            step = patches[start: start + rows_per_step]
+            #one contiguous row of raw bytes per patch.
+            rows = np.stack(step).reshape(len(step), -1).view(np.uint8)
+            #pad the rows to a whole number of 32-bit word pairs.
+            padding = -rows.shape[1] % 8
+            if padding != 0:
+                rows = np.pad(rows, ((0, 0), (0, padding)))
+            words = rows.view('<u4')
+
+            for lane, seed in enumerate(PatchDeduplicator.SEEDS):
+                #NH universal hash (as used by UMAC), the keys are added modulo 2^32 and each pair of words is multiplied into 64 bits.
+                keyed = (words + PatchDeduplicator.__lane_keys(seed, words.shape[1])).reshape(len(step), -1, 2)
+                accumulated = keyed[:, :, 0].astype(np.uint64)
+                accumulated *= keyed[:, :, 1]
+                accumulated = accumulated.sum(axis = 1, dtype = np.uint64)
+                accumulated ^= np.uint64(layout ^ seed)
+                digests[start: start + len(step), lane] = PatchDeduplicator.__finalize(accumulated)
+
+        return digests
+
+    @staticmethod
+    def batch_digest(patches: list[np.ndarray]) -> np.ndarray:
+        """computes a fast non-cryptographic 128-bit digest for each patch in the batch.
+        :param patches: The list of patches to compute their digests.
+        :type patches: list[ndarray]
+        :returns: array of shape `(len(patches), 2)` containing the digests as two uint64 lanes, in the same order of `patches`.
+        :rtype: ndarray
+        """
+        digests = np.empty((len(patches), 2), dtype = np.uint64)
+
+        #patches can only be stacked together when they have the same shape and dtype.
+        groups = {}
+        for index, patch in enumerate(patches):
+            groups.setdefault((patch.shape, patch.dtype.str), []).append(index)
+
+        for indices in groups.values():
+            digests[indices] = PatchDeduplicator.__digest_group([patches[index] for index in indices])
+
+        return digests
+
+    def claim(self, keys: list) -> list[bool]:
+        """atomically claims each of the given keys, a key is claimed only once even if it's repeated inside the batch
+                or claimed by another thread at the same time.
+        :param keys: list of hashable keys, usually built from the digests returned by `batch_digest`.
+        :type keys: list
+        :returns: list of booleans, `True` for the keys claimed by this call.
+        :rtype: list[bool]
+        """
+        claimed = []
+        for key in keys:
+            token = object()
+            claimed.append(self.__claimed_digests.setdefault(key, token) is token)
+        return claimed
+
+    def claim_name(self, file_name: str) -> bool:
+        """atomically claims a file name, returns `False` if the file was already written or claimed by another thread.
+        :param file_name: The file name to claim.
+        :type file_name: str
+        :returns: `True` if the file name was claimed by this call.
+        :rtype: bool
+        """
+        token = object()
+        return self.__claimed_names.setdefault(file_name, token) is token
@@ -0,0 +1,98 @@
+import json
+import os
+import sqlite3
+from typing import Tuple
+
+
+class ValidationCache:
+    """Persistent cache of image validation results stored in a SQLite table, a cached result is only returned while the
+            file size and modification time are the same as when the file was validated, so changed files are validated again.
+    """
+
+    def __init__(self, cache_path: str) -> None:
+        """opens the cache database at `cache_path` and creates it if it's not found.
+        :param cache_path: The path of the SQLite database file of the cache.
+        :type cache_path: str
+        """
+        self.connection = sqlite3.connect(cache_path, check_same_thread = False)
+        #WAL mode lets other processes keep reading the cache while it's being updated.
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        #in WAL mode the commits are not synced to the disk one by one, a crash may only lose the last results which are validated again.
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS validation_results (
+                                        path TEXT NOT NULL,
+                                        options TEXT NOT NULL,
+                                        size INTEGER NOT NULL,
+                                        mtime_ns INTEGER NOT NULL,
+                                        is_valid INTEGER NOT NULL,
+                                        reason TEXT,
+                                        PRIMARY KEY (path, options))""")
+        self.connection.commit()
+        return
+
+    @staticmethod
+    def options_key(min_size: tuple, allowed_types: list) -> str:
+        """returns the key of the validation options, results are only reused when validated with the same options.
+        :param min_size: min size of image dimension used in the validation.
+        :type min_size: tuple
+        :param allowed_types: list of the allowed images extensions used in the validation.
+        :type allowed_types: list
+        :returns: the options key.
+        :rtype: str
+        """
+        return json.dumps([list(min_size), sorted(allowed_types)])
+
+    @staticmethod
+    def signature(stat_result: os.stat_result) -> Tuple[int, int]:
+        """returns the signature of a file used to detect if it has changed since it was validated.
+        :param stat_result: The stat result of the file.
+        :type stat_result: os.stat_result
+        :returns: the file size and modification time in nanoseconds.
+        :rtype: Tuple[int, int]
+        """
+        return (stat_result.st_size, stat_result.st_mtime_ns)
+
+    def lookup(self, signatures: dict, options: str) -> dict:
+        """returns the cached results of the given files that didn't change since they were validated.
+        :param signatures: dict of the file paths to look up and their current signatures.
+        :type signatures: dict
+        :param options: The key of the validation options returned from `options_key`.
+        :type options: str
+        :returns: dict of the file paths found in the cache and their results as tuples of `(is_valid, reason)`
+        :rtype: dict
+        """
+        cached = {}
+        paths = list(signatures)
+
+        #SQLite limits the number of parameters of a single query.
+        for start in range(0, len(paths), 500):
+            chunk = paths[start: start + 500]
+            rows = self.connection.execute("SELECT path, size, mtime_ns, is_valid, reason FROM validation_results WHERE options = ? AND path IN ({})"
+                                           .format(','.join('?' * len(chunk))), [options] + chunk)
+            for path, size, mtime_ns, is_valid, reason in rows:
+                if signatures[path] == (size, mtime_ns):
+                    cached[path] = (bool(is_valid), reason)
+
+        return cached
+
+    def store(self, results: list, options: str) -> None:
+        """stores validation results in the cache replacing any previous result of the same files.
+        :param results: list of tuples of `(path, signature, is_valid, reason)`
+        :type results: list
+        :param options: The key of the validation options returned from `options_key`.
+        :type options: str
+        :returns: None
+        :rtype: None
+        """
+        self.connection.executemany("INSERT OR REPLACE INTO validation_results VALUES (?, ?, ?, ?, ?, ?)",
+                                    [(path, options, signature[0], signature[1], int(is_valid), reason) for path, signature, is_valid, reason in results])
+        self.connection.commit()
+        return
+
+    def close(self) -> None:
+        """closes the cache database.
+        :returns: None
+        :rtype: None
+        """
+        self.connection.close()
+        return
@@ -0,0 +1,90 @@
+import base64
+import hashlib
+import time
+import numpy as np
+import fire
+from Base36lib import Base36
+from PatchDeduplicator import PatchDeduplicator
+
+
+def make_patches(number_of_patches: int, tile_size: tuple, duplicates_ratio: float, seed: int = 0) -> list[np.ndarray]:
+    """generates random patches where `duplicates_ratio` of them are copies of other patches in the list.
+    :param number_of_patches: Number of patches to generate.
+    :type number_of_patches: int
+    :param tile_size: The size of each patch.
+    :type tile_size: tuple
+    :param duplicates_ratio: The ratio of the duplicated patches in the list.
+    :type duplicates_ratio: float
+    :param seed: seed of the pseudo random generator.
+    :type seed: int
+    :returns: the list of generated patches.
+    :rtype: list[ndarray]
+    """
+    rng = np.random.default_rng(seed)
+    unique_patches = max(1, int(number_of_patches * (1 - duplicates_ratio)))
+    originals = rng.integers(0, 256, size = (unique_patches, tile_size[0], tile_size[1], 3), dtype = np.uint8)
+    return [originals[index] for index in rng.integers(0, unique_patches, size = number_of_patches)]
+
+
+def legacy_naming(patches: list[np.ndarray], base36: int = None) -> int:
+    """names every patch with blake2b, base64url and optionally Base36 then checks it against a dict, as done before the batch dedupe.
+    :returns: number of patches that would be written.
+    :rtype: int
+    """
+    written_files = {}
+    for patch in patches:
+        file_name = base64.urlsafe_b64encode(bytes(hashlib.blake2b(patch.tobytes()).hexdigest(), 'utf-8')).decode('ascii')
+        if base36 is not None:
+            file_name = Base36.encode(file_name)[:base36]
+        if file_name not in written_files:
+            written_files[file_name] = True
+    return len(written_files)
+
+
+def batch_naming(patches: list[np.ndarray], base36: int = None) -> int:
+    """deduplicates the whole batch with the fast digest and names only the patches that would be written.
+    :returns: number of patches that would be written.
+    :rtype: int
+    """
+    deduplicator = PatchDeduplicator()
+    written = 0
+    digests = PatchDeduplicator.batch_digest(patches)
+    keys = [tuple(digest) for digest in digests.tolist()]
+    for patch, is_new in zip(patches, deduplicator.claim(keys)):
+        if is_new:
+            file_name = base64.urlsafe_b64encode(bytes(hashlib.blake2b(patch.tobytes()).hexdigest(), 'utf-8')).decode('ascii')
+            if base36 is not None:
+                file_name = Base36.encode(file_name)[:base36]
+            written += deduplicator.claim_name(file_name)
+    return written
+
+
+def benchmark_patch_naming_cli(number_of_patches: int = 20000, tile_size: tuple = (32, 32), duplicates_ratio: float = 0.5, base36: int = None, repeats: int = 3) -> None:
+    """measures the naming cost per patch of the legacy per-patch naming and of the batch dedupe naming.
+    :param number_of_patches: Number of patches in the benchmark batch, default is `20000`
+    :type number_of_patches: int
+    :param tile_size: The size of each patch, default is `(32,32)`
+    :type tile_size: tuple
+    :param duplicates_ratio: The ratio of duplicated patches in the batch, default is `0.5`
+    :type duplicates_ratio: float
+    :param base36: Number of 1st N chars of base36 of the file names, if is set to `None` then nothing is applied.
+    :type base36: int
+    :param repeats: Number of times to repeat each measurement, the best time is reported, default is `3`
+    :type repeats: int
+    :returns: prints the cost per patch of each method.
+    :rtype: None
+    """
+    patches = make_patches(number_of_patches, tile_size, duplicates_ratio)
+
+    for method in [legacy_naming, batch_naming]:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            written = method(patches, base36)
+            timings.append(time.perf_counter() - start)
+        print("{}: {:.2f} us per patch, {} of {} patches written".format(method.__name__, min(timings) / len(patches) * 1e6, written, len(patches)))
+
+
+if __name__ == "__main__":
+
+    fire.Fire(benchmark_patch_naming_cli)
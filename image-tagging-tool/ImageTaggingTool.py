@@ -1,6 +1,7 @@
-import json
-from flask import Flask, render_template, send_from_directory, url_for, request
+from flask import Flask, abort, render_template, send_from_directory, url_for, request
 from utils import Utils
+from SamplePool import SamplePool
+from LabelStore import LabelStore
 from flask_cors import CORS
 import os 
 from urllib.parse import unquote
@@ -14,7 +15,8 @@ CORS(app)
 utils = None 
 #global variables their values should be passed by the user in the cli.  
 images_folder = "" 
-files_list = [] 
+#the images that are not labelled yet. 
+files_pool = SamplePool([]) 
 N = 4 
 seed = None 
    
@@ -24,7 +26,7 @@ def index():
     """returns the index page of the tool and generates a random sample of images to start with. 
     """
     #should send an initial sample.    
-    return render_template('index.html', aesthetic_score_image = Utils.get_random_sample(files_list, 1)[0], images = Utils.get_random_sample(files_list , N * N), labels = tags, username = username, predicted_tags = utils.get_all_dictionary())
+    return render_template('index.html', aesthetic_score_image = files_pool.sample(1)[0], images = files_pool.sample(N * N), labels = tags, username = username, predicted_tags = utils.get_all_dictionary())
 
 
 @app.route('/taggingTool/api/checkTag')
@@ -48,61 +50,52 @@ def get_images(filename):
    #serving the required image from the image dataset folder provided by the user when running the tool. 
    return send_from_directory(os.path.join(images_folder, os.path.dirname(filename)), unquote(os.path.basename(filename)), as_attachment=True)
 
+def dataset_image_path(image_path: str) -> str: 
+   """returns the path of an image of the dataset given its path relative to the images folder, or `None` if the path is 
+      absolute or goes out of the images folder (with `../`). 
+   """
+   images_root = os.path.abspath(images_folder)
+   full_path = os.path.abspath(os.path.join(images_root, image_path))
+   if os.path.commonpath([images_root, full_path]) != images_root: 
+      return None
+   return os.path.normpath(os.path.join(images_folder, image_path))
+
 @app.route('/taggingTool/api/labelImages' , methods = ["POST"])
 def label_images():
    """endpoint responds to POST requests containing the labeled/tagged images info inside the request body, 
-      the endpoint computes the selected images metadata and stores them inside a json file within the same path. 
+      the endpoint computes the selected images metadata and appends them to the `<label>.jsonl` file of the label in the output directory. 
    """
+   #the image url is the url of the `get_images` endpoint followed by the path of the image in the dataset. 
+   images_paths = [unquote(image).split('/taggingTool/api/getImages/', 1)[-1] for image in request.json['images']]
+   
+   #only the images of the dataset are opened, a path out of the images folder is rejected. 
+   dataset_paths = [dataset_image_path(image_path) for image_path in images_paths]
+   if None in dataset_paths: 
+      abort(400, description = "the image {} is not in the images folder".format(images_paths[dataset_paths.index(None)]))
+   
    #open and compute the hash of the images. 
-   images_metadata = [Utils.image_metadata(images_folder, unquote(os.path.join(images_folder, os.path.basename(image_path))), request.json['username'], request.json['label'], 'sha256') for image_path in request.json['images']]
+   images_metadata = [Utils.image_metadata(images_folder, dataset_path, request.json['username'], request.json['label'], 'sha256') for dataset_path in dataset_paths]
    
    
    if request.json['task'] == 'aesthetic-score': 
       images_metadata[0]['score'] = int(request.json['score'])
       images_metadata[0]['img_tags'] = request.json['img_tags']
       
-   #store the images metadata and labels sent by user inside json file. 
-   labeled_images = {} 
-   
-   output_file_path = os.path.join(output_directory, request.json['label'] + '.json')
-   
-   #if the json file storing the labels is not found then create it. 
-   if not os.path.isfile(output_file_path): 
-      json.dump(labeled_images, open(output_file_path, 'w'), indent = 4)
+   #the label chosen by the user. 
+   label = request.json['label']
    
-   try: 
-      
-      with open(output_file_path, "r") as labels_file: 
-         #loads the json file into dict to update it with the new values. 
-         labeled_images = json.load(labels_file)
-         #the label chosen by the user. 
-         label = request.json['label']
-         #Check if the tag is not already found in 
-         if label not in labeled_images: 
-            labeled_images[label] = {'tag_task': label, 'tag_data': []}
-         #update the tagged data. 
-         labeled_images[label]['tag_data'].extend(images_metadata)
-      
-   except Exception as ex:   
-      print(ex)    
-      pass  
+   #append the images metadata to the labels of the chosen label. 
+   label_store.append(label, images_metadata)
    
-   with open(output_file_path, "w") as labels_file: 
-      json.dump(labeled_images, labels_file, indent = 4)
-
-   #remove the labeled images from the files list. 
-   for image in request.json['images']: 
-      #Make the path in the same format of paths in files_list variable. 
-      image_path = {'url': unquote(os.path.basename(image))}
-      #if the image path in the files_list remove it as it's already labeled (it should always be found)
-      if image_path in files_list: 
-         files_list.remove(image_path)
+   #remove the labeled images from the pool of images to sample from. 
+   for image_path in images_paths: 
+      files_pool.remove(image_path)
    
    #Change the global username to the new one. 
    username = request.json['username']
    
    #return a new list of images to the user to label. 
-   return render_template('index.html', aesthetic_score_image = Utils.get_random_sample(files_list, 1)[0], images = Utils.get_random_sample(files_list, N * N), labels = tags, username = username, active_label = label,  predicted_tags = utils.get_all_dictionary())
+   return render_template('index.html', aesthetic_score_image = files_pool.sample(1)[0], images = files_pool.sample(N * N), labels = tags, username = username, active_label = label,  predicted_tags = utils.get_all_dictionary())
 
 
 
@@ -140,8 +133,8 @@ def image_tagging_tool_cli(user_name: str, images_dataset_directory: str, tag_ta
    #create the output directory if it's not found. 
    os.makedirs(output_directory, exist_ok = True)
    
-   global files_list 
-   files_list = Utils.get_images_list(images_folder)
+   global label_store
+   label_store = LabelStore(output_directory)
    
    global N 
    N = grid_dim
@@ -149,6 +142,9 @@ def image_tagging_tool_cli(user_name: str, images_dataset_directory: str, tag_ta
    global seed
    seed = samples_seed
    
+   global files_pool 
+   files_pool = SamplePool((image['url'] for image in Utils.get_images_list(images_folder)), seed)
+   
    global username
    username = user_name
    
@@ -157,7 +153,10 @@ def image_tagging_tool_cli(user_name: str, images_dataset_directory: str, tag_ta
    utils = Utils(dictionary_path)
    utils.create_settings_file(user_name, images_dataset_directory, tag_tasks, data_output_directory, dictionary_path, grid_dim, samples_seed)
    
-   app.run(debug = True)
+   try: 
+      app.run(debug = True)
+   finally: 
+      label_store.close()
    
 if __name__ == '__main__':
 
@@ -0,0 +1,195 @@
+import glob
+import json
+import os
+import threading
+import time
+import fire
+
+
+class LabelStore:
+    """Append-only store of the labelled images metadata, the metadata of each label is appended as one `JSON` line for each
+            image to `<label>.jsonl` in the output directory, so adding labels costs the same whatever the number of labels
+            already collected, the writes are serialized by a lock and synced to the disk in batches.
+
+        a label file of the legacy format (`<label>.json` holding `{label: {'tag_task': label, 'tag_data': [...]}}`) is migrated
+            to the store the first time the label is used, and `export` writes the store back in the legacy format, the other
+            `JSON` files of the output directory are never migrated nor overwritten.
+    """
+
+    #max number of seconds the appended records may wait to be synced to the disk.
+    FSYNC_INTERVAL = 1.0
+    #max number of appended records waiting to be synced to the disk.
+    FSYNC_BATCH_SIZE = 256
+
+    def __init__(self, output_directory: str) -> None:
+        """
+        :param output_directory: The directory of the label files, created if not exists.
+        :type output_directory: str
+        """
+        os.makedirs(output_directory, exist_ok = True)
+        self.output_directory = output_directory
+        self.__lock = threading.Lock()
+        #open files of the labels as dict of label to file.
+        self.__files = {}
+        self.__unsynced = 0
+        self.__last_sync = time.monotonic()
+        return
+
+    def path(self, label: str) -> str:
+        """returns the path of the `JSONL` file of a label.
+        """
+        return os.path.join(self.output_directory, label + '.jsonl')
+
+    def legacy_path(self, label: str) -> str:
+        """returns the path of the legacy `JSON` file of a label.
+        """
+        return os.path.join(self.output_directory, label + '.json')
+
+    def legacy_records(self, label: str) -> list[dict]:
+        """returns the metadata of the labelled images of the legacy file of a label.
+
+        :returns: the `tag_data` of the legacy file, `None` if the file doesn't exist or isn't a label file of the label.
+        :rtype: list[dict]
+        """
+        try:
+            with open(self.legacy_path(label), 'r', encoding = 'utf-8') as legacy_file:
+                legacy = json.load(legacy_file)
+        except (OSError, ValueError):
+            return None
+        label_data = legacy.get(label) if isinstance(legacy, dict) else None
+        if not isinstance(label_data, dict) or not isinstance(label_data.get('tag_data'), list):
+            return None
+        return label_data['tag_data']
+
+    def __open(self, label: str):
+        """returns the file of a label opened for appending, the legacy file of the label is migrated if the label has no
+                `JSONL` file yet and a partially written last line (left by a killed run) is dropped.
+        """
+        label_file = self.__files.get(label)
+        if label_file is not None:
+            return label_file
+
+        label_path = self.path(label)
+        if not os.path.isfile(label_path):
+            records = []
+            if os.path.isfile(self.legacy_path(label)):
+                records = self.legacy_records(label)
+                #the label would overwrite the file when it's exported.
+                if records is None:
+                    raise ValueError("{} is not a label file of the label {}".format(self.legacy_path(label), label))
+            #the migrated file is written to a temporary name so a failed migration is done again on the next run.
+            with open(label_path + '.tmp', 'w', encoding = 'utf-8') as migrated_file:
+                migrated_file.writelines(json.dumps(record) + '\n' for record in records)
+                migrated_file.flush()
+                os.fsync(migrated_file.fileno())
+            os.replace(label_path + '.tmp', label_path)
+        else:
+            with open(label_path, 'rb') as label_file:
+                data = label_file.read()
+            if len(data) > 0 and not data.endswith(b'\n'):
+                with open(label_path, 'r+b') as label_file:
+                    label_file.truncate(data.rfind(b'\n') + 1)
+
+        label_file = open(label_path, 'a', encoding = 'utf-8')
+        self.__files[label] = label_file
+        return label_file
+
+    def append(self, label: str, images_metadata: list[dict]) -> None:
+        """appends the metadata of the labelled images to the label, the records are written and flushed at once and synced
+                to the disk when `FSYNC_BATCH_SIZE` records or `FSYNC_INTERVAL` seconds are reached.
+
+        :param label: The label of the images.
+        :type label: str
+        :param images_metadata: The metadata of the labelled images.
+        :type images_metadata: list[dict]
+        """
+        lines = ''.join(json.dumps(image_metadata) + '\n' for image_metadata in images_metadata)
+        with self.__lock:
+            label_file = self.__open(label)
+            label_file.write(lines)
+            label_file.flush()
+            self.__unsynced += len(images_metadata)
+            if self.__unsynced >= LabelStore.FSYNC_BATCH_SIZE or time.monotonic() - self.__last_sync >= LabelStore.FSYNC_INTERVAL:
+                self.__sync()
+        return
+
+    def __sync(self) -> None:
+        """syncs the files of all the labels to the disk.
+        """
+        for label_file in self.__files.values():
+            os.fsync(label_file.fileno())
+        self.__unsynced = 0
+        self.__last_sync = time.monotonic()
+        return
+
+    def close(self) -> None:
+        """syncs and closes the files of the labels.
+        """
+        with self.__lock:
+            self.__sync()
+            for label_file in self.__files.values():
+                label_file.close()
+            self.__files = {}
+        return
+
+    def records(self, label: str) -> list[dict]:
+        """returns the metadata of the labelled images of a label in the order they were added.
+        """
+        with self.__lock:
+            self.__open(label).flush()
+            records = []
+            with open(self.path(label), 'r', encoding = 'utf-8') as label_file:
+                for line in label_file:
+                    if line.endswith('\n'):
+                        records.append(json.loads(line))
+        return records
+
+    def labels(self) -> list[str]:
+        """returns the labels of the store and of the legacy label files not migrated yet, the other `JSON` files are skipped.
+        """
+        labels = set(os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(glob.escape(self.output_directory), '*.jsonl')))
+        for path in glob.glob(os.path.join(glob.escape(self.output_directory), '*.json')):
+            label = os.path.splitext(os.path.basename(path))[0]
+            if label not in labels and self.legacy_records(label) is not None:
+                labels.add(label)
+        return sorted(labels)
+
+    def export(self, labels: list[str] = None) -> list[str]:
+        """writes the labels in the legacy format `<label>.json` holding `{label: {'tag_task': label, 'tag_data': [...]}}`
+
+        :param labels: The labels to export, if `None` all the labels are exported, default is `None`, a label whose `<label>.json`
+                isn't a label file raises a `ValueError`
+        :type labels: list[str]
+
+        :returns: the paths of the written files.
+        :rtype: list[str]
+        """
+        written = []
+        for label in (self.labels() if labels is None else labels):
+            legacy_path = self.legacy_path(label)
+            with open(legacy_path + '.tmp', 'w', encoding = 'utf-8') as legacy_file:
+                json.dump({label: {'tag_task': label, 'tag_data': self.records(label)}}, legacy_file, indent = 4)
+            os.replace(legacy_path + '.tmp', legacy_path)
+            written.append(legacy_path)
+        return written
+
+
+def export_labels_cli(data_output_directory: str, labels: list = None) -> None:
+    """exports the labels collected by the tagging tool in `data_output_directory` to the legacy `<label>.json` files.
+
+    :param data_output_directory: the output directory of the tagging tool.
+    :type data_output_directory: str
+    :param labels: the labels to export, and should be provided as a list, all the labels are exported if not set.
+    :type labels: list
+    :returns:
+    :rtype: None
+    """
+    label_store = LabelStore(data_output_directory)
+    for path in label_store.export(labels):
+        print("Exported {}".format(path))
+    label_store.close()
+
+
+if __name__ == '__main__':
+
+    fire.Fire(export_labels_cli)
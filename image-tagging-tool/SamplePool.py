@@ -0,0 +1,84 @@
+import os
+import random
+import threading
+from typing import Iterable
+
+
+class SamplePool:
+    """Pool of the images left to be tagged, the paths are kept in an array and a dict maps each path to its slot in the array,
+            so an image is removed in O(1) by moving the last path into its slot and a random sample of `k` images is taken in
+            O(k) whatever the size of the dataset, the pool is shared by the requests of the server threads so its methods
+            are serialized by a lock.
+    """
+
+    def __init__(self, paths: Iterable[str], seed: int = None) -> None:
+        """
+        :param paths: The paths of the images relative to the dataset directory.
+        :type paths: Iterable[str]
+        :param seed: seed of the pseudo random generator of the samples, default is `None`
+        :type seed: int
+        """
+        self.paths = []
+        self.slots = {}
+        self.lock = threading.Lock()
+        for path in paths:
+            self.add(path)
+        self.random = random.Random(seed)
+        return
+
+    @staticmethod
+    def key(path: str) -> str:
+        """returns the normalized form of a path used as key of the pool, `./a.png` and `a.png` are the same image.
+        """
+        return os.path.normpath(path)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.paths)
+
+    def __contains__(self, path: str) -> bool:
+        with self.lock:
+            return SamplePool.key(path) in self.slots
+
+    def add(self, path: str) -> bool:
+        """adds an image to the pool.
+
+        :returns: `False` if the image is already in the pool.
+        :rtype: bool
+        """
+        path = SamplePool.key(path)
+        with self.lock:
+            if path in self.slots:
+                return False
+            self.slots[path] = len(self.paths)
+            self.paths.append(path)
+        return True
+
+    def remove(self, path: str) -> bool:
+        """removes an image from the pool, the last path of the array takes the slot of the removed path.
+
+        :returns: `False` if the image isn't in the pool.
+        :rtype: bool
+        """
+        with self.lock:
+            slot = self.slots.pop(SamplePool.key(path), None)
+            if slot is None:
+                return False
+            last_path = self.paths.pop()
+            if slot < len(self.paths):
+                self.paths[slot] = last_path
+                self.slots[last_path] = slot
+        return True
+
+    def sample(self, sample_size: int = 16) -> list[dict]:
+        """selects a random sample of the images in the pool without removing them.
+
+        :param sample_size: the size of the sample, the whole pool if it has less images, default is `16`
+        :type sample_size: int
+
+        :returns: list of dict each containing an only attribute called `url` contains the image path as its value.
+        :rtype: list[dict]
+        """
+        with self.lock:
+            sample = self.random.sample(self.paths, min(sample_size, len(self.paths)))
+        return [{'url': path} for path in sample]
@@ -6,6 +6,7 @@ from PIL import Image
 import datetime
 import mimetypes
 from fast_autocomplete import AutoComplete
+from DirectoryScanner import DirectoryScanner
 
 
 mimetypes.init()
@@ -215,7 +216,7 @@ class Utils:
         :returns: list of dict each containing an only attribute called `url` contains the image path as its value. 
         :rtype: str
         """
-        return [{'url': os.path.join(os.path.relpath(root, directory), file)} for root , dirs , files in os.walk(directory) for file in files if Utils.__is_image(file)]
+        return [{'url': os.path.join(os.path.relpath(os.path.dirname(entry.path), directory), entry.name)} for entry in DirectoryScanner().scan(directory) if Utils.__is_image(entry.name)]
     
     @staticmethod
     def compute_hash(object: bytes, hashing_type: str) -> str: 
@@ -0,0 +1,250 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+
+class DirectoryScanner:
+    """Lists the files of a directory with `os.scandir`, the subdirectories are scanned concurrently by a pool of threads and
+            the files are yielded lazily in chunks while the scan is still running, each yielded `os.DirEntry` caches its stat data.
+
+        by default the files are yielded in the order they are found, in `sort` mode the order is deterministic, the files of each
+            directory are sorted by name and the directories are visited in the same (top-down) order of a sorted `os.walk`.
+    """
+
+    #marks the end of the scan in the chunks queue.
+    __DONE = object()
+
+    def __init__(self, num_workers: int = 8, chunk_size: int = 1024, max_queued_chunks: int = 64) -> None:
+        """
+        :param num_workers: Number of threads scanning the directories at the same time, default is `8`
+        :type num_workers: int
+        :param chunk_size: max number of entries in each yielded chunk, default is `1024`
+        :type chunk_size: int
+        :param max_queued_chunks: max number of chunks scanned ahead of the consumer, bounds the memory of the scan, default is `64`
+        :type max_queued_chunks: int
+        """
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
+        self.max_queued_chunks = max_queued_chunks
+        return
+
+    @staticmethod
+    def __normalize_extensions(extensions: list[str]) -> set:
+        """normalizes a list of extensions to lower case extensions starting with a dot, i.e. `PNG` and `.png` are both `.png`
+        :param extensions: list of extensions or `None`
+        :type extensions: list[str]
+        :returns: set of the normalized extensions or `None` if `extensions` is `None`
+        :rtype: set
+        """
+        if extensions is None:
+            return None
+        #fire parses a single value as a string instead of a list.
+        if isinstance(extensions, str):
+            extensions = [extensions]
+        return {extension.lower() if extension.startswith('.') else '.' + extension.lower() for extension in extensions}
+
+    @staticmethod
+    def __is_selected(entry: os.DirEntry, extensions: set) -> bool:
+        """checks if a file entry should be yielded given the allowed extensions.
+        :param entry: The file entry.
+        :type entry: os.DirEntry
+        :param extensions: set of the normalized allowed extensions, `None` allows all files.
+        :type extensions: set
+        :returns: `True` if the entry should be yielded.
+        :rtype: bool
+        """
+        return extensions is None or os.path.splitext(entry.name)[1].lower() in extensions
+
+    @staticmethod
+    def __list_directory(directory: str, extensions: set, with_stat: bool) -> tuple:
+        """lists a single directory, used by the `sort` mode.
+        :param directory: The directory to list.
+        :type directory: str
+        :param extensions: set of the normalized allowed extensions, `None` allows all files.
+        :type extensions: set
+        :param with_stat: if `True` the stat data of each file is fetched and cached in its entry.
+        :type with_stat: bool
+        :returns: tuple of the file entries and the subdirectory paths both sorted by name.
+        :rtype: tuple(list[os.DirEntry], list[str])
+        """
+        files = []
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        is_directory = entry.is_dir()
+                    except OSError:
+                        is_directory = False
+
+                    #same as `os.walk`, symbolic links to directories are neither listed nor followed.
+                    if is_directory:
+                        if not entry.is_symlink():
+                            subdirectories.append(entry)
+                    elif DirectoryScanner.__is_selected(entry, extensions):
+                        if with_stat:
+                            DirectoryScanner.__fetch_stat(entry)
+                        files.append(entry)
+        except OSError:
+            #same as `os.walk`, directories that can't be listed are skipped.
+            pass
+
+        files.sort(key = lambda entry: entry.name)
+        subdirectories.sort(key = lambda entry: entry.name)
+        return files, [entry.path for entry in subdirectories]
+
+    @staticmethod
+    def __fetch_stat(entry: os.DirEntry) -> None:
+        """fetches the stat data of the entry so it's cached, files that disappeared are ignored.
+        :param entry: The file entry.
+        :type entry: os.DirEntry
+        :returns: None
+        :rtype: None
+        """
+        try:
+            entry.stat()
+        except OSError:
+            pass
+
+    def __scan_sorted(self, directory: str, recursive: bool, extensions: set, with_stat: bool) -> Iterator[list[os.DirEntry]]:
+        """yields the chunks of files in a deterministic order, the next directories to visit are listed ahead concurrently, at
+                most `num_workers` listings are done ahead of the consumer so the scan doesn't run through the whole tree.
+        """
+        with ThreadPoolExecutor(max_workers = self.num_workers) as thread_pool:
+            #the directories to visit as paths or as the futures of their listings, the next directory is on top of the stack.
+            stack = [directory]
+            #number of listings submitted and not yet consumed.
+            in_flight = 0
+
+            while len(stack) > 0:
+                #the directories on top of the stack are listed ahead, the top one is always listed.
+                for position in range(len(stack) - 1, max(len(stack) - 1 - self.num_workers, -1), -1):
+                    if in_flight >= self.num_workers and position < len(stack) - 1:
+                        break
+                    if isinstance(stack[position], str):
+                        stack[position] = thread_pool.submit(DirectoryScanner.__list_directory, stack[position], extensions, with_stat)
+                        in_flight += 1
+
+                files, subdirectories = stack.pop().result()
+                in_flight -= 1
+
+                if recursive:
+                    #reversed so the first subdirectory is on top of the stack.
+                    stack.extend(reversed(subdirectories))
+
+                for start in range(0, len(files), self.chunk_size):
+                    yield files[start: start + self.chunk_size]
+
+    def __scan_unordered(self, directory: str, recursive: bool, extensions: set, with_stat: bool) -> Iterator[list[os.DirEntry]]:
+        """yields the chunks of files as soon as they are found by the scanning threads.
+        """
+        chunks = queue.Queue(maxsize = self.max_queued_chunks)
+        stop = threading.Event()
+        #number of directories submitted and not yet completely scanned.
+        pending = [0]
+        pending_lock = threading.Lock()
+        thread_pool = ThreadPoolExecutor(max_workers = self.num_workers)
+
+        def put(item) -> bool:
+            #block while the queue is full unless the consumer stopped.
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout = 0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def submit(path: str) -> None:
+            with pending_lock:
+                pending[0] += 1
+            thread_pool.submit(scan_directory, path)
+
+        def scan_directory(path: str) -> None:
+            try:
+                chunk = []
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if stop.is_set():
+                            return
+                        try:
+                            is_directory = entry.is_dir()
+                        except OSError:
+                            is_directory = False
+
+                        #same as `os.walk`, symbolic links to directories are neither listed nor followed.
+                        if is_directory:
+                            if recursive and not entry.is_symlink():
+                                submit(entry.path)
+                        elif DirectoryScanner.__is_selected(entry, extensions):
+                            if with_stat:
+                                DirectoryScanner.__fetch_stat(entry)
+                            chunk.append(entry)
+                            if len(chunk) == self.chunk_size:
+                                if not put(chunk):
+                                    return
+                                chunk = []
+                if len(chunk) > 0:
+                    put(chunk)
+            except OSError:
+                #same as `os.walk`, directories that can't be listed are skipped.
+                pass
+            finally:
+                with pending_lock:
+                    pending[0] -= 1
+                    finished = pending[0] == 0
+                if finished:
+                    put(DirectoryScanner.__DONE)
+
+        try:
+            submit(directory)
+            while True:
+                chunk = chunks.get()
+                if chunk is DirectoryScanner.__DONE:
+                    break
+                yield chunk
+        finally:
+            #stops the scanning threads if the consumer stopped before the end of the scan.
+            stop.set()
+            thread_pool.shutdown(wait = False, cancel_futures = True)
+
+    def scan_chunks(self, directory: str, recursive: bool = True, extensions: list[str] = None, sort: bool = False, with_stat: bool = False) -> Iterator[list[os.DirEntry]]:
+        """yields the files inside a directory (and its subdirectories if `recursive` is `True`) in chunks, all the entries of
+                a chunk are from the same directory.
+        :param directory: The directory to scan.
+        :type directory: str
+        :param recursive: If it's set to `True` the files of all the subdirectories are yielded as well, default is `True`
+        :type recursive: bool
+        :param extensions: list of the allowed file extensions (case insensitive), if `None` all files are yielded, default is `None`
+        :type extensions: list[str]
+        :param sort: If `True` the files are yielded in a deterministic sorted order, otherwise in the order they are found, default is `False`
+        :type sort: bool
+        :param with_stat: If `True` the stat data of the files is fetched by the scanning threads and cached in the entries, default is `False`
+        :type with_stat: bool
+        :returns: generator of chunks of file entries.
+        :rtype: Iterator[list[os.DirEntry]]
+        """
+        extensions = DirectoryScanner.__normalize_extensions(extensions)
+
+        if sort:
+            return self.__scan_sorted(directory, recursive, extensions, with_stat)
+        return self.__scan_unordered(directory, recursive, extensions, with_stat)
+
+    def scan(self, directory: str, recursive: bool = True, extensions: list[str] = None, sort: bool = False, with_stat: bool = False) -> Iterator[os.DirEntry]:
+        """yields the file entries inside a directory (and its subdirectories if `recursive` is `True`), check `scan_chunks` for the parameters.
+        :returns: generator of file entries.
+        :rtype: Iterator[os.DirEntry]
+        """
+        for chunk in self.scan_chunks(directory, recursive, extensions, sort, with_stat):
+            yield from chunk
+
+    def files(self, directory: str, recursive: bool = True, extensions: list[str] = None, sort: bool = False) -> Iterator[str]:
+        """yields the file paths inside a directory (and its subdirectories if `recursive` is `True`), check `scan_chunks` for the parameters.
+        :returns: generator of file paths.
+        :rtype: Iterator[str]
+        """
+        for chunk in self.scan_chunks(directory, recursive, extensions, sort):
+            for entry in chunk:
+                yield entry.path
@@ -0,0 +1,160 @@
+import hashlib
+from typing import Iterator
+import numpy as np
+from PIL import Image
+
+
+class UniqueColorsCounter:
+    """Counts the unique colors (unique pixel values across all channels) of an image given its pixels in bands of rows,
+            the memory is bounded by a presence table (8-bit images up to 3 channels) or by the number of unique colors.
+    """
+
+    #images with less pixels than this count their colors by sorting, larger ones use a presence table.
+    PRESENCE_TABLE_MIN_PIXELS = 1 << 16
+
+    def __init__(self, total_pixels: int = None) -> None:
+        """
+        :param total_pixels: number of pixels of the whole image used to choose between the presence table and sorting,
+                if `None` the presence table is used when possible, default is `None`
+        :type total_pixels: int
+        """
+        self.total_pixels = total_pixels
+        self.__presence = None
+        self.__unique = None
+        return
+
+    @staticmethod
+    def __pack(band_array: np.ndarray, channels: int) -> np.ndarray:
+        """packs the 8-bit channels of each pixel into a single integer code.
+        """
+        if channels == 1:
+            return band_array.reshape(-1)
+        codes = band_array.reshape(-1, channels).astype(np.uint32)
+        packed = codes[:, 0].copy()
+        for channel in range(1, channels):
+            packed <<= 8
+            packed |= codes[:, channel]
+        return packed
+
+    def update(self, band_array: np.ndarray) -> None:
+        """adds the pixels of a band to the counter.
+
+        :param band_array: The decoded band of shape `(rows, width)` or `(rows, width, channels)`
+        :type band_array: ndarray
+        """
+        channels = band_array.shape[2] if band_array.ndim > 2 else 1
+
+        if band_array.dtype == np.uint8 and channels <= 4:
+            codes = UniqueColorsCounter.__pack(band_array, channels)
+
+            #up to 3 channels the codes fit in a presence table of at most 2^24 entries.
+            if channels <= 3 and (self.total_pixels is None or self.total_pixels >= UniqueColorsCounter.PRESENCE_TABLE_MIN_PIXELS):
+                if self.__presence is None:
+                    self.__presence = np.zeros(1 << (8 * channels), dtype = bool)
+                self.__presence[codes] = True
+                return
+
+            band_unique = np.unique(codes)
+        else:
+            #other pixel types (16/32-bit and float images) keep the unique rows.
+            band_unique = np.unique(band_array.reshape(-1, channels), axis = 0)
+
+        self.__unique = band_unique if self.__unique is None else np.unique(np.concatenate([self.__unique, band_unique]), axis = 0)
+        return
+
+    def count(self) -> int:
+        """returns the number of unique colors of all the added bands.
+
+        :returns: The number of unique colors.
+        :rtype: int
+        """
+        if self.__presence is not None:
+            return int(np.count_nonzero(self.__presence))
+        if self.__unique is not None:
+            return int(self.__unique.shape[0])
+        return 0
+
+
+class ImageStrips:
+    """Processes a decoded image in bands of rows so the memory used on top of the decoded image is bounded by the band size
+            instead of full copies of its buffer, the blake2b digest of the bands is identical to the digest of `image.tobytes()`
+            since the raw bytes of an image are the concatenation of its rows.
+    """
+
+    #number of pixels in each band, 4M pixels are 12 MB of an RGB image.
+    BAND_PIXELS = 1 << 22
+
+    @staticmethod
+    def iter_bands(image: Image.Image, band_pixels: int = None) -> Iterator[Image.Image]:
+        """decodes the image (if it's not decoded yet) and yields it in bands of full rows from top to bottom.
+
+        :param image: The image.
+        :type image: PIL.Image.Image
+        :param band_pixels: max number of pixels in each band, default is `None` for `BAND_PIXELS`
+        :type band_pixels: int
+
+        :returns: generator of the bands as images.
+        :rtype: Iterator[PIL.Image.Image]
+        """
+        image.load()
+        width, height = image.size
+        band_rows = max(1, (band_pixels or ImageStrips.BAND_PIXELS) // max(width, 1))
+
+        #small images are a single band without a copy.
+        if band_rows >= height:
+            yield image
+            return
+
+        for top in range(0, height, band_rows):
+            yield image.crop((0, top, width, min(top + band_rows, height)))
+
+    @staticmethod
+    def band_bytes(band: Image.Image, band_array: np.ndarray = None) -> bytes:
+        """returns the raw bytes of a band, the decoded buffer is reused if it's given.
+
+        :param band: The band.
+        :type band: PIL.Image.Image
+        :param band_array: The decoded buffer of the band or `None`
+        :type band_array: ndarray
+
+        :returns: the same bytes of `band.tobytes()`
+        :rtype: bytes
+        """
+        #bilevel images are unpacked to one byte per pixel in the buffer, so their packed bytes are used.
+        if band_array is None or band.mode == '1':
+            return band.tobytes()
+        return band_array
+
+    @staticmethod
+    def blake2b(image: Image.Image, band_pixels: int = None) -> str:
+        """computes the blake2b of the raw bytes of an image band by band.
+
+        :param image: The image.
+        :type image: PIL.Image.Image
+        :param band_pixels: max number of pixels in each band, default is `None` for `BAND_PIXELS`
+        :type band_pixels: int
+
+        :returns: the same hexadecimal digest of `hashlib.blake2b(image.tobytes())`
+        :rtype: str
+        """
+        digest = hashlib.blake2b()
+        for band in ImageStrips.iter_bands(image, band_pixels):
+            digest.update(band.tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def count_unique_colors(image: Image.Image, band_pixels: int = None) -> int:
+        """counts the unique colors of an image band by band.
+
+        :param image: The image.
+        :type image: PIL.Image.Image
+        :param band_pixels: max number of pixels in each band, default is `None` for `BAND_PIXELS`
+        :type band_pixels: int
+
+        :returns: The number of unique colors in the given image.
+        :rtype: int
+        """
+        counter = UniqueColorsCounter(image.size[0] * image.size[1])
+        for band in ImageStrips.iter_bands(image, band_pixels):
+            counter.update(np.asarray(band))
+        return counter.count()
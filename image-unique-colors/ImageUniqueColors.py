@@ -3,7 +3,8 @@ import fire
 import os 
 import multiprocessing
 from pathos.multiprocessing import ProcessingPool
-import numpy as np
+from DirectoryScanner import DirectoryScanner
+from ImageStrips import ImageStrips
 
 class ImageUniqueColors:
     
@@ -23,14 +24,11 @@ class ImageUniqueColors:
         :rtype: list[str]
 
         """
-        if recursive: 
-            return [os.path.join(root , file) for root , dirs , files in os.walk(images_directory) for file in files]
-        else: 
-            return [os.path.join(images_directory, file) for file in os.listdir(images_directory)] 
+        return list(DirectoryScanner().files(images_directory, recursive))
     
     @staticmethod
     def __count_unique_colors(image: Image.Image) -> int: 
-        """counts unique RGB colors within a given image. 
+        """counts unique RGB colors within a given image, the image is processed in bands of rows so only a band is copied at a time. 
         
         :param image: image to compute the number of unique colors for. 
         :type image: PIL.Image.Image
@@ -38,8 +36,7 @@ class ImageUniqueColors:
         :returns: The number of unique colors in the given image. 
         :rtype: int
         """
-        image_array = np.array(image)
-        return np.unique(image_array.reshape(-1, image_array.shape[-1] if image_array.ndim > 2 else 1), axis=0, return_counts=True)[1].size
+        return ImageStrips.count_unique_colors(image)
     
     @staticmethod
     def __process_image(image_path: str, color_count_width: int, separator: str) -> None: 
@@ -0,0 +1,67 @@
+import filecmp
+import glob
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-patch-extractor'))
+from DirectoryScanner import DirectoryScanner
+
+
+def make_tree(root):
+    for directory in ['a', 'a/b', 'c']:
+        os.makedirs(os.path.join(root, directory), exist_ok = True)
+        for index in range(5):
+            open(os.path.join(root, directory, 'image_{}.png'.format(index)), 'w').close()
+        open(os.path.join(root, directory, 'notes.TXT'), 'w').close()
+    open(os.path.join(root, 'top.JPG'), 'w').close()
+
+
+def walk_sorted(root):
+    paths = []
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        paths.extend(os.path.join(directory, file) for file in sorted(files))
+    return paths
+
+
+def test_sorted_scan_matches_sorted_walk(tmp_path):
+    make_tree(str(tmp_path))
+    assert list(DirectoryScanner(chunk_size = 2).files(str(tmp_path), sort = True)) == walk_sorted(str(tmp_path))
+
+
+def test_unordered_scan_with_filters(tmp_path):
+    make_tree(str(tmp_path))
+    scanner = DirectoryScanner(chunk_size = 2, max_queued_chunks = 1)
+    assert sorted(scanner.files(str(tmp_path))) == sorted(walk_sorted(str(tmp_path)))
+    assert len(list(scanner.files(str(tmp_path), extensions = ['png', '.jpg']))) == 16
+    assert list(scanner.files(str(tmp_path), recursive = False)) == [os.path.join(str(tmp_path), 'top.JPG')]
+
+
+def test_all_tools_share_the_same_scanner():
+    copies = glob.glob(os.path.join(os.getcwd(), '*', 'DirectoryScanner.py'))
+    assert len(copies) > 1
+    assert all(filecmp.cmp(copies[0], copy, shallow = False) for copy in copies[1:])
+
+
+def test_sorted_scan_lists_a_bounded_number_of_directories_ahead(tmp_path, monkeypatch):
+    for index in range(40):
+        os.makedirs(os.path.join(str(tmp_path), 'd{:02d}'.format(index), 'nested'))
+        open(os.path.join(str(tmp_path), 'd{:02d}'.format(index), 'nested', 'image.png'), 'w').close()
+        open(os.path.join(str(tmp_path), 'd{:02d}'.format(index), 'image.png'), 'w').close()
+
+    listed = []
+    list_directory = DirectoryScanner._DirectoryScanner__list_directory
+    def counting_list_directory(directory, extensions, with_stat):
+        listed.append(directory)
+        return list_directory(directory, extensions, with_stat)
+    monkeypatch.setattr(DirectoryScanner, '_DirectoryScanner__list_directory', staticmethod(counting_list_directory))
+
+    chunks = DirectoryScanner(num_workers = 3).scan_chunks(str(tmp_path), sort = True)
+    consumed = []
+    for chunk in chunks:
+        consumed.extend(entry.path for entry in chunk)
+        time.sleep(0.005)
+        #the root, the consumed directories and at most `num_workers` directories listed ahead.
+        assert len(listed) <= 1 + len(consumed) + 3 + 1
+    assert consumed == walk_sorted(str(tmp_path))
+    assert len(listed) == 81
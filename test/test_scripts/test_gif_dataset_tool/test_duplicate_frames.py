@@ -0,0 +1,73 @@
+import io
+import os
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'gif-dataset-tool'))
+from GifDatasetTool import GIFDatasetTools
+from FrameStack import FrameStack
+import numpy as np
+from PIL import Image
+
+
+def frame_gif(pixels):
+    """returns a single frame GIF of the palette indices with a grey palette.
+    """
+    frame = Image.fromarray(pixels, mode = 'P')
+    frame.putpalette([value for value in range(256) for _ in range(3)])
+    gif = io.BytesIO()
+    frame.save(gif, format = 'GIF', duration = 40, optimize = False)
+    return gif.getvalue()
+
+
+def write_gif(gif_path, frames):
+    """writes a GIF of the given frames, the frame blocks are concatenated because Pillow merges identical consecutive frames.
+    """
+    gifs = [frame_gif(pixels) for pixels in frames]
+    #the frame block starts after the header, the logical screen descriptor and the global color table.
+    block_start = 13 + 3 * 2 ** ((gifs[0][10] & 7) + 1)
+    assert all(gif[block_start] == 0x21 and gif[:block_start] == gifs[0][:block_start] for gif in gifs)
+    with open(gif_path, 'wb') as gif_file:
+        gif_file.write(gifs[0][:block_start] + b''.join(gif[block_start:-1] for gif in gifs) + b';')
+
+
+def test_duplicate_frames_are_skipped(tmp_path):
+    random = np.random.default_rng(2)
+    first = random.integers(0, 200, (16, 16), dtype = np.uint8)
+    #differs from the first frame in a single pixel.
+    near_first = first.copy()
+    near_first[3, 4] += 10
+    other = random.integers(0, 200, (16, 16), dtype = np.uint8)
+    gif_path = str(tmp_path / 'animation.gif')
+    write_gif(gif_path, [first, first, near_first, other, other])
+    assert GIFDatasetTools.get_number_of_frames(gif_path) == 5
+
+    for duplicate_threshold, expected_frames, expected_skipped in [(None, [0, 1, 2, 3, 4], None), (0, [0, 2, 3], 2), (1, [0, 3], 3)]:
+        output_directory = tmp_path / 'frames-{}'.format(duplicate_threshold)
+        output_directory.mkdir()
+        metadata = GIFDatasetTools.extract_gif_frames(gif_path, str(output_directory), duplicate_threshold = duplicate_threshold)
+
+        assert metadata['number_of_frames'] == 5
+        assert metadata.get('skipped_frames') == expected_skipped
+        assert sorted(os.listdir(output_directory)) == ['animation_frame_no_{:05d}.png'.format(frame_index) for frame_index in expected_frames]
+        for frame_index in expected_frames:
+            assert np.array_equal(np.asarray(Image.open(output_directory / 'animation_frame_no_{:05d}.png'.format(frame_index)).convert('L')),
+                                  [first, first, near_first, other, other][frame_index])
+
+    assert GIFDatasetTools.frames_difference(first, first, 0) == 0.0
+    assert GIFDatasetTools.frames_difference(first, near_first, 0) == float('inf')
+    assert 0 < GIFDatasetTools.frames_difference(first, near_first, 1) <= 1
+
+
+def test_packed_durations_include_the_skipped_frames(tmp_path):
+    random = np.random.default_rng(3)
+    first = random.integers(0, 200, (8, 8), dtype = np.uint8)
+    other = random.integers(0, 200, (8, 8), dtype = np.uint8)
+    gif_path = str(tmp_path / 'animation.gif')
+    write_gif(gif_path, [first, first, first, first, other, first, first])
+
+    for duplicate_threshold, expected_indices, expected_durations in [(None, list(range(7)), [40] * 7), (0, [0, 4, 5], [160, 40, 80])]:
+        output_directory = tmp_path / 'frames-{}'.format(duplicate_threshold)
+        output_directory.mkdir()
+        metadata = GIFDatasetTools.extract_gif_frames(gif_path, str(output_directory), duplicate_threshold = duplicate_threshold, frames_format = 'npy')
+        _, index = FrameStack.load(str(output_directory / metadata['frames_index']))
+        assert index['frame_indices'] == expected_indices and index['frame_durations'] == expected_durations
+        assert sum(index['frame_durations']) == metadata['duration'] == 280
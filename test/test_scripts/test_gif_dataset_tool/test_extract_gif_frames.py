@@ -0,0 +1,108 @@
+import hashlib
+import io
+import os
+import re
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'gif-dataset-tool'))
+from GifDatasetTool import GIFDatasetTools
+from FrameStack import FrameStack
+import numpy as np
+import pytest
+from PIL import GifImagePlugin, Image
+
+
+def write_gif(gif_path, number_of_frames = 12):
+    random = np.random.default_rng(5)
+    frames = [Image.fromarray(random.integers(0, 256, (10, 14, 3), dtype = np.uint8)).quantize(32) for _ in range(number_of_frames)]
+    frames[0].save(gif_path, save_all = True, append_images = frames[1:], duration = [10 * (index + 1) for index in range(number_of_frames)], loop = 0)
+
+
+def extracted_frames(folder_path):
+    """returns the PNG bytes of the extracted frames by their frame index.
+    """
+    frames = {}
+    for file_name in os.listdir(folder_path):
+        match = re.fullmatch(r'animation_frame_no_(\d{5})\.png', file_name)
+        assert match is not None
+        with open(os.path.join(folder_path, file_name), 'rb') as frame_file:
+            frames[int(match.group(1))] = frame_file.read()
+    return frames
+
+
+def random_access_frame(gif_path, frame_index):
+    """returns the PNG bytes of a frame extracted by seeking to it.
+    """
+    gif_image = Image.open(gif_path)
+    gif_image.seek(frame_index)
+    png = io.BytesIO()
+    gif_image.copy().save(png, format = 'PNG')
+    return png.getvalue()
+
+
+def test_extracted_frames_match_random_access_frames(tmp_path):
+    gif_path = str(tmp_path / 'animation.gif')
+    write_gif(gif_path)
+
+    for limit, expected_count in [(0, 12), (5, 5), (20, 12)]:
+        output_directory = tmp_path / 'frames-{}'.format(limit)
+        output_directory.mkdir()
+        np.random.seed(limit)
+        GIFDatasetTools.extract_gif_frames(gif_path, str(output_directory), limit)
+
+        frames = extracted_frames(str(output_directory))
+        assert len(frames) == expected_count and all(0 <= frame_index < 12 for frame_index in frames)
+        for frame_index, png_bytes in frames.items():
+            assert png_bytes == random_access_frame(gif_path, frame_index)
+
+
+def multi_pass_metadata(gif_path):
+    """returns the number of frames, the durations and the digests computed by seeking to each frame.
+    """
+    gif_image = Image.open(gif_path)
+    number_of_frames = gif_image.n_frames
+    durations = []
+    animation_digest = hashlib.sha256()
+    for frame_index in range(number_of_frames):
+        gif_image.seek(frame_index)
+        durations.append(gif_image.info.get('duration', 0))
+        animation_digest.update(gif_image.tobytes())
+    return number_of_frames, durations, GIFDatasetTools.image_sha256(Image.open(gif_path)), animation_digest.hexdigest()
+
+
+def test_single_pass_matches_multi_pass_extraction(tmp_path, monkeypatch):
+    gif_path = str(tmp_path / 'animation.gif')
+    write_gif(gif_path, 40)
+    number_of_frames, durations, sha256, animation_sha256 = multi_pass_metadata(gif_path)
+
+    #the single pass doesn't count the frames ahead.
+    monkeypatch.setattr(GifImagePlugin.GifImageFile, 'n_frames', property(lambda self: pytest.fail('n_frames was called')))
+    metadata = GIFDatasetTools.gif_metadata(gif_path)
+    assert (metadata['number_of_frames'], metadata['frame_durations'], metadata['sha256'], metadata['animation_sha256']) == (number_of_frames, durations, sha256, animation_sha256)
+    assert metadata['duration'] == sum(durations)
+
+    #the frames sampled in memory and the frames decoded again in a second pass are the same.
+    extracted = []
+    for max_sampled_bytes in [GIFDatasetTools.MAX_SAMPLED_BYTES, 0]:
+        monkeypatch.setattr(GIFDatasetTools, 'MAX_SAMPLED_BYTES', max_sampled_bytes)
+        output_directory = tmp_path / 'frames-{}'.format(max_sampled_bytes)
+        output_directory.mkdir()
+        np.random.seed(11)
+        assert GIFDatasetTools.extract_gif_frames(gif_path, str(output_directory), 6) == metadata
+        extracted.append(extracted_frames(str(output_directory)))
+    assert len(extracted[0]) == 6 and extracted[0] == extracted[1]
+    assert all(png_bytes == random_access_frame(gif_path, frame_index) for frame_index, png_bytes in extracted[0].items())
+
+    #the packed frames grow past the frames reserved at first.
+    for frames_format in FrameStack.FORMATS:
+        output_directory = tmp_path / frames_format
+        output_directory.mkdir()
+        metadata = GIFDatasetTools.extract_gif_frames(gif_path, str(output_directory), 0, frames_format = frames_format)
+        stack, index = FrameStack.load(str(output_directory / metadata['frames_index']))
+        assert stack.shape[0] == index['number_of_frames'] == number_of_frames and index['frame_indices'] == list(range(number_of_frames))
+        if frames_format == 'palette':
+            #the frames have more than 256 colors in total so the palette frames are mapped to their nearest colors.
+            continue
+        gif_image = Image.open(gif_path)
+        for frame_index in range(number_of_frames):
+            gif_image.seek(frame_index)
+            assert np.array_equal(stack[frame_index], np.asarray(gif_image.convert('RGB')))
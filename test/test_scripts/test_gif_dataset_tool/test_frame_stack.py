@@ -0,0 +1,31 @@
+import os
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'gif-dataset-tool'))
+from GifDatasetTool import GIFDatasetTools
+from FrameStack import FrameStack
+import numpy as np
+from PIL import Image, ImageSequence
+
+
+def test_packed_frames_match_the_decoded_frames(tmp_path):
+    random = np.random.default_rng(0)
+    #each frame is quantized on its own so the frames have local palettes.
+    frames = [Image.fromarray(random.integers(0, 256, (12, 16, 3), dtype = np.uint8)).quantize(16) for _ in range(7)]
+    gif_path = str(tmp_path / 'animation.gif')
+    frames[0].save(gif_path, save_all = True, append_images = frames[1:], duration = [20, 30, 40, 50, 60, 70, 80], loop = 0)
+    decoded = [np.asarray(frame.convert('RGB')) for frame in ImageSequence.Iterator(Image.open(gif_path))]
+
+    for frames_format in FrameStack.FORMATS:
+        for limit in [0, 3]:
+            output_directory = tmp_path / '{}-{}'.format(frames_format, limit)
+            output_directory.mkdir()
+            metadata = GIFDatasetTools.extract_gif_frames(gif_path, str(output_directory), limit, frames_format = frames_format)
+            stack, index = FrameStack.load(str(output_directory / metadata['frames_index']))
+
+            assert len(os.listdir(output_directory)) == 2
+            assert stack.shape[0] == index['number_of_frames'] == (limit or 7)
+            assert index['frame_durations'] == [metadata['frame_durations'][frame_index] for frame_index in index['frame_indices']]
+            if frames_format == 'palette':
+                stack = np.array(index['palette'], dtype = np.uint8).reshape(-1, 3)[stack]
+            for position, frame_index in enumerate(index['frame_indices']):
+                assert np.array_equal(stack[position], decoded[frame_index])
@@ -0,0 +1,17 @@
+import json
+import os
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'gif-dataset-tool'))
+from GifDatasetTool import GIFDatasetTools
+
+
+def test_partial_last_line_is_dropped(tmp_path):
+    log_path = str(tmp_path / 'images_metadata.jsonl')
+    with open(log_path, 'w') as log_file:
+        log_file.write(json.dumps({'original_file_name': 'a.gif'}) + '\n' + json.dumps({'original_file_name': 'b.gif'})[:10])
+
+    assert GIFDatasetTools.read_metadata_log(log_path) == [{'original_file_name': 'a.gif'}]
+    with open(log_path, 'a') as log_file:
+        log_file.write(json.dumps({'original_file_name': 'c.gif'}) + '\n')
+    assert [image_metadata['original_file_name'] for image_metadata in GIFDatasetTools.read_metadata_log(log_path)] == ['a.gif', 'c.gif']
+    assert GIFDatasetTools.read_metadata_log(str(tmp_path / 'missing.jsonl')) == []
@@ -0,0 +1,72 @@
+import json
+import os
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'gif-dataset-tool'))
+from GifDatasetTool import GIFDatasetTools, process_gif_dataset
+import numpy as np
+import pytest
+from PIL import Image
+
+
+OPTIONS = {'extract_frames': True, 'frames_limit': 0, 'duplicate_threshold': None, 'frames_format': 'png'}
+
+
+def write_gifs(folder_path):
+    random = np.random.default_rng(4)
+    (folder_path / 'nested').mkdir(parents = True)
+    for name, number_of_frames in [('a', 3), ('b', 2), ('nested/c', 4), ('d', 1)]:
+        frames = [Image.fromarray(random.integers(0, 256, (6, 8, 3), dtype = np.uint8)).quantize(8) for _ in range(number_of_frames)]
+        frames[0].save(folder_path / '{}.gif'.format(name), save_all = True, append_images = frames[1:], duration = 50, loop = 0)
+    (folder_path / 'broken.gif').write_bytes(b'GIF89a not really')
+
+
+def run(folder_path, output_folder_path, *options):
+    process_gif_dataset.main(['--folder_path', str(folder_path), '--output_folder_path', str(output_folder_path), '--num_processes', '2'] + list(options),
+                             standalone_mode = False)
+
+
+def test_resume_skips_logged_gifs(tmp_path):
+    folder_path = tmp_path / 'gifs'
+    output_folder_path = tmp_path / 'output'
+    write_gifs(folder_path)
+    output_folder_path.mkdir()
+
+    #an interrupted run that processed `b.gif`, a failed `d.gif` and a partially written last line.
+    logged_b = {'original_file_name': os.path.abspath(str(folder_path / 'b.gif')), 'file_size': 1, 'logged': True}
+    failed_d = {'original_file_name': os.path.abspath(str(folder_path / 'd.gif')), 'error': 'OSError: interrupted'}
+    with open(output_folder_path / 'images_metadata.jsonl', 'w') as log_file:
+        log_file.write(''.join(json.dumps(line) + '\n' for line in [{'options': OPTIONS}, logged_b, failed_d]) + '{"original_fi')
+
+    run(folder_path, output_folder_path)
+
+    files_paths = [os.path.abspath(file_path) for file_path in GIFDatasetTools().get_files_list(str(folder_path))]
+    with open(output_folder_path / 'images_metadata.json') as metadata_file:
+        images_metadata = json.load(metadata_file)
+    with open(output_folder_path / 'failed_images.json') as failed_file:
+        failed_metadata = json.load(failed_file)
+    assert not os.path.exists(output_folder_path / 'images_metadata.jsonl')
+
+    #the logged GIF is kept as logged and not extracted again, the failed GIF is processed again.
+    assert [image_metadata['original_file_name'] for image_metadata in images_metadata] == [path for path in files_paths if not path.endswith('broken.gif')]
+    assert images_metadata[[image_metadata['original_file_name'] for image_metadata in images_metadata].index(logged_b['original_file_name'])] == logged_b
+    assert [image_metadata['original_file_name'] for image_metadata in failed_metadata] == [os.path.abspath(str(folder_path / 'broken.gif'))]
+    extracted = sorted(os.listdir(output_folder_path))
+    assert not any(file_name.startswith('b_frame') for file_name in extracted)
+    assert len([file_name for file_name in extracted if file_name.endswith('.png')]) == 3 + 4 + 1
+    assert all(image_metadata['number_of_frames'] == {'a': 3, 'c': 4, 'd': 1}[os.path.basename(image_metadata['original_file_name'])[0]]
+               for image_metadata in images_metadata if 'logged' not in image_metadata)
+
+
+def test_log_of_other_options_is_not_resumed(tmp_path):
+    folder_path = tmp_path / 'gifs'
+    output_folder_path = tmp_path / 'output'
+    write_gifs(folder_path)
+    output_folder_path.mkdir()
+    with open(output_folder_path / 'images_metadata.jsonl', 'w') as log_file:
+        log_file.write(json.dumps({'options': dict(OPTIONS, frames_limit = 2)}) + '\n')
+
+    with pytest.raises(Exception, match = 'run again with the same options'):
+        run(folder_path, output_folder_path)
+    run(folder_path, output_folder_path, '--frames_limit', '2')
+    with open(output_folder_path / 'images_metadata.json') as metadata_file:
+        assert len(json.load(metadata_file)) == 4
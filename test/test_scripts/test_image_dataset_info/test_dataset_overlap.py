@@ -0,0 +1,39 @@
+import json
+import os
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-dataset-info'))
+import numpy as np
+from DatasetOverlap import DatasetOverlap
+
+
+def test_contains_with_duplicates_and_first_word_collisions():
+    generator = np.random.default_rng(3)
+    digests = generator.integers(0, 2 ** 63, size = (200, 2), dtype = np.uint64)
+    #digests sharing their first word with different second words.
+    digests[10:20, 0] = digests[5, 0]
+    #many copies of the same digest.
+    digests[100:180] = digests[50]
+    lookups = np.concatenate([digests[::3], generator.integers(0, 2 ** 63, size = (50, 2), dtype = np.uint64)])
+    lookups[-5:, 0] = digests[5, 0]
+
+    sorted_lookups, _ = DatasetOverlap.sort(lookups)
+    sorted_digests, _ = DatasetOverlap.sort(digests)
+    expected = [tuple(digest) in set(map(tuple, digests.tolist())) for digest in sorted_lookups.tolist()]
+    assert DatasetOverlap.contains(sorted_lookups, sorted_digests).tolist() == expected
+    assert sum(expected) == len(set(range(0, 200, 3)))
+
+
+def test_overlap_report_with_duplicates(tmp_path):
+    shared = ['{:016x}{:016x}'.format(index + 1, 7) + '0' * 96 for index in range(3)]
+    #same first 8 bytes as the shared hashes but different next 8 bytes.
+    collisions = [image_hash[:16] + 'f' * 16 + '0' * 96 for image_hash in shared]
+    records_a = [{'image_path': 'a{}'.format(index), 'image_blake2b_hash': image_hash} for index, image_hash in enumerate(shared * 40 + collisions[:1])]
+    records_b = [{'image_path': 'b{}'.format(index), 'image_blake2b_hash': image_hash} for index, image_hash in enumerate(shared[:2] * 30 + collisions[1:])]
+    for name, records in [('a.json', records_a), ('b.json', records_b)]:
+        with open(tmp_path / name, 'w') as metadata_file:
+            json.dump(records, metadata_file)
+
+    counts = DatasetOverlap().run(str(tmp_path / 'a.json'), str(tmp_path / 'b.json'), str(tmp_path / 'overlap'))
+    assert counts == {'a-only.txt': 41, 'b-only.txt': 2, 'a-in-b.txt': 80, 'b-in-a.txt': 60, 'shared_digests': 2}
+    with open(tmp_path / 'overlap' / 'a-only.txt') as list_file:
+        assert list_file.read().split() == ['a{}'.format(index) for index in range(2, 120, 3)] + ['a120']
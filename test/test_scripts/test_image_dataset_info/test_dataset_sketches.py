@@ -0,0 +1,76 @@
+import json
+import math
+import os
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-dataset-info'))
+from DatasetSketches import LogHistogram, ReservoirSampler, SampleEstimates
+from ImageDatasetInfo import ImageDatasetInfo
+import numpy as np
+
+
+def test_log_histogram_quantiles_are_bounded():
+    values = np.random.default_rng(2).lognormal(10, 2, 100000)
+    histogram = LogHistogram()
+    histogram.add(values[:50000])
+    other = LogHistogram()
+    other.add(values[50000:])
+    histogram.merge(other)
+    for q in [0.1, 0.5, 0.9, 0.99]:
+        quantile = histogram.quantile(q)
+        true_quantile = np.sort(values)[min(int(q * values.size), values.size - 1)]
+        assert quantile['lower'] <= true_quantile <= quantile['upper']
+        assert abs(quantile['estimate'] / true_quantile - 1) < 2 ** (1 / 16) - 1
+    assert LogHistogram().quantile(0.5) == {'estimate': None, 'lower': None, 'upper': None}
+
+
+def test_reservoir_sample_is_uniform():
+    inclusions = np.zeros(100)
+    for seed in range(3000):
+        sampler = ReservoirSampler(10, seed)
+        for item in range(100):
+            sampler.add(item)
+        assert len(set(sampler.sample)) == 10 and sampler.seen == 100
+        inclusions[sampler.sample] += 1
+    #each item is sampled with probability 0.1, 3000 * 0.1 = 300 times with a standard deviation of about 16.
+    assert np.all(np.abs(inclusions - 300) < 80)
+    assert ReservoirSampler(10, 0).sample == []
+
+
+def test_sample_estimates_cover_the_population():
+    random = np.random.default_rng(3)
+    population = random.exponential(100, 20000)
+    #50 distinct hashes with about 400 copies each.
+    hashes = random.integers(0, 50, 20000).astype(str)
+    _, counts = np.unique(hashes, return_counts = True)
+    true_pairs_fraction = np.sum(counts * (counts - 1) / 2) / (20000 * 19999 / 2)
+
+    covered = {'mean': 0, 'proportion': 0, 'quantile': 0, 'duplicates': 0}
+    for _ in range(100):
+        indices = random.choice(20000, 400, replace = False)
+        mean = SampleEstimates.mean(population[indices], 20000)
+        covered['mean'] += mean['lower'] <= population.mean() <= mean['upper']
+        proportion = SampleEstimates.proportion(int(np.sum(population[indices] > 150)), 400, 20000)
+        covered['proportion'] += proportion['lower'] <= np.mean(population > 150) <= proportion['upper']
+        quantile = SampleEstimates.quantile(population[indices], 0.9)
+        covered['quantile'] += quantile['lower'] <= np.quantile(population, 0.9) <= quantile['upper']
+        duplicates = SampleEstimates.duplicate_pairs(list(hashes[indices]), 20000, seed = 0)['fraction']
+        covered['duplicates'] += duplicates['lower'] <= true_pairs_fraction <= duplicates['upper']
+    #95% confidence intervals.
+    assert all(count >= 88 for count in covered.values()), covered
+
+    #the whole population is known exactly and an empty sample has no estimates.
+    exact = SampleEstimates.duplicate_pairs(list(hashes), 20000, seed = 0)['fraction']
+    assert exact['lower'] == exact['upper'] == exact['estimate'] and math.isclose(exact['estimate'], true_pairs_fraction)
+    assert SampleEstimates.mean([], 10) == SampleEstimates.proportion(0, 0, 10) == {'estimate': None, 'lower': None, 'upper': None}
+    assert SampleEstimates.duplicate_pairs([], 10)['fraction']['estimate'] is None
+
+
+def test_empty_sample_report_has_no_nan(tmp_path, monkeypatch):
+    (tmp_path / 'images').mkdir()
+    monkeypatch.chdir(tmp_path)
+    ImageDatasetInfo().sample_stats(str(tmp_path / 'images'), sample_size = 10, seed = 0)
+    def reject(constant):
+        raise ValueError(constant)
+    with open('dataset-sample-stats.json') as report_file:
+        report = json.load(report_file, parse_constant = reject)
+    assert report['files_count'] == 0 and report['duplicates']['fraction']['estimate'] is None
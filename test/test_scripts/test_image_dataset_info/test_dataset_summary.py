@@ -0,0 +1,23 @@
+import os
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-dataset-info'))
+from DatasetSummary import DatasetSummary
+
+
+def test_duplicates_are_counted_across_hash_chunks(monkeypatch):
+    monkeypatch.setattr(DatasetSummary, 'HASH_CHUNK_SIZE', 4)
+    summary = DatasetSummary()
+    #11 valid images of 6 distinct hashes, 3 of them found more than once, and a corrupted image.
+    hashes = ['{:016x}'.format(value) + '0' * 112 for value in [1, 2, 1, 3, 4, 2, 2, 5, 6, 5, 2 ** 64 - 1]]
+    for start in range(0, len(hashes), 3):
+        summary.add([(True, {'image_size_bytes': 10, 'image_blake2b_hash': image_hash}) for image_hash in hashes[start: start + 3]])
+    summary.add([(False, {'image_size_bytes': 5})])
+
+    assert summary.duplicates() == {'distinct_hashes': 7, 'duplicate_groups': 3, 'duplicate_images': 4}
+    assert summary.to_dict()['files_count'] == 12 and summary.to_dict()['total_size_bytes'] == 115
+
+    #the hashes are not in the records if they are not in the required fields.
+    no_hashes = DatasetSummary()
+    no_hashes.add([(True, {'image_size_bytes': 10})])
+    assert no_hashes.duplicates() is None
+    assert DatasetSummary().duplicates() == {'distinct_hashes': 0, 'duplicate_groups': 0, 'duplicate_images': 0}
@@ -0,0 +1,90 @@
+import json
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-dataset-info'))
+from ImageDatasetInfo import ImageDatasetInfo
+from ImageMetadataKernel import ImageMetadataKernel
+from ImageMetadataStore import ImageMetadataStore
+from PIL import Image
+
+
+def test_update_recomputes_only_added_and_changed_images(tmp_path, monkeypatch):
+    source_directory = tmp_path / 'images'
+    source_directory.mkdir()
+    for index in range(4):
+        Image.new('RGB', (8 + index, 8), (index * 50, 0, 0)).save(source_directory / '{}.png'.format(index))
+    (source_directory / 'corrupted.png').write_bytes(b'not an image')
+    monkeypatch.chdir(tmp_path)
+
+    computed = []
+    compute_chunk = ImageMetadataKernel.compute_chunk
+    def counting_compute_chunk(chunk, fields = None):
+        computed.extend(os.path.basename(image_path) for _, image_path in chunk)
+        return compute_chunk(chunk, fields)
+    monkeypatch.setattr(ImageMetadataKernel, 'compute_chunk', counting_compute_chunk)
+
+    def read_records():
+        records = {}
+        for file_name in ['valid-images-metadata.json', 'failed-images-metadata.json']:
+            with open(file_name) as metadata_file:
+                records.update((os.path.basename(record['image_path']), record) for record in json.load(metadata_file))
+        return records
+
+    ImageDatasetInfo().run(str(source_directory), 'json', num_workers = 2)
+    before = read_records()
+    assert sorted(computed) == ['0.png', '1.png', '2.png', '3.png', 'corrupted.png']
+
+    #change an image, add a new one and delete another one.
+    Image.new('RGB', (30, 20), (0, 255, 0)).save(source_directory / '1.png')
+    Image.new('RGB', (5, 5)).save(source_directory / 'new.png')
+    os.remove(source_directory / '2.png')
+
+    computed.clear()
+    ImageDatasetInfo().run(str(source_directory), 'json', num_workers = 2, update = True)
+    after = read_records()
+    assert sorted(computed) == ['1.png', 'new.png']
+    assert sorted(after) == ['0.png', '1.png', '3.png', 'corrupted.png', 'new.png']
+    assert all(after[name] == before[name] for name in ['0.png', '3.png', 'corrupted.png'])
+    assert after['1.png']['image_resolution'] == [30, 20] and after['1.png']['image_blake2b_hash'] != before['1.png']['image_blake2b_hash']
+    assert after['new.png']['image_resolution'] == [5, 5]
+
+
+def test_header_only_fields_skip_decoding(tmp_path, monkeypatch):
+    source_directory = tmp_path / 'images'
+    source_directory.mkdir()
+    for index in range(3):
+        Image.new('RGB', (10 + index, 6), (index * 80, 0, 0)).save(source_directory / '{}.png'.format(index))
+    monkeypatch.chdir(tmp_path)
+
+    loads = []
+    load = Image.Image.load
+    def counting_load(image):
+        loads.append(image)
+        return load(image)
+    monkeypatch.setattr(Image.Image, 'load', counting_load)
+
+    values, _ = ImageMetadataKernel.compute(str(source_directory / '0.png'), ['image_resolution', 'image_xsize', 'image_ysize', 'image_format'])
+    assert values == (None, 10, 6, None, 'PNG')
+    assert len(loads) == 0
+    values, _ = ImageMetadataKernel.compute(str(source_directory / '0.png'))
+    assert values[0] is not None and values[3] == 1
+    assert len(loads) > 0
+
+    loads.clear()
+    ImageDatasetInfo().run(str(source_directory), 'npy', num_workers = 2, fields = 'image_resolution')
+    assert len(loads) == 0
+
+    store = ImageMetadataStore('valid-images-metadata')
+    assert 'image_blake2b_hash' not in store.columns and 'unique_colors' not in store.columns
+    assert all('unique_colors' not in record and 'image_blake2b_hash' not in record for record in store.records())
+    assert sorted(tuple(record['image_resolution']) for record in store.records()) == [(10, 6), (11, 6), (12, 6)]
+    with pytest.raises(KeyError):
+        store.column('unique_colors')
+
+    with open('dataset-summary.json') as summary_file:
+        summary = json.load(summary_file)
+    assert summary['valid_count'] == 3
+    assert summary['duplicates'] is None
+    assert summary['columns']['unique_colors']['mean'] is None and summary['columns']['unique_colors']['percentiles']['p50']['estimate'] is None
+    assert summary['columns']['image_size_bytes']['mean'] is not None
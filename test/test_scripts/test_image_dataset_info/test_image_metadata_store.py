@@ -0,0 +1,28 @@
+import os
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-dataset-info'))
+from ImageMetadataStore import ImageMetadataStore
+
+
+def test_store_round_trip_and_queries(tmp_path):
+    records = [
+        {'image_path': './dataset/a.png', 'image_name': 'a', 'image_blake2b_hash': 'ab' * 64, 'image_size_bytes': 120,
+         'image_resolution': (2048, 10), 'image_xsize': 2048, 'image_ysize': 10, 'unique_colors': 300},
+        {'image_path': './dataset/ümlaut.png', 'image_name': 'ümlaut', 'image_blake2b_hash': '01' * 64, 'image_size_bytes': 80,
+         'image_resolution': (64, 64), 'image_xsize': 64, 'image_ysize': 64, 'unique_colors': 1000},
+        {'image_path': './dataset/c.png', 'image_name': 'c', 'image_blake2b_hash': 'ff' * 64, 'image_size_bytes': 200,
+         'image_resolution': (4096, 4096), 'image_xsize': 4096, 'image_ysize': 4096, 'unique_colors': 3},
+    ]
+    store_directory = str(tmp_path / "valid-images-metadata")
+    ImageMetadataStore.write(store_directory, records)
+
+    store = ImageMetadataStore(store_directory)
+    assert len(store) == 3
+    assert store.records() == records
+    assert store.column('image_blake2b_hash').shape == (3, 64)
+
+    indices = store.filter([('image_xsize', '>', 1024), ('unique_colors', '>', 256)])
+    assert indices.tolist() == [0]
+    assert store.strings('image_path', indices) == ['./dataset/a.png']
+    assert store.aggregate('image_size_bytes') == 400
+    assert store.aggregate('image_xsize', 'max', store.filter([('unique_colors', '<', 500)])) == 4096
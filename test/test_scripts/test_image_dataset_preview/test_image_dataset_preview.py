@@ -0,0 +1,39 @@
+import os
+import random
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-dataset-preview'))
+from ImageDatasetPreview import ImageDatasetPreview
+import numpy as np
+import pytest
+from PIL import Image
+
+
+def read_outputs(directory):
+    outputs = {}
+    for root, _, files in os.walk(directory):
+        for file_name in files:
+            with open(os.path.join(root, file_name), 'rb') as output_file:
+                outputs[os.path.relpath(os.path.join(root, file_name), directory)] = output_file.read()
+    return outputs
+
+
+@pytest.mark.parametrize('images_order_mode, pyramid', [('sorted', False), ('random', False), ('sorted', True), ('random', True)])
+def test_streamed_previews_match_the_listed_previews(tmp_path, images_order_mode, pyramid):
+    generator = np.random.default_rng(1)
+    source_directory = tmp_path / 'images'
+    source_directory.mkdir()
+    for index in range(45):
+        Image.fromarray(generator.integers(0, 256, (12, 10, 3), dtype = np.uint8)).save(source_directory / '{:03d}.png'.format(index))
+
+    outputs = []
+    for streaming in [False, True]:
+        output_directory = str(tmp_path / 'preview-{}'.format(streaming))
+        #the shuffle buffer holds the whole directory so the streamed shuffle draws the same order from the same seed.
+        random.seed(7)
+        ImageDatasetPreview().preview_image_dataset(str(source_directory), output_directory, image_size = (4, 4), matrix_size = (4, 3),
+                                                    images_order_mode = images_order_mode, num_workers = 2, pyramid = pyramid, tile_size = 8,
+                                                    streaming = streaming, shuffle_buffer_size = 64)
+        outputs.append(read_outputs(output_directory))
+
+    assert len(outputs[0]) >= 4
+    assert outputs[0] == outputs[1]
@@ -0,0 +1,26 @@
+import os
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-dataset-preview'))
+from PreviewGrid import PreviewGrid
+import numpy as np
+from PIL import Image
+
+
+def test_non_square_matrix_places_the_images_row_by_row(tmp_path):
+    images = []
+    for index in range(6):
+        images.append(str(tmp_path / '{}.png'.format(index)))
+        Image.new('RGB', (8, 8), (40 * (index + 1), index, 255 - index)).save(images[-1])
+
+    output_directory = tmp_path / 'preview'
+    output_directory.mkdir()
+    #2 images wide and 3 images high.
+    result = PreviewGrid.write(str(output_directory), images, 'RGB', image_size = (4, 4), matrix_size = (2, 3))
+    assert result['images'] == 6
+
+    canvas = np.asarray(Image.open(output_directory / (result['file_name'] + '.png')))
+    assert canvas.shape == (12, 8, 3)
+    for index in range(6):
+        row, column = index // 2, index % 2
+        cell = canvas[row * 4: row * 4 + 4, column * 4: column * 4 + 4]
+        assert (cell == [40 * (index + 1), index, 255 - index]).all()
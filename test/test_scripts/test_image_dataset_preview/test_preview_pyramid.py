@@ -0,0 +1,38 @@
+import math
+import os
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-dataset-preview'))
+from PreviewPyramid import PreviewPyramid
+import numpy as np
+from PIL import Image
+
+
+def test_levels_are_downsampled_from_the_level_below(tmp_path):
+    random = np.random.default_rng(0)
+    images = []
+    for index in range(23):
+        images.append(str(tmp_path / '{}.png'.format(index)))
+        Image.fromarray(random.integers(0, 256, (20, 30, 3), dtype = np.uint8)).save(images[-1])
+
+    output_directory = str(tmp_path / 'pyramid')
+    description = PreviewPyramid(output_directory, image_size = (8, 8), tile_size = 16, tile_format = 'png').build(images, num_workers = 2)
+    assert description['images'] == 23 and os.path.isfile(os.path.join(output_directory, 'preview.html'))
+
+    def stitch(level):
+        scale = 2 ** (description['maxLevel'] - level)
+        level_array = np.zeros((math.ceil(description['height'] / scale), math.ceil(description['width'] / scale), 3), dtype = np.uint8)
+        level_directory = os.path.join(output_directory, 'preview_files', str(level))
+        for file_name in os.listdir(level_directory):
+            column, row = [int(value) for value in os.path.splitext(file_name)[0].split('_')]
+            tile = np.asarray(Image.open(os.path.join(level_directory, file_name)))
+            level_array[row * 16: row * 16 + tile.shape[0], column * 16: column * 16 + tile.shape[1]] = tile
+        return level_array
+
+    below = stitch(description['maxLevel'])
+    #the 4th thumbnail is the bottom right cell of the first tile.
+    assert np.array_equal(below[8:16, 8:16], np.asarray(Image.open(images[3]).resize((8, 8), reducing_gap = 2.0)))
+    for level in range(description['maxLevel'] - 1, -1, -1):
+        level_array = stitch(level)
+        assert np.array_equal(level_array, np.asarray(Image.fromarray(below).reduce(2)))
+        below = level_array
+    assert below.shape[:2] == (1, 1)
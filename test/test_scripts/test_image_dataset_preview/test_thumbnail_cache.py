@@ -0,0 +1,63 @@
+import os
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-dataset-preview'))
+from ThumbnailCache import ThumbnailCache
+from ThumbnailLoader import ThumbnailLoader
+import numpy as np
+from PIL import Image
+
+
+def test_thumbnails_are_cached_and_invalidated(tmp_path):
+    random = np.random.default_rng(0)
+    images = []
+    for index in range(5):
+        images.append(str(tmp_path / '{}.png'.format(index)))
+        Image.fromarray(random.integers(0, 256, (40, 50, 3), dtype = np.uint8)).save(images[-1])
+    (tmp_path / 'corrupted.png').write_bytes(b'not an image')
+    images.append(str(tmp_path / 'corrupted.png'))
+
+    cache = ThumbnailCache(str(tmp_path / 'cache'), (16, 8), 'RGB')
+    first = cache.load(images)
+    assert cache.misses == 6 and first[-1] is None
+    expected = [np.asarray(ThumbnailLoader.load(image, 'RGB', (16, 8))) for image in images[:-1]]
+    assert all(np.array_equal(thumbnail, expected_thumbnail) for thumbnail, expected_thumbnail in zip(first, expected))
+
+    #a new instance reads the packed file and decodes only the changed image.
+    Image.fromarray(np.zeros((40, 50, 3), dtype = np.uint8)).save(images[2])
+    os.utime(images[2], ns = (1, 1))
+    cache = ThumbnailCache(str(tmp_path / 'cache'), (16, 8), 'RGB')
+    second = cache.load(images[::-1])[::-1]
+    assert cache.hits == 5 and cache.misses == 1 and second[-1] is None
+    assert np.array_equal(second[2], np.zeros((8, 16, 3), dtype = np.uint8))
+    assert all(np.array_equal(second[index], expected[index]) for index in [0, 1, 3, 4])
+
+
+def test_changed_and_failed_images_reuse_their_slots(tmp_path):
+    random = np.random.default_rng(1)
+    images = []
+    for index in range(4):
+        images.append(str(tmp_path / '{}.png'.format(index)))
+        Image.fromarray(random.integers(0, 256, (40, 50, 3), dtype = np.uint8)).save(images[-1])
+    cache = ThumbnailCache(str(tmp_path / 'cache'), (16, 8), 'RGB')
+    cache.load(images)
+    data_size = os.path.getsize(cache.data_path)
+    assert data_size == 4 * cache.record_size
+
+    #a changed image is written over its old record.
+    for _ in range(3):
+        Image.fromarray(random.integers(0, 256, (40, 50, 3), dtype = np.uint8)).save(images[1])
+        os.utime(images[1], ns = (random.integers(1, 2 ** 40), random.integers(1, 2 ** 40)))
+        thumbnails = ThumbnailCache(str(tmp_path / 'cache'), (16, 8), 'RGB').load(images)
+        assert np.array_equal(thumbnails[1], np.asarray(ThumbnailLoader.load(images[1], 'RGB', (16, 8))))
+        assert os.path.getsize(cache.data_path) == data_size
+
+    #the record of an image that failed is reused by a new image.
+    (tmp_path / '2.png').write_bytes(b'not an image')
+    images.append(str(tmp_path / '4.png'))
+    Image.fromarray(random.integers(0, 256, (40, 50, 3), dtype = np.uint8)).save(images[-1])
+    cache = ThumbnailCache(str(tmp_path / 'cache'), (16, 8), 'RGB')
+    thumbnails = cache.load(images)
+    assert thumbnails[2] is None and os.path.getsize(cache.data_path) == data_size
+    expected = [np.asarray(ThumbnailLoader.load(image, 'RGB', (16, 8))) for image in images[:2] + images[3:]]
+    assert all(np.array_equal(thumbnail, expected_thumbnail) for thumbnail, expected_thumbnail in zip(thumbnails[:2] + thumbnails[3:], expected))
+    assert ThumbnailCache(str(tmp_path / 'cache'), (16, 8), 'RGB').load(images[4:])[0] is not None
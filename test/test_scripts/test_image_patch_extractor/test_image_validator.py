@@ -0,0 +1,85 @@
+import os
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-patch-extractor'))
+from ImageValidator import ImageValidator
+from ValidationCache import ValidationCache
+from PIL import Image
+
+
+def test_iter_validate_uses_cache_until_file_changes(tmp_path):
+    source_directory = tmp_path / "images"
+    source_directory.mkdir()
+    Image.new('RGB', (80, 80)).save(source_directory / "valid.png")
+    Image.new('RGB', (16, 16)).save(source_directory / "small.png")
+    (source_directory / "corrupted.png").write_bytes(b"not an image")
+    cache_path = str(tmp_path / "validation-cache.db")
+
+    validator = ImageValidator()
+    results = {os.path.basename(path): (status, reason) for path, status, reason in validator.iter_validate(str(source_directory), cache_path = cache_path)}
+    assert results['valid.png'] == (True, None)
+    assert results['small.png'][0] is False
+    assert results['corrupted.png'] == (False, "image is corrupted")
+
+    #a valid image replaced by a corrupted one must be validated again.
+    (source_directory / "valid.png").write_bytes(b"corrupted now")
+    results = {os.path.basename(path): status for path, status, _ in validator.iter_validate(str(source_directory), cache_path = cache_path)}
+    assert results == {'valid.png': False, 'small.png': False, 'corrupted.png': False}
+
+
+def test_cached_files_are_not_opened_again(tmp_path, monkeypatch):
+    source_directory = tmp_path / "images"
+    source_directory.mkdir()
+    for index in range(5):
+        Image.new('RGB', (80, 80)).save(source_directory / "{}.png".format(index))
+    cache_path = str(tmp_path / "validation-cache.db")
+
+    opened = []
+    open_image = Image.open
+    def counting_open(path, *args, **kwargs):
+        opened.append(os.path.basename(path))
+        return open_image(path, *args, **kwargs)
+    monkeypatch.setattr(Image, 'open', counting_open)
+
+    validator = ImageValidator()
+    assert len(validator.validate(str(source_directory), cache_path = cache_path)[0]) == 5
+    assert sorted(opened) == ["{}.png".format(index) for index in range(5)]
+
+    #a second run reads the verdicts from the cache.
+    opened.clear()
+    assert len(validator.validate(str(source_directory), cache_path = cache_path)[0]) == 5
+    assert opened == []
+
+    #a touched file is validated again.
+    stat_result = os.stat(source_directory / "3.png")
+    os.utime(source_directory / "3.png", ns = (stat_result.st_atime_ns, stat_result.st_mtime_ns + 1000000000))
+    assert len(validator.validate(str(source_directory), cache_path = cache_path)[0]) == 5
+    assert opened == ["3.png"]
+
+
+def test_results_are_stored_in_batches(tmp_path, monkeypatch):
+    source_directory = tmp_path / "images"
+    source_directory.mkdir()
+    for index in range(30):
+        Image.new('RGB', (70, 70)).save(source_directory / "{}.png".format(index))
+    cache_path = str(tmp_path / "validation-cache.db")
+
+    stored = []
+    store = ValidationCache.store
+    def counting_store(cache, results, options):
+        stored.append(len(results))
+        return store(cache, results, options)
+    monkeypatch.setattr(ValidationCache, 'store', counting_store)
+    monkeypatch.setattr(ImageValidator, 'CACHE_STORE_BATCH', 8)
+
+    validator = ImageValidator()
+    assert len(list(validator.iter_validate(str(source_directory), num_workers = 2, max_in_flight = 2, cache_path = cache_path))) == 30
+    assert sum(stored) == 30 and all(size >= 8 for size in stored[:-1]) and len(stored) <= 4
+
+    #the results validated before the consumer stopped are stored as well.
+    cache_path = str(tmp_path / "stopped-cache.db")
+    stored.clear()
+    results = validator.iter_validate(str(source_directory), num_workers = 2, max_in_flight = 2, cache_path = cache_path)
+    consumed = [next(results) for _ in range(5)]
+    results.close()
+    assert sum(stored) >= 5
+    assert set(path for path, _, _ in consumed) <= set(ValidationCache(cache_path).lookup({path: ValidationCache.signature(os.stat(path)) for path, _, _ in consumed}, ValidationCache.options_key((64, 64), [])))
@@ -0,0 +1,44 @@
+import os
+import sys
+import threading
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-patch-extractor'))
+from PatchDeduplicator import PatchDeduplicator
+import numpy as np
+
+
+def test_duplicates_share_a_digest_and_distinct_patches_do_not(monkeypatch):
+    random = np.random.default_rng(0)
+    distinct = [random.integers(0, 256, (16, 16, 3), dtype = np.uint8) for _ in range(40)]
+    #a single changed byte, the same bytes with another shape and another dtype are all distinct patches.
+    changed = distinct[0].copy()
+    changed[5, 5, 1] ^= 1
+    distinct += [changed, distinct[1].reshape(16, 48), distinct[2].astype(np.float64)]
+    patches = distinct + [distinct[index].copy() for index in [0, 3, 3, 41]]
+
+    digests = PatchDeduplicator.batch_digest(patches)
+    keys = [tuple(digest) for digest in digests.tolist()]
+    assert len(set(keys[:len(distinct)])) == len(distinct)
+    assert keys[len(distinct):] == [keys[0], keys[3], keys[3], keys[41]]
+    assert PatchDeduplicator().claim(keys) == [True] * len(distinct) + [False] * 4
+
+    #the digests don't depend on the number of patches hashed at a time.
+    monkeypatch.setattr(PatchDeduplicator, 'STEP_BYTES', 1000)
+    assert np.array_equal(PatchDeduplicator.batch_digest(patches), digests)
+
+
+def test_concurrent_claims_claim_each_key_once():
+    deduplicator = PatchDeduplicator(['existing'])
+    keys = [(index, index) for index in range(2000)]
+    results = []
+
+    def claim():
+        results.append((deduplicator.claim(keys), [deduplicator.claim_name(str(index)) for index in range(200)]))
+    threads = [threading.Thread(target = claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [sum(claimed) for claimed in zip(*[claims for claims, _ in results])] == [1] * len(keys)
+    assert [sum(claimed) for claimed in zip(*[names for _, names in results])] == [1] * 200
+    assert not deduplicator.claim_name('existing')
@@ -0,0 +1,28 @@
+import filecmp
+import hashlib
+import os
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-dataset-info'))
+from ImageStrips import ImageStrips
+import numpy as np
+from PIL import Image
+
+TOOLS_DIRECTORIES = ['image-dataset-info', 'image-dataset-cleaner', 'image-unique-colors']
+
+
+def test_bands_match_full_buffer():
+    random = np.random.default_rng(0)
+    pixels = random.integers(0, 4, (97, 61, 3), dtype = np.uint8) * 60
+    rgb = Image.fromarray(pixels)
+
+    for image in [rgb, rgb.convert('1'), rgb.convert('L'), rgb.convert('P'), rgb.convert('RGBA'), rgb.convert('I'), rgb.convert('F')]:
+        full_array = np.asarray(image)
+        expected_colors = np.unique(full_array.reshape(-1, full_array.shape[2] if full_array.ndim > 2 else 1), axis = 0).shape[0]
+        for band_pixels in [61, 1000, None]:
+            assert ImageStrips.blake2b(image, band_pixels) == hashlib.blake2b(image.tobytes()).hexdigest()
+            assert ImageStrips.count_unique_colors(image, band_pixels) == expected_colors
+
+
+def test_copies_are_identical():
+    copies = [os.path.join(os.getcwd(), directory, 'ImageStrips.py') for directory in TOOLS_DIRECTORIES]
+    assert all(filecmp.cmp(copies[0], copy, shallow = False) for copy in copies[1:])
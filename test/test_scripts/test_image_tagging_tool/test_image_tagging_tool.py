@@ -0,0 +1,34 @@
+import os
+import sys
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-tagging-tool'))
+import ImageTaggingTool
+from LabelStore import LabelStore
+from SamplePool import SamplePool
+from PIL import Image
+
+
+def test_images_out_of_the_images_folder_are_rejected(tmp_path, monkeypatch):
+    images_folder = tmp_path / 'images'
+    (images_folder / 'nested').mkdir(parents = True)
+    Image.new('RGB', (4, 4)).save(images_folder / 'nested' / 'a.png')
+    Image.new('RGB', (4, 4)).save(tmp_path / 'secret.png')
+    label_store = LabelStore(str(tmp_path / 'labels'))
+    monkeypatch.setattr(ImageTaggingTool, 'images_folder', str(images_folder))
+    monkeypatch.setattr(ImageTaggingTool, 'label_store', label_store, raising = False)
+    monkeypatch.setattr(ImageTaggingTool, 'files_pool', SamplePool(['nested/a.png']))
+
+    assert ImageTaggingTool.dataset_image_path('nested/a.png') == os.path.normpath(str(images_folder / 'nested' / 'a.png'))
+    assert ImageTaggingTool.dataset_image_path('nested/../nested/a.png') is not None
+    assert ImageTaggingTool.dataset_image_path('../secret.png') is None
+    assert ImageTaggingTool.dataset_image_path(str(tmp_path / 'secret.png')) is None
+    assert ImageTaggingTool.dataset_image_path('../images-other/a.png') is None
+
+    opened = []
+    monkeypatch.setattr(Image, 'open', lambda *args, **kwargs: opened.append(args))
+    client = ImageTaggingTool.app.test_client()
+    for image_path in ['../secret.png', str(tmp_path / 'secret.png'), 'nested/..%2F..%2Fsecret.png']:
+        response = client.post('/taggingTool/api/labelImages', json = {'images': ['http://localhost/taggingTool/api/getImages/nested/a.png', image_path],
+                                                                      'username': 'user', 'label': 'cat', 'task': 'tagging'})
+        assert response.status_code == 400
+    assert opened == [] and label_store.records('cat') == [] and 'nested/a.png' in ImageTaggingTool.files_pool
+    label_store.close()
@@ -0,0 +1,68 @@
+import json
+import os
+import sys
+import threading
+import pytest
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-tagging-tool'))
+from LabelStore import LabelStore
+
+
+def test_legacy_labels_are_migrated_and_exported(tmp_path):
+    with open(tmp_path / 'good.json', 'w') as legacy_file:
+        json.dump({'good': {'tag_task': 'good', 'tag_data': [{'image_path': 'legacy.png'}]}}, legacy_file)
+    label_store = LabelStore(str(tmp_path))
+
+    def label(thread_index):
+        for index in range(50):
+            label_store.append('good', [{'image_path': '{}-{}.png'.format(thread_index, index)}])
+    threads = [threading.Thread(target = label, args = (thread_index,)) for thread_index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    label_store.append('bad', [{'image_path': 'bad.png'}])
+    label_store.close()
+
+    #a line left partially written by a killed run is dropped.
+    with open(tmp_path / 'good.jsonl', 'a') as label_file:
+        label_file.write('{"image_pa')
+    label_store = LabelStore(str(tmp_path))
+    label_store.append('good', [{'image_path': 'last.png'}])
+    records = label_store.records('good')
+    assert len(records) == 202 and records[0]['image_path'] == 'legacy.png' and records[-1]['image_path'] == 'last.png'
+
+    label_store.export()
+    label_store.close()
+    with open(tmp_path / 'good.json') as legacy_file:
+        assert json.load(legacy_file) == {'good': {'tag_task': 'good', 'tag_data': records}}
+    with open(tmp_path / 'bad.json') as legacy_file:
+        assert json.load(legacy_file)['bad']['tag_data'] == [{'image_path': 'bad.png'}]
+
+
+def test_other_json_files_are_not_migrated_nor_overwritten(tmp_path):
+    other_files = {'notes.json': [1, 2, 3], 'other.json': {'cat': {'tag_task': 'cat', 'tag_data': []}}, 'partial.json': {'partial': {'tag_task': 'partial'}}}
+    for file_name, content in other_files.items():
+        with open(tmp_path / file_name, 'w') as other_file:
+            json.dump(content, other_file)
+    with open(tmp_path / 'cat.json', 'w') as legacy_file:
+        json.dump({'cat': {'tag_task': 'cat', 'tag_data': [{'image_path': 'legacy.png'}]}}, legacy_file)
+    (tmp_path / 'broken.json').write_text('{"broken": ')
+
+    label_store = LabelStore(str(tmp_path))
+    assert label_store.labels() == ['cat']
+    label_store.append('dog', [{'image_path': 'dog.png'}])
+    for label in ['notes', 'other', 'partial', 'broken']:
+        with pytest.raises(ValueError):
+            label_store.append(label, [{'image_path': 'a.png'}])
+    assert sorted(os.path.basename(path) for path in label_store.export()) == ['cat.json', 'dog.json']
+    with pytest.raises(ValueError):
+        label_store.export(['notes'])
+    label_store.close()
+
+    for file_name, content in other_files.items():
+        with open(tmp_path / file_name) as other_file:
+            assert json.load(other_file) == content
+    assert (tmp_path / 'broken.json').read_text() == '{"broken": '
+    assert sorted(path.name for path in tmp_path.glob('*.jsonl')) == ['cat.jsonl', 'dog.jsonl']
+    with open(tmp_path / 'cat.json') as legacy_file:
+        assert json.load(legacy_file)['cat']['tag_data'] == [{'image_path': 'legacy.png'}]
@@ -0,0 +1,37 @@
+import os
+import sys
+import threading
+sys.path.insert(0, os.path.join(os.getcwd(), 'image-tagging-tool'))
+from SamplePool import SamplePool
+
+
+def test_removed_images_are_never_sampled():
+    pool = SamplePool(['./{}.png'.format(index) for index in range(100)], seed = 7)
+    assert len(pool) == 100 and '5.png' in pool
+
+    for index in range(0, 100, 3):
+        assert pool.remove('{}.png'.format(index))
+    assert not pool.remove('0.png')
+    assert len(pool) == 66 and all(pool.paths[pool.slots[path]] == path for path in pool.paths)
+
+    samples = [image['url'] for _ in range(50) for image in pool.sample(16)]
+    assert len(set(samples)) > 16 and all(int(path.split('.')[0]) % 3 != 0 for path in samples)
+    #the same seed gives the same samples.
+    assert SamplePool(['{}.png'.format(index) for index in range(100)], seed = 7).sample(16) == SamplePool(['{}.png'.format(index) for index in range(100)], seed = 7).sample(16)
+
+
+def test_concurrent_removes_and_samples():
+    pool = SamplePool(['{}.png'.format(index) for index in range(2000)], seed = 1)
+
+    def remove(start):
+        for index in range(start, 2000, 4):
+            assert pool.remove('{}.png'.format(index))
+            pool.sample(4)
+
+    threads = [threading.Thread(target = remove, args = (start,)) for start in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(pool) == 500 and sorted(pool.paths) == sorted('{}.png'.format(index) for index in range(3, 2000, 4))
+    assert all(pool.paths[pool.slots[path]] == path for path in pool.paths)